@@ -0,0 +1,53 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Run benchmarks from the repository root, e.g.::
+
+    python -m benchmarks.bench_player_table
+"""
+
+import contextlib
+import os
+import statistics
+import time
+from unittest.mock import patch
+
+import django
+
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fplsite.settings")
+django.setup()
+
+from fpldash import sample_data  # noqa: E402
+from fpldash.bootstrap import Bootstrap  # noqa: E402
+
+
+@contextlib.contextmanager
+def sample_payloads(current_gw: int = 30):
+    """
+    Serve synthetic full-size bootstrap / fixtures from the cache; yields
+    the raw payloads.
+    """
+    bootstrap = sample_data.make_bootstrap(current_gw)
+    fixtures = sample_data.make_fixtures(bootstrap["teams"], current_gw)
+    entries = {
+        "bootstrap": {"data": Bootstrap.parse(bootstrap), "ts": time.time(), "version": "bench-bootstrap"},
+        "fixtures": {"data": fixtures, "ts": time.time(), "version": "bench-fixtures"},
+    }
+    with patch("fpldash.cache._get_entry", side_effect=lambda key, url: entries[key]):
+        yield bootstrap, fixtures
+
+
+def cpu_times(fn, repeat: int = 30, setup=None) -> list:
+    """Per-call CPU seconds of ``fn()`` over ``repeat`` runs."""
+    out = []
+    for _ in range(repeat):
+        if setup:
+            setup()
+        t0 = time.process_time()
+        fn()
+        out.append(time.process_time() - t0)
+    return out
+
+
+def fmt_ms(samples: list) -> str:
+    return f"{statistics.median(samples) * 1000:8.2f} ms"
@@ -0,0 +1,140 @@
+"""
+Worker memory held for bootstrap-static: raw JSON vs ``Bootstrap``.
+
+Each form runs in a fresh interpreter (Django, numpy and pandas already
+imported, as in a worker) through a few payload refreshes.  Like the
+cache, a refresh parses the new payload while the previous one is still
+held, then swaps it in together with the player table built from it.
+"raw" is what a worker held before: the JSON dict plus a table of every
+element field; "compact" is the ``Bootstrap`` plus its table.
+
+  rss      — resident-set growth of the process after the refreshes
+  held     — Python heap held by the cached payload and its table
+  pickle   — size of the cache entry the file backend writes
+  parse    — json.loads (plus Bootstrap.parse) per refresh
+
+By default the synthetic full-size season is used; pass a payload
+recorded with ``record_fpl`` to measure the live shape, whose elements
+carry about 100 fields each::
+
+    python -m benchmarks.bench_bootstrap
+    python -m benchmarks.bench_bootstrap --file recordings/bootstrap-static.json
+"""
+
+import argparse
+import gc
+import json
+import pickle
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+REFRESHES = 4
+
+
+def _rss_kib() -> int:
+    with open("/proc/self/status") as fh:
+        for line in fh:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _raw_table(data: dict):
+    """The player table as built from the raw payload before ``Bootstrap``."""
+    import pandas as pd
+
+    from fpldash.bootstrap import FLOAT_FIELDS, INT_FIELDS, NULLABLE_FIELDS
+    from fpldash.players import POSITIONS
+
+    df = pd.DataFrame(data["elements"])
+    for col in FLOAT_FIELDS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+    for col in INT_FIELDS:
+        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0).astype(int)
+    for col in NULLABLE_FIELDS:
+        df[col] = pd.to_numeric(df[col], errors="coerce")
+    df["Team"] = df["team"].map({t["id"]: t["name"] for t in data.get("teams", [])})
+    df["Position"] = df["element_type"].map(POSITIONS)
+    df["price"] = df["now_cost"] / 10.0
+    return df
+
+
+def _child(form: str, path: str) -> dict:
+    from benchmarks import _common  # noqa: F401  (django.setup)
+    from fpldash.bootstrap import Bootstrap
+    from fpldash.players import build_player_table
+
+    with open(path, "rb") as fh:
+        body = fh.read()
+
+    def refresh():
+        t0 = time.perf_counter()
+        data = json.loads(body)
+        if form == "compact":
+            data = Bootstrap.parse(data)
+        parse = time.perf_counter() - t0
+        table = _raw_table(data) if form == "raw" else build_player_table(data)
+        return (data, table), parse
+
+    gc.collect()
+    rss = _rss_kib()
+    held, parse_times = None, []
+    for _ in range(REFRESHES):
+        new, seconds = refresh()
+        held = new
+        parse_times.append(seconds)
+        del new
+        gc.collect()
+    rss = _rss_kib() - rss
+
+    # Held heap: trace one more refresh, then drop the entry it replaced.
+    tracemalloc.start()
+    new, _ = refresh()
+    held = new
+    del new
+    gc.collect()
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "rss_kib": rss,
+        "held_kib": size / 1024,
+        "pickle_kib": len(pickle.dumps(held[0], protocol=pickle.HIGHEST_PROTOCOL)) / 1024,
+        "parse_ms": statistics.median(parse_times) * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--file", help="bootstrap-static JSON (default: synthetic season)")
+    parser.add_argument("--child", choices=("raw", "compact"), help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(_child(args.child, args.file)))
+        return
+
+    path = args.file
+    if path is None:
+        from fpldash import sample_data
+
+        with tempfile.NamedTemporaryFile("w", suffix=".json", delete=False) as fh:
+            json.dump(sample_data.make_bootstrap(), fh)
+            path = fh.name
+
+    print(f"{'form':8} {'rss':>10} {'held':>10} {'pickle':>10} {'parse':>10}")
+    for form in ("raw", "compact"):
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.bench_bootstrap", "--child", form, "--file", path],
+            check=True, capture_output=True, text=True,
+        )
+        r = json.loads(out.stdout.splitlines()[-1])
+        print(f"{form:8} {r['rss_kib']:>6.0f} KiB {r['held_kib']:>6.0f} KiB "
+              f"{r['pickle_kib']:>6.0f} KiB {r['parse_ms']:>7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
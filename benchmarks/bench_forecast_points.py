@@ -0,0 +1,93 @@
+"""
+Weekly-points fill for the forecast: per-cell writes vs the points block.
+
+"cells" reproduces the old fill — object-dtype ``W1..Wn`` columns set one
+``top.at[...]`` write per element-summary history row; "block" is
+``points.get_points`` (finished gameweeks from the warehouse, the current
+one from its live payload) turned into the same columns.  The histories,
+the warehouse and the live payload are built up front from the same
+synthetic season, so only the fill itself is measured.  Peak memory is
+the tracemalloc high-water mark of one fill.
+"""
+
+import tracemalloc
+from unittest.mock import patch
+
+import pandas as pd
+
+from benchmarks._common import cpu_times, fmt_ms, sample_payloads
+
+from fpldash import forecast, history, points, sample_data  # noqa: E402
+from fpldash.players import get_player_table  # noqa: E402
+
+CURRENT_GW = 30
+LIMITS = (50, 200, None)
+
+
+def _fill_cells(top, histories, week_cols):
+    top = top.copy()
+    for col in week_cols:
+        top[col] = None
+    for idx, pid in zip(top.index, top["id"].tolist()):
+        for h in histories[pid]:
+            rnd = h.get("round")
+            if isinstance(rnd, int) and 1 <= rnd <= len(week_cols):
+                top.at[idx, f"W{rnd}"] = h.get("total_points")
+    return top
+
+
+def _fill_block(top, week_cols):
+    block, _ = points.get_points(top["id"].tolist(), len(week_cols))
+    weeks = block.astype(object)
+    weeks[block == points.MISSING] = None
+    return pd.concat([top, pd.DataFrame(weeks, index=top.index, columns=week_cols)], axis=1)
+
+
+def _peak_kib(fn) -> float:
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return peak / 1024
+
+
+def main():
+    with sample_payloads(CURRENT_GW) as (bootstrap, fixtures):
+        histories = {
+            e["id"]: sample_data.make_element_summary(e, fixtures, CURRENT_GW)["history"]
+            for e in bootstrap["elements"]
+        }
+        warehouse = history.Warehouse({
+            gw: history.frame(sample_data.make_event_live(histories, gw))
+            for gw in range(1, CURRENT_GW)
+        })
+        live = (sample_data.make_event_live(histories, CURRENT_GW), "bench-live")
+
+        ml = {e["id"]: float(e["points_per_game"]) for e in bootstrap["elements"]}
+        with patch("fpldash.history.get_warehouse", return_value=warehouse), \
+                patch("fpldash.history.get_event_live_versioned", return_value=live), \
+                patch("fpldash.forecast.get_ml_predicted_scores", return_value=ml):
+            df = get_player_table()
+            week_cols = [f"W{i}" for i in range(1, CURRENT_GW + 1)]
+            points.get_points(df["id"].tolist(), CURRENT_GW)  # warm the live frame
+            matrix = warehouse.stats["total_points"]
+            print(f"warehouse: {matrix.shape} {matrix.dtype} points, "
+                  f"{matrix.nbytes / 1024:.1f} KiB "
+                  f"({sum(m.nbytes for m in warehouse.stats.values()) / 1024:.0f} KiB "
+                  f"for all {len(warehouse.stats)} stats)\n")
+
+            print(f"{'players':>8} {'cells':>11} {'block':>11} "
+                  f"{'cells peak':>12} {'block peak':>12} {'forecast':>11}")
+            for limit in LIMITS:
+                top = df.head(limit) if limit else df
+                cells = cpu_times(lambda: _fill_cells(top, histories, week_cols), repeat=5)
+                block = cpu_times(lambda: _fill_block(top, week_cols))
+                cells_peak = _peak_kib(lambda: _fill_cells(top, histories, week_cols))
+                block_peak = _peak_kib(lambda: _fill_block(top, week_cols))
+                full = cpu_times(lambda: forecast.get_forecast_data(limit=len(top)), repeat=10)
+                print(f"{len(top):>8} {fmt_ms(cells)} {fmt_ms(block)} "
+                      f"{cells_peak:>8.0f} KiB {block_peak:>8.0f} KiB {fmt_ms(full)}")
+
+
+if __name__ == "__main__":
+    main()
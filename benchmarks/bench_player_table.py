@@ -0,0 +1,56 @@
+"""
+Per-request CPU with and without the shared player table.
+
+"rebuild" drops the table before every call, which is what each endpoint
+paid when it re-ran ``pd.DataFrame(elements)`` plus coercions itself;
+"shared" reuses the table built once for the bootstrap version.  The
+response-body and suggestion-score caches are emptied before every call
+in both columns, so the views really rebuild their payloads.
+"""
+
+from unittest.mock import patch
+
+from benchmarks._common import cpu_times, fmt_ms, sample_payloads
+
+from fpldash import players, responses, suggestions, views  # noqa: E402
+from fpldash.bootstrap import Bootstrap  # noqa: E402
+from fpldash.fpl_data import get_fpl_data  # noqa: E402
+from django.test import RequestFactory  # noqa: E402
+
+
+def _drop_bodies():
+    with responses._lock:
+        responses._bodies.clear()
+    with suggestions._lock:
+        suggestions._scored.clear()
+
+
+def _drop_table():
+    _drop_bodies()
+    with players._lock:
+        players._table["version"] = None
+
+
+def main():
+    rf = RequestFactory()
+    with sample_payloads() as (bootstrap, _):
+        ml = {e["id"]: 3.0 for e in bootstrap["elements"]}
+        with patch("fpldash.suggestions.get_ml_predicted_scores", return_value=ml):
+            parsed = Bootstrap.parse(bootstrap)
+            build = cpu_times(lambda: players.build_player_table(parsed))
+            print(f"table build (once per bootstrap version): {fmt_ms(build)}\n")
+            cases = {
+                "get_fpl_data": get_fpl_data,
+                "api_suggestions": lambda: views.api_suggestions(rf.get("/api/suggestions")),
+                "api_pricechanges_fpl": lambda: views.api_pricechanges_fpl(rf.get("/api/pricechanges_fpl")),
+            }
+            print(f"{'case':24} {'rebuild':>11} {'shared':>11}")
+            for name, fn in cases.items():
+                before = cpu_times(fn, setup=_drop_table)
+                fn()
+                after = cpu_times(fn, setup=_drop_bodies)
+                print(f"{name:24} {fmt_ms(before)} {fmt_ms(after)}")
+
+
+if __name__ == "__main__":
+    main()
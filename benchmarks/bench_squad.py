@@ -0,0 +1,67 @@
+"""
+Latency of the squad builder on the full ~700-player pool.
+
+Each run draws a fresh set of predicted scores (so nothing is cached
+between runs) and times ``build_squad`` end to end: candidate pool,
+dominance pruning and the MILP solve.  The unpruned solve is timed too,
+and its objective is compared to confirm that pruning never changes the
+optimum.
+"""
+
+import statistics
+import time
+
+import numpy as np
+
+from benchmarks._common import sample_payloads
+
+from fpldash import squad  # noqa: E402
+
+RUNS = 20
+BUDGETS = (1000, 900, 830)
+
+
+def _objective(picked, points, bench_weight=0.1):
+    xi = points[picked["xi"]].sum()
+    bench = points[picked["squad"]].sum() - xi
+    return xi + points[picked["captain"]] + bench_weight * bench
+
+
+def _p95(samples):
+    return sorted(samples)[int(round(0.95 * (len(samples) - 1)))]
+
+
+def main():
+    with sample_payloads() as (bootstrap, _):
+        full, pruned, unpruned, candidates = [], [], [], []
+        for run in range(RUNS):
+            rng = np.random.default_rng(run)
+            ml = {e["id"]: round(float(rng.gamma(2.0, 1.5)), 2) for e in bootstrap["elements"]}
+            budget = BUDGETS[run % len(BUDGETS)]
+
+            t0 = time.perf_counter()
+            result = squad.build_squad(budget, ml_scores=ml)
+            full.append(time.perf_counter() - t0)
+            candidates.append(result["candidates"])
+
+            df, points = squad.candidate_pool(ml)
+            arrays = (df["element_type"].to_numpy(), df["team"].to_numpy(), df["now_cost"].to_numpy())
+            t0 = time.perf_counter()
+            keep = np.flatnonzero(~squad.prune_dominated(*arrays, points))
+            best = squad.solve(*(a[keep] for a in arrays), points[keep], budget)
+            pruned.append(time.perf_counter() - t0)
+            t0 = time.perf_counter()
+            reference = squad.solve(*arrays, points, budget)
+            unpruned.append(time.perf_counter() - t0)
+            assert abs(_objective(best, points[keep]) - _objective(reference, points)) < 1e-6
+
+        print(f"pool {result['pool']} players, {statistics.median(candidates):.0f} candidates after pruning")
+        print(f"{'':24} {'median':>10} {'p95':>10}")
+        for name, samples in (("build_squad", full), ("prune + solve", pruned),
+                              ("solve, no pruning", unpruned)):
+            print(f"{name:24} {statistics.median(samples) * 1000:7.1f} ms "
+                  f"{_p95(samples) * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
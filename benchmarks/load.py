@@ -0,0 +1,260 @@
+"""
+Load comparison: the baseline sync app against sync WSGI and ASGI workers.
+
+Starts three servers under gunicorn and drives each with the same burst
+of concurrent requests to the I/O-bound endpoints (per-player summaries
+and managers' teams), with the same simulated upstream latency:
+
+  baseline (sync) — the original app, checked out from the baseline
+                    commit into a temporary git worktree, on sync
+                    workers.  Its ``requests`` calls to the FPL API are
+                    redirected to an HTTP server in front of the offline
+                    stand-in, since that tree has no offline mode.
+  wsgi (sync)     — the current app on ``fplsite.wsgi`` with sync workers.
+  asgi (uvicorn)  — the current app as the Dockerfile runs it.
+
+The current app talks to the stand-in in process (``FPL_OFFLINE``); the
+baseline pays one extra localhost hop per upstream call, which is small
+next to the simulated latency.  The baseline only serves the configured
+manager's team (``/api/myteam``), so its team requests all go there.
+
+Sync workers hold a whole process while a request waits upstream, so
+throughput is capped near ``workers / latency``; async workers keep
+serving other requests during the wait.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.load
+    python -m benchmarks.load --concurrency 64 --requests 600 --latency 0.3
+    python -m benchmarks.load --baseline <commit>
+"""
+
+import argparse
+import asyncio
+import contextlib
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import httpx
+
+ROOT = Path(__file__).resolve().parent.parent
+WORKERS = "2"
+SERVERS = {
+    "baseline (sync)": ["fplsite.wsgi:application"],
+    "wsgi (sync)": ["fplsite.wsgi:application"],
+    "asgi (uvicorn)": ["fplsite.asgi:application", "-k", "uvicorn_worker.UvicornWorker"],
+}
+BASELINE = "baseline (sync)"
+FPL_API = "https://fantasy.premierleague.com/api/"
+# SECURE_SSL_REDIRECT is on outside DEBUG; present as the TLS proxy would.
+HEADERS = {"X-Forwarded-Proto": "https"}
+
+# Gunicorn config for the baseline tree: point its FPL API calls at the
+# local upstream.  Runs in the master before the workers fork.
+_REDIRECT_CONFIG = '''\
+import requests.sessions
+
+_request = requests.sessions.Session.request
+
+
+def _redirected(self, method, url, *args, **kwargs):
+    if url.startswith({api!r}):
+        url = {upstream!r} + url[{n}:]
+    return _request(self, method, url, *args, **kwargs)
+
+
+requests.sessions.Session.request = _redirected
+'''
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _paths(n: int, per_manager: bool = True) -> list:
+    """Distinct cache-missing URLs: player summaries and managers' teams."""
+    return [
+        f"/api/player-summary/{1 + i // 2 % 700}" if i % 2 == 0
+        else f"/api/myteam/{1000 + i}" if per_manager else "/api/myteam"
+        for i in range(n)
+    ]
+
+
+def _root_commit() -> str:
+    out = subprocess.run(["git", "rev-list", "--max-parents=0", "HEAD"], cwd=ROOT,
+                         check=True, capture_output=True, text=True).stdout.split()
+    return out[-1]
+
+
+@contextlib.contextmanager
+def _worktree(rev: str):
+    """A throwaway checkout of ``rev``."""
+    tmp = tempfile.mkdtemp(prefix="fpldash-baseline-")
+    subprocess.run(["git", "worktree", "add", "--detach", tmp, rev], cwd=ROOT, check=True,
+                   capture_output=True)
+    try:
+        yield Path(tmp)
+    finally:
+        subprocess.run(["git", "worktree", "remove", "--force", tmp], cwd=ROOT,
+                       capture_output=True)
+
+
+def serve_upstream(port: int, latency: float) -> None:
+    """Serve the offline stand-in over HTTP at 127.0.0.1:``port``."""
+    import django
+    import uvicorn
+
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "fplsite.settings")
+    django.setup()
+    from fpldash.offline import OfflineFPL
+
+    stand_in = OfflineFPL(latency=latency)
+
+    async def app(scope, receive, send):
+        status, headers, body, delay = stand_in.respond(
+            FPL_API + scope["path"][len("/api/"):], {}
+        )
+        if delay:
+            await asyncio.sleep(delay)
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": [(k.lower().encode(), v.encode()) for k, v in headers.items()],
+        })
+        await send({"type": "http.response.body", "body": body})
+
+    uvicorn.run(app, host="127.0.0.1", port=port, lifespan="off", log_level="warning")
+
+
+async def _wait_ready(client: httpx.AsyncClient, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if (await client.get("/", headers=HEADERS)).status_code == 200:
+                return
+        except httpx.TransportError:
+            pass
+        await asyncio.sleep(0.2)
+    raise RuntimeError("server did not start")
+
+
+async def _drive(base_url: str, paths: list, warm: str, concurrency: int) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=120) as client:
+        await _wait_ready(client)
+        # Warm each worker's bootstrap cache so only per-request I/O is measured.
+        await asyncio.gather(*(client.get(warm, headers=HEADERS) for _ in range(8)))
+
+        queue = list(reversed(paths))
+        latencies, errors = [], 0
+
+        async def user():
+            nonlocal errors
+            while queue:
+                path = queue.pop()
+                t0 = time.perf_counter()
+                r = await client.get(path, headers=HEADERS)
+                latencies.append(time.perf_counter() - t0)
+                if r.status_code != 200:
+                    errors += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(user() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "rps": len(paths) / elapsed,
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+        "errors": errors,
+        "seconds": elapsed,
+    }
+
+
+def run(app_args: list, args, tree: Path = None, upstream: str = None) -> dict:
+    """Drive one server; ``tree`` / ``upstream`` select the baseline setup."""
+    port = _free_port()
+    env = dict(
+        os.environ,
+        DJANGO_SETTINGS_MODULE="fplsite.settings",
+        FPL_OFFLINE="true",
+        FPL_OFFLINE_DIR="",
+        FPL_OFFLINE_LATENCY=str(args.latency),
+        FPL_SNAPSHOTS="false",  # no migrated database here
+    )
+    cmd = [
+        sys.executable, "-m", "gunicorn", *app_args,
+        "--bind", f"127.0.0.1:{port}", "--workers", WORKERS, "--timeout", "120",
+        "--log-level", "warning",
+    ]
+    with tempfile.TemporaryDirectory() as tmp:
+        if tree is not None:
+            config = Path(tmp) / "redirect.py"
+            config.write_text(_REDIRECT_CONFIG.format(api=FPL_API, upstream=upstream,
+                                                      n=len(FPL_API)))
+            cmd += ["--chdir", str(tree), "-c", str(config)]
+            env.pop("PYTHONPATH", None)
+        server = subprocess.Popen(cmd, env=env, cwd=tree or ROOT)
+        try:
+            per_manager = tree is None
+            return asyncio.run(_drive(
+                f"http://127.0.0.1:{port}", _paths(args.requests, per_manager),
+                "/api/myteam/1" if per_manager else "/api/myteam", args.concurrency,
+            ))
+        finally:
+            server.terminate()
+            server.wait(30)
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--latency", type=float, default=0.2,
+                        help="simulated upstream latency in seconds (default 0.2)")
+    parser.add_argument("--baseline", default=None,
+                        help="commit of the baseline app (default: the root commit)")
+    parser.add_argument("--upstream", type=int, default=None, help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.upstream is not None:
+        serve_upstream(args.upstream, args.latency)
+        return 0
+
+    rev = args.baseline or _root_commit()
+    print(f"{args.requests} requests, {args.concurrency} concurrent, "
+          f"{args.latency * 1000:.0f} ms upstream latency, {WORKERS} workers, "
+          f"baseline {rev[:10]}\n")
+    print(f"{'server':16} {'req/s':>8} {'p50':>10} {'p95':>10} {'errors':>7}")
+    upstream_port = _free_port()
+    upstream = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.load", "--upstream", str(upstream_port),
+         "--latency", str(args.latency)],
+        cwd=ROOT,
+    )
+    try:
+        with _worktree(rev) as tree:
+            for name, app_args in SERVERS.items():
+                if name == BASELINE:
+                    r = run(app_args, args, tree, f"http://127.0.0.1:{upstream_port}/api/")
+                else:
+                    r = run(app_args, args)
+                print(f"{name:16} {r['rps']:8.1f} {r['p50_ms']:7.0f} ms "
+                      f"{r['p95_ms']:7.0f} ms {r['errors']:7d}")
+    finally:
+        upstream.terminate()
+        upstream.wait(30)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
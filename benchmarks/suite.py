@@ -0,0 +1,174 @@
+"""
+Benchmark suite for the data pipeline and the JSON endpoints.
+
+Every case runs against the offline FPL stand-in (fpldash/offline.py)
+with its synthetic full-size season — 700 elements, 380 fixtures, 38
+events — so results depend only on the code and the machine.  Caches are
+warmed before timing, so view handlers are measured in steady state
+(what a repeat visitor costs) and the builder functions are measured
+doing their full work.
+
+For each case the suite reports median and p95 wall time, the memory a
+call leaves allocated, and its peak traced allocation.  Results are
+compared with ``benchmarks/baseline.json``; a case whose median or peak
+memory exceeds the baseline by more than ``--threshold`` is flagged and
+the run exits with status 1.
+
+Usage (from the repository root)::
+
+    python -m benchmarks.suite                   # compare with baseline
+    python -m benchmarks.suite --save-baseline   # record a new baseline
+    python -m benchmarks.suite --only forecast   # cases matching a substring
+
+``views.api_pricechanges`` is not included: it only talks to third-party
+tweet sources, which the stand-in does not serve.
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from unittest.mock import patch
+
+os.environ["FPL_OFFLINE"] = "true"
+os.environ["FPL_OFFLINE_LATENCY"] = "0"
+os.environ["FPL_SNAPSHOTS"] = "false"
+
+from benchmarks import _common  # noqa: E402,F401  (django.setup)
+
+import asyncio  # noqa: E402
+
+from django.test import RequestFactory  # noqa: E402
+
+from fpldash import cache, history, ml_predictions, offline, squad, transfers, views  # noqa: E402
+from fpldash.bootstrap import Bootstrap  # noqa: E402
+from fpldash.forecast import get_forecast_data  # noqa: E402
+from fpldash.fpl_data import get_fpl_data  # noqa: E402
+
+BASELINE = Path(__file__).with_name("baseline.json")
+DEFAULT_THRESHOLD = 0.25
+# Ignore growth smaller than this: sub-millisecond cases are mostly noise.
+_MIN_DELTA = {"median_ms": 0.5, "peak_kib": 16}
+
+
+def _cases() -> dict:
+    """name -> (callable, repeat)."""
+    rf = RequestFactory()
+    request = lambda path: rf.get(path)  # noqa: E731
+    # Async views run on one long-lived loop, as under an ASGI worker.
+    run = asyncio.new_event_loop().run_until_complete
+    raw_bootstrap = offline.get_stand_in().bootstrap()
+    return {
+        "bootstrap.parse": (lambda: Bootstrap.parse(raw_bootstrap), 20),
+        "get_fpl_data": (get_fpl_data, 30),
+        "compute_team_fdr": (lambda: cache.compute_team_fdr(cache.get_bootstrap(), n_gws=3), 30),
+        "ml._train_and_predict": (ml_predictions._train_and_predict, 5),
+        "squad.build_squad": (squad.build_squad, 10),
+        "transfers.plan": (lambda: transfers.plan("bench", 42), 10),
+        "get_forecast_data[50]": (lambda: get_forecast_data(limit=50), 20),
+        "get_forecast_data[200]": (lambda: get_forecast_data(limit=200), 20),
+        "views.api_data": (lambda: views.api_data(request("/api/data")), 50),
+        "views.api_suggestions": (lambda: views.api_suggestions(request("/api/suggestions")), 50),
+        "views.api_forecast": (lambda: run(views.api_forecast(request("/api/forecast"))), 50),
+        "views.api_player_summary": (lambda: run(views.api_player_summary(request("/"), 42)), 50),
+        "views.api_myteam": (lambda: run(views.api_myteam(request("/api/myteam"))), 30),
+        "views.api_pricechanges_fpl": (
+            lambda: views.api_pricechanges_fpl(request("/api/pricechanges_fpl")), 50
+        ),
+    }
+
+
+def _p95(samples: list) -> float:
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(round(0.95 * (len(ordered) - 1))))]
+
+
+def measure(fn, repeat: int) -> dict:
+    fn()  # warm caches / lazy imports
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+
+    # Memory is measured separately: tracing slows the calls down.
+    tracemalloc.start()
+    before, _ = tracemalloc.get_traced_memory()
+    tracemalloc.reset_peak()
+    result = fn()
+    after, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del result
+    return {
+        "median_ms": statistics.median(times) * 1000,
+        "p95_ms": _p95(times) * 1000,
+        "alloc_kib": max(0, after - before) / 1024,
+        "peak_kib": max(0, peak - before) / 1024,
+    }
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> list:
+    """Return (case, metric, baseline, current) for every regression."""
+    regressions = []
+    for name, current in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        for metric in ("median_ms", "peak_kib"):
+            grown = current[metric] - base[metric]
+            if grown > _MIN_DELTA[metric] and grown > base[metric] * threshold:
+                regressions.append((name, metric, base[metric], current[metric]))
+    return regressions
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--baseline", type=Path, default=BASELINE)
+    parser.add_argument("--threshold", type=float, default=DEFAULT_THRESHOLD,
+                        help="allowed fractional slowdown / growth (default 0.25)")
+    parser.add_argument("--only", default="", help="run cases containing this substring")
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.baseline.exists():
+        baseline = json.loads(args.baseline.read_text())["cases"]
+
+    results = {}
+    # No background training during the run; views use the fallback score.
+    with patch("fpldash.ml_predictions.run_in_background"):
+        # Finished gameweeks are ingested off the request path; do it up front.
+        history.get_warehouse(ingest_first=True)
+        print(f"{'case':28} {'median':>10} {'p95':>10} {'alloc':>10} {'peak':>10}  vs base")
+        for name, (fn, repeat) in _cases().items():
+            if args.only not in name:
+                continue
+            r = results[name] = measure(fn, repeat)
+            base = baseline.get(name)
+            delta = f"{r['median_ms'] / base['median_ms'] - 1:+6.0%}" if base else "   new"
+            print(f"{name:28} {r['median_ms']:7.2f} ms {r['p95_ms']:7.2f} ms "
+                  f"{r['alloc_kib']:6.0f} KiB {r['peak_kib']:6.0f} KiB  {delta}")
+
+    if args.save_baseline:
+        merged = {**baseline, **results}
+        args.baseline.write_text(json.dumps({
+            "machine": {"python": platform.python_version(), "platform": platform.platform()},
+            "cases": {k: {m: round(v, 3) for m, v in r.items()} for k, r in sorted(merged.items())},
+        }, indent=2) + "\n")
+        print(f"\nbaseline written to {args.baseline}")
+        return 0
+
+    regressions = compare(results, baseline, args.threshold)
+    for name, metric, base, current in regressions:
+        print(f"REGRESSION {name}: {metric} {base:.2f} -> {current:.2f} "
+              f"(> {args.threshold:.0%} over baseline)")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+from django.apps import AppConfig
+
+
+class FpldashConfig(AppConfig):
+    default_auto_field = "django.db.models.BigAutoField"
+    name = "fpldash"
+
+    def ready(self):
+        from . import cache, history, snapshots
+
+        # Append price / ownership history on every bootstrap refresh, and
+        # ingest the gameweeks that finished since the last one.
+        cache.on_refresh("bootstrap", snapshots.on_bootstrap_refresh)
+        cache.on_refresh("bootstrap", history.on_bootstrap_refresh)
@@ -0,0 +1,179 @@
+"""
+Compact typed form of bootstrap-static.
+
+The cache keeps a ``Bootstrap``, parsed once per fetched payload; the
+raw JSON is dropped as soon as parsing is done.
+
+Only the fields the app reads are kept:
+
+  elements — one NumPy column per field, in payload order: counters as
+             int32, decimals (shipped as strings such as "5.4") as
+             float64, ``chance_of_playing_next_round`` as float64 with
+             NaN for "no news", and names as interned ``str`` in object
+             arrays.  Missing or malformed values become 0 / "".
+  teams    — ``Team`` records (id, name, short_name).
+  events   — ``Event`` records (id, deadline_time and the state flags).
+
+``python -m benchmarks.bench_bootstrap`` compares the resident memory of
+the raw and compact forms.
+"""
+
+import math
+import sys
+
+import numpy as np
+
+# Integer counters.
+INT_FIELDS = (
+    "id",
+    "team",
+    "element_type",
+    "now_cost",
+    "minutes",
+    "total_points",
+    "goals_scored",
+    "assists",
+    "clean_sheets",
+    "bonus",
+    "yellow_cards",
+    "red_cards",
+    "cost_change_event",
+    "cost_change_start",
+    "transfers_in_event",
+    "transfers_out_event",
+)
+
+# Decimals.
+FLOAT_FIELDS = (
+    "form",
+    "points_per_game",
+    "selected_by_percent",
+    "influence",
+    "creativity",
+    "threat",
+    "ict_index",
+    "expected_goals",
+    "expected_assists",
+    "expected_goal_involvements",
+    "expected_goals_conceded",
+    "ep_next",
+    "ep_this",
+    "value_form",
+    "value_season",
+)
+
+# Decimals where null means "unknown" and is kept as NaN.
+NULLABLE_FIELDS = ("chance_of_playing_next_round",)
+
+STR_FIELDS = ("web_name", "first_name", "second_name", "photo", "status")
+
+FIELDS = INT_FIELDS + FLOAT_FIELDS + NULLABLE_FIELDS + STR_FIELDS
+
+
+def _float(value, default: float) -> float:
+    try:
+        number = float(value)
+    except (TypeError, ValueError):
+        return default
+    return default if math.isnan(number) else number
+
+
+def _int(value) -> int:
+    number = _float(value, 0.0)
+    return int(number) if math.isfinite(number) else 0
+
+
+class Team:
+    __slots__ = ("id", "name", "short_name")
+
+    def __init__(self, id: int, name: str = "", short_name: str = ""):
+        self.id = id
+        self.name = name
+        self.short_name = short_name
+
+    def __repr__(self):
+        return f"Team({self.id}, {self.name!r})"
+
+
+class Event:
+    __slots__ = ("id", "deadline_time", "finished", "data_checked", "is_current", "is_next")
+
+    def __init__(self, id: int, deadline_time: str = "", finished: bool = False,
+                 data_checked: bool = True, is_current: bool = False, is_next: bool = False):
+        self.id = id
+        self.deadline_time = deadline_time
+        self.finished = finished
+        self.data_checked = data_checked
+        self.is_current = is_current
+        self.is_next = is_next
+
+    def __repr__(self):
+        return f"Event({self.id})"
+
+
+class Bootstrap:
+    """Parsed bootstrap-static; treat it as read-only, it is shared."""
+
+    __slots__ = ("elements", "teams", "events", "index")
+
+    def __init__(self, elements: dict, teams: tuple, events: tuple):
+        self.elements = elements
+        self.teams = teams
+        self.events = events
+        # element id -> position in the columns
+        self.index = {int(pid): row for row, pid in enumerate(elements["id"])}
+
+    def __len__(self):
+        return len(self.elements["id"])
+
+    def __repr__(self):
+        return f"Bootstrap({len(self)} elements, {len(self.teams)} teams, {len(self.events)} events)"
+
+    @classmethod
+    def parse(cls, data: dict) -> "Bootstrap":
+        """Build from the bootstrap-static JSON (``data`` is not kept)."""
+        elements = [e for e in data.get("elements") or () if "id" in e]
+        n = len(elements)
+        columns = {}
+        for name in INT_FIELDS:
+            columns[name] = np.fromiter(
+                (_int(e.get(name)) for e in elements), dtype=np.int32, count=n
+            )
+        for name in FLOAT_FIELDS:
+            columns[name] = np.fromiter(
+                (_float(e.get(name), 0.0) for e in elements), dtype=np.float64, count=n
+            )
+        for name in NULLABLE_FIELDS:
+            columns[name] = np.fromiter(
+                (_float(e.get(name), np.nan) for e in elements), dtype=np.float64, count=n
+            )
+        for name in STR_FIELDS:
+            column = np.empty(n, dtype=object)
+            column[:] = [sys.intern(str(e.get(name) or "")) for e in elements]
+            columns[name] = column
+        teams = tuple(
+            Team(int(t["id"]), sys.intern(str(t.get("name") or "")),
+                 sys.intern(str(t.get("short_name") or "")))
+            for t in data.get("teams") or () if "id" in t
+        )
+        events = tuple(
+            Event(
+                int(e["id"]),
+                str(e.get("deadline_time") or ""),
+                bool(e.get("finished")),
+                bool(e.get("data_checked", True)),
+                bool(e.get("is_current")),
+                bool(e.get("is_next")),
+            )
+            for e in data.get("events") or () if "id" in e
+        )
+        return cls(columns, teams, events)
+
+    def team_names(self) -> dict:
+        """{team id: name}."""
+        return {t.id: t.name for t in self.teams}
+
+
+def parse(data) -> Bootstrap:
+    """``Bootstrap.parse``, passing an already parsed payload through."""
+    return data if isinstance(data, Bootstrap) else Bootstrap.parse(data)
@@ -1,43 +1,413 @@
 """
-Simple thread-safe, in-process TTL cache for FPL API responses.
+Simple thread-safe TTL cache for FPL API responses.
 
 Bootstrap-static and fixtures data rarely change mid-day, so we cache
 them for 30 minutes to avoid hammering the FPL API on every request.
+
+Storage is pluggable (``settings.FPL_CACHE_BACKEND``):
+
+  memory — per-process dict (default; what tests and ``runserver`` use)
+  file   — pickled entries in ``settings.FPL_CACHE_DIR``, shared by every
+           gunicorn worker on the machine.  Point the directory at a tmpfs
+           such as /dev/shm to keep it in shared memory.  A per-key file
+           lock ensures only one worker hits the FPL API per expiry; the
+           others pick up its result from disk.  NumPy arrays in an
+           entry are memory-mapped from the file rather than copied, so
+           the numeric ``Bootstrap`` columns (which the player table
+           wraps as-is) are held once per machine; strings and derived
+           columns are still per process.
+
+Concurrent misses for the same key are coalesced in-process: one thread
+fetches while the rest wait for its result.  ``cache_stats()`` exposes
+per-key hit / miss / stale / fetch / coalesced counters.
+
+Stale-while-revalidate: once an entry is older than ``_TTL`` it keeps
+being served while a background thread refreshes it, up to the hard
+ceiling ``settings.FPL_CACHE_MAX_STALE`` (seconds; 0 disables).  Past
+that ceiling, or on a cold cache, callers block on the fetch.
+
+Refreshes revalidate with the stored ETag / Last-Modified (see
+client.fetch_json), so an unchanged payload costs a 304 and the parsed
+data already in the cache is reused as-is.  Each entry carries the
+content hash of its payload; ``get_bootstrap_versioned()`` exposes it so
+derived tables can be rebuilt only when the data really changed.
+
+Bootstrap-static is stored parsed (bootstrap.py): ``get_bootstrap()``
+returns a compact ``Bootstrap`` and the raw JSON is not kept.
+
+Per-player element-summary histories (my-team and the player modal) live
+in a separate bounded LRU (``aget_player_histories``) that is emptied
+whenever the current gameweek changes.  Managers' picks have their own
+LRU keyed by (manager, gameweek) (``get_manager_picks``).
+
+``on_refresh(key, fn)`` registers a hook run after every fetched payload
+(not after 304s); the price / ownership snapshots use it.
 """
 
+import asyncio
+import contextlib
+import logging
+import mmap
+import os
+import pickle
+import struct
+import tempfile
 import threading
 import time
-import requests
+from collections import OrderedDict
+from concurrent.futures import Future
+from pathlib import Path
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+
+from . import client, metrics
+from .bootstrap import parse as parse_bootstrap
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - non-POSIX dev machines
+    fcntl = None
+
+logger = logging.getLogger(__name__)
 
 _lock = threading.Lock()
 _store: dict = {}
 _TTL = 1800  # 30 minutes
+_inflight: dict = {}  # key -> _Flight currently fetching it
+_stats: dict = {}  # key -> {"hits", "misses", "stale", "fetches", "not_modified", "coalesced", "errors"}
+_MAX_STALE = 6 * 3600  # default hard-expiry ceiling for stale entries
+_refresh_hooks: dict = {}  # key -> [fn(data, version)] run after each fetch
+_parsers: dict = {"bootstrap": parse_bootstrap}  # key -> fn(raw JSON) stored instead
 
+_SUMMARY_TTL = 1800
+_SUMMARY_MAX = 1000  # comfortably above the ~700-player pool
+_summaries: OrderedDict = OrderedDict()  # player_id -> {"history", "ts"}
+_summary_gw = None  # gameweek the cached summaries belong to
 
-def _fetch(url: str, timeout: int = 20):
-    r = requests.get(url, timeout=timeout)
-    r.raise_for_status()
-    return r.json()
+_PICKS_TTL = 300  # picks of a gameweek still being played
+_PICKS_MAX = 5000
+_picks: OrderedDict = OrderedDict()  # (manager_id, gw) -> {"picks", "ts", "final"}
+_picks_flights: dict = {}  # (manager_id, gw) -> Future of the async fetch in flight
 
 
-def _get_cached(key: str, url: str):
-    now = time.time()
+class _MemoryBackend:
+    """Entries live in the module-level ``_store`` of this process."""
+
+    def get(self, key: str):
+        with _lock:
+            return _store.get(key)
+
+    def set(self, key: str, entry: dict) -> None:
+        with _lock:
+            _store[key] = entry
+
+    def fetch_lock(self, key: str):
+        # Fetch outside the lock so other threads are not blocked during network IO.
+        return contextlib.nullcontext()
+
+
+class _FileBackend:
+    """
+    Entries are written to ``<directory>/<key>.pickle`` and swapped in with
+    an atomic rename, so readers never see a half-written file.
+
+    The file holds the pickled entry with the buffers of its NumPy arrays
+    (the numeric ``Bootstrap`` columns) stored out of band after it.  A
+    reader maps the file and rebuilds those arrays as read-only views of
+    the mapping, so every worker shares one copy of them in the page cache
+    instead of unpickling its own.  Everything else in an entry (strings,
+    small records, raw JSON) is still a per-process copy.
+
+    Each process keeps the last entry it loaded and only reads the file
+    again when it has been replaced by another worker.
+    """
+
+    _MAGIC = b"FPLC0001"
+    _HEADER = struct.Struct("<8sQ")  # magic, offset of the pickled (entry, spans)
+    _ALIGN = 64
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._memo: dict = {}
+        self._memo_lock = threading.Lock()
+
+    def _path(self, key: str) -> Path:
+        return self.directory / f"{key}.pickle"
+
+    def _read(self, path: Path):
+        with open(path, "rb") as fh:
+            mapping = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, offset = self._HEADER.unpack_from(mapping)
+        if magic != self._MAGIC:
+            raise pickle.UnpicklingError(f"{path} is not a cache entry")
+        payload, spans = pickle.loads(mapping[offset:])
+        view = memoryview(mapping)
+        return pickle.loads(payload, buffers=[view[start:start + size] for start, size in spans])
+
+    def get(self, key: str):
+        try:
+            st = os.stat(self._path(key))
+        except FileNotFoundError:
+            return None
+        stamp = (st.st_ino, st.st_mtime_ns, st.st_size)
+        with self._memo_lock:
+            memo = self._memo.get(key)
+            if memo and memo[0] == stamp:
+                return memo[1]
+        try:
+            entry = self._read(self._path(key))
+        except (OSError, ValueError, EOFError, struct.error, pickle.UnpicklingError):
+            return None
+        with self._memo_lock:
+            self._memo[key] = (stamp, entry)
+        return entry
+
+    def set(self, key: str, entry: dict) -> None:
+        buffers = []
+        payload = pickle.dumps(entry, protocol=5, buffer_callback=buffers.append)
+        fd, tmp = tempfile.mkstemp(dir=self.directory, prefix=f".{key}.")
+        try:
+            with os.fdopen(fd, "wb") as fh:
+                fh.write(bytes(self._HEADER.size))
+                spans = []
+                for buffer in buffers:
+                    raw = buffer.raw()
+                    fh.write(bytes(-fh.tell() % self._ALIGN))
+                    spans.append((fh.tell(), raw.nbytes))
+                    fh.write(raw)
+                offset = fh.tell()
+                pickle.dump((payload, spans), fh, protocol=pickle.HIGHEST_PROTOCOL)
+                fh.seek(0)
+                fh.write(self._HEADER.pack(self._MAGIC, offset))
+            os.replace(tmp, self._path(key))
+        except BaseException:
+            with contextlib.suppress(OSError):
+                os.unlink(tmp)
+            raise
+        # Keep the mapped form, so this worker shares the arrays as well.
+        try:
+            st = os.stat(self._path(key))
+            entry = self._read(self._path(key))
+        except (OSError, ValueError, EOFError, struct.error, pickle.UnpicklingError):
+            return
+        with self._memo_lock:
+            self._memo[key] = ((st.st_ino, st.st_mtime_ns, st.st_size), entry)
+
+    def fetch_lock(self, key: str):
+        return file_lock(self.directory / f"{key}.lock")
+
+
+@contextlib.contextmanager
+def file_lock(path):
+    """Exclusive advisory lock on ``path``, held across processes (POSIX)."""
+    if fcntl is None:
+        yield
+        return
+    with open(path, "a") as fh:
+        fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+_backends: dict = {}
+
+
+def _get_backend():
+    name = getattr(settings, "FPL_CACHE_BACKEND", "memory")
+    if name == "memory":
+        return _MemoryBackend()
+    if name != "file":
+        raise ValueError(f"Unknown FPL_CACHE_BACKEND: {name!r}")
+    directory = getattr(settings, "FPL_CACHE_DIR", None) or os.path.join(
+        tempfile.gettempdir(), "fpldash-cache"
+    )
+    with _lock:
+        backend = _backends.get(directory)
+        if backend is None:
+            backend = _backends[directory] = _FileBackend(directory)
+    return backend
+
+
+def _count(key: str, field: str) -> None:
+    with _lock:
+        counters = _stats.setdefault(
+            key,
+            {"hits": 0, "misses": 0, "stale": 0, "fetches": 0,
+             "not_modified": 0, "coalesced": 0, "errors": 0},
+        )
+        counters[field] += 1
+
+
+def cache_stats() -> dict:
+    """Return a snapshot of the per-key cache counters."""
+    with _lock:
+        return {key: dict(counters) for key, counters in _stats.items()}
+
+
+class _Flight:
+    __slots__ = ("done", "data", "error")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.data = None
+        self.error = None
+
+
+def _single_flight(key: str, fn, stats_key: str = None):
+    """
+    Run ``fn()`` at most once at a time per key.
+
+    The first caller becomes the leader and runs ``fn``; callers arriving
+    while it is in flight block until it finishes and share its result
+    (or its exception).  Waiters are counted under ``stats_key`` (default
+    ``key``).
+    """
+    with _lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        _count(stats_key or key, "coalesced")
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return flight.data
+    try:
+        flight.data = fn()
+        return flight.data
+    except BaseException as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+
+
+def get_max_stale() -> float:
+    """Seconds past which an expired entry may no longer be served."""
+    return float(getattr(settings, "FPL_CACHE_MAX_STALE", _MAX_STALE))
+
+
+def run_in_background(key: str, fn) -> None:
+    """
+    Start ``fn()`` on a daemon thread unless a flight for ``key`` is
+    already running.  Errors are logged; the caller keeps its stale data.
+    """
+    with _lock:
+        if key in _inflight:
+            return
+
+    def _run():
+        try:
+            _single_flight(key, fn)
+        except Exception:
+            logger.warning("Background refresh of %s failed", key, exc_info=True)
+
+    threading.Thread(target=_run, name=f"fpldash-refresh-{key}", daemon=True).start()
+
+
+def on_refresh(key: str, fn) -> None:
+    """
+    Call ``fn(data, version)`` whenever this process fetches a new payload
+    for ``key``.  Hooks run on the fetching thread after the entry is
+    stored; their errors are logged and never fail the refresh.
+    """
     with _lock:
-        entry = _store.get(key)
-        if entry and now - entry["ts"] < _TTL:
-            return entry["data"]
-    # Fetch outside the lock so other threads are not blocked during network IO.
-    data = _fetch(url)
+        hooks = _refresh_hooks.setdefault(key, [])
+        if fn not in hooks:
+            hooks.append(fn)
+
+
+def _run_refresh_hooks(key: str, data, version) -> None:
     with _lock:
-        _store[key] = {"data": data, "ts": time.time()}
-    return data
+        hooks = list(_refresh_hooks.get(key, ()))
+    for fn in hooks:
+        try:
+            fn(data, version)
+        except Exception:
+            logger.warning("Refresh hook %r for %s failed", fn, key, exc_info=True)
+
+
+def _fetch(url: str, previous=None, timeout: int = 20) -> client.FetchResult:
+    previous = previous or {}
+    return client.fetch_json(
+        url,
+        timeout=timeout,
+        etag=previous.get("etag"),
+        last_modified=previous.get("last_modified"),
+    )
+
+
+def _is_fresh(entry) -> bool:
+    return bool(entry) and time.time() - entry["ts"] < _TTL
+
+
+def _refresh(backend, key: str, url: str) -> dict:
+    with backend.fetch_lock(key):
+        # Another worker may have refreshed the entry while we waited.
+        entry = backend.get(key)
+        if _is_fresh(entry):
+            return entry
+        result = _fetch(url, entry)
+        _count(key, "fetches")
+        if result.not_modified:
+            _count(key, "not_modified")
+            data, version = entry["data"], entry.get("version")
+        else:
+            data, version = result.data, result.version
+        parse = _parsers.get(key)
+        if parse is not None:
+            # Also applied to a revalidated entry written before parsing.
+            data = parse(data)
+        entry = {
+            "data": data,
+            "ts": time.time(),
+            "etag": result.etag,
+            "last_modified": result.last_modified,
+            "version": version,
+        }
+        backend.set(key, entry)
+    if not result.not_modified:
+        _run_refresh_hooks(key, data, version)
+    return entry
+
+
+def _get_entry(key: str, url: str) -> dict:
+    backend = _get_backend()
+    entry = backend.get(key)
+    if _is_fresh(entry):
+        _count(key, "hits")
+        return entry
+    if entry and time.time() - entry["ts"] < _TTL + get_max_stale():
+        _count(key, "stale")
+        run_in_background(key, lambda: _refresh(backend, key, url))
+        return entry
+    _count(key, "misses")
+    with metrics.phase(f"{key}-fetch"):
+        return _single_flight(key, lambda: _refresh(backend, key, url))
+
+
+def _get_cached(key: str, url: str):
+    return _get_entry(key, url)["data"]
+
+
+def _versioned(entry: dict):
+    # Entries written before versioning (or seeded by tests) fall back to
+    # their timestamp, which still changes on every refresh.
+    return entry["data"], entry.get("version") or f"ts-{entry['ts']}"
 
 
 def get_bootstrap():
-    """Return cached FPL bootstrap-static JSON."""
+    """Return cached FPL bootstrap-static as a ``Bootstrap``."""
     return _get_cached(
         "bootstrap",
-        "https://fantasy.premierleague.com/api/bootstrap-static/",
+        f"{client.FPL_API}bootstrap-static/",
     )
 
 
@@ -45,38 +415,245 @@ def get_fixtures():
     """Return cached FPL fixtures JSON."""
     return _get_cached(
         "fixtures",
-        "https://fantasy.premierleague.com/api/fixtures/",
+        f"{client.FPL_API}fixtures/",
+    )
+
+
+def get_bootstrap_versioned():
+    """Return (``Bootstrap``, content version) from the cache."""
+    return _versioned(_get_entry("bootstrap", f"{client.FPL_API}bootstrap-static/"))
+
+
+def get_fixtures_versioned():
+    """Return (fixtures JSON, content version) from the cache."""
+    return _versioned(_get_entry("fixtures", f"{client.FPL_API}fixtures/"))
+
+
+def get_event_live_versioned(gw: int):
+    """Return (``event/{gw}/live`` JSON, content version) from the cache."""
+    return _versioned(_get_entry(f"event-live-{gw}", f"{client.FPL_API}event/{gw}/live/"))
+
+
+def current_gameweek(bootstrap_data) -> int:
+    """Id of the gameweek flagged ``is_current`` (0 before the season)."""
+    return next((e.id for e in bootstrap_data.events if e.is_current), 0)
+
+
+def picks_gameweek(bootstrap_data) -> int:
+    """
+    Gameweek whose picks describe a manager's squad: the current one, or
+    outside a live gameweek the latest finished / next one.
+    """
+    gw = current_gameweek(bootstrap_data)
+    if gw:
+        return gw
+    return max(
+        [e.id for e in bootstrap_data.events if e.is_next or e.finished],
+        default=1,
     )
 
 
-def compute_team_fdr(bootstrap_data: dict, n_gws: int = 3) -> dict:
+def _summary_lookup(player_ids) -> tuple:
+    """Split ``player_ids`` into ({id: cached history}, [missing ids], gw)."""
+    global _summary_gw
+    gw = current_gameweek(get_bootstrap())
+    found, missing = {}, []
+    now = time.time()
+    with _lock:
+        if gw != _summary_gw:
+            _summaries.clear()
+            _summary_gw = gw
+        for player_id in player_ids:
+            entry = _summaries.get(player_id)
+            if entry and now - entry["ts"] < _SUMMARY_TTL:
+                _summaries.move_to_end(player_id)
+                found[player_id] = entry["history"]
+            else:
+                missing.append(player_id)
+    return found, missing, gw
+
+
+def _summary_store(gw: int, histories: dict) -> None:
+    with _lock:
+        if _summary_gw != gw:
+            return
+        now = time.time()
+        for player_id, history in histories.items():
+            _summaries[player_id] = {"history": history, "ts": now}
+            _summaries.move_to_end(player_id)
+        while len(_summaries) > _SUMMARY_MAX:
+            _summaries.popitem(last=False)
+
+
+def _summary_urls(player_ids) -> dict:
+    return {pid: f"{client.FPL_API}element-summary/{pid}/" for pid in player_ids}
+
+
+def _summary_collect(gw: int, urls: dict, results: dict, found: dict) -> dict:
+    """Store a batch's histories and add them to ``found``; return the errors."""
+    from .fetcher import FetchError
+
+    fetched, errors = {}, {}
+    for pid, url in urls.items():
+        _count("element-summary", "misses")
+        result = results.get(url)
+        if isinstance(result, FetchError):
+            _count("element-summary", "errors")
+            errors[pid] = result
+        else:
+            _count("element-summary", "fetches")
+            fetched[pid] = (result or {}).get("history") or []
+    _summary_store(gw, fetched)
+    found.update(fetched)
+    return errors
+
+
+async def aget_player_histories(player_ids, timeout: float = 12, deadline: float = 20) -> tuple:
+    """
+    ``history`` lists from element-summary/{id}/ for ``player_ids``.
+
+    Results are held in a bounded LRU for 30 minutes and dropped wholesale
+    when the current gameweek moves on.  Cache misses are awaited together
+    on the async fetch engine (bounded concurrency, retries, one deadline
+    for the batch).  Returns ``({player_id: history}, {player_id:
+    FetchError})`` — failed players are reported, not treated as empty.
+    """
+    from .fetcher import get_engine
+
+    ids = list(dict.fromkeys(int(pid) for pid in player_ids))
+    found, missing, gw = await sync_to_async(_summary_lookup, thread_sensitive=False)(ids)
+    for _ in found:
+        _count("element-summary", "hits")
+    if not missing:
+        return found, {}
+
+    urls = _summary_urls(missing)
+    with metrics.phase("element-summary"):
+        results = await get_engine().afetch_json_many(
+            urls.values(), timeout=timeout, deadline=deadline
+        )
+    return found, _summary_collect(gw, urls, results, found)
+
+
+def _gameweek_finished(gw: int) -> bool:
+    return any(e.id == gw and e.finished for e in get_bootstrap().events)
+
+
+def _picks_lookup(key: tuple):
+    now = time.time()
+    with _lock:
+        entry = _picks.get(key)
+        if entry and (entry["final"] or now - entry["ts"] < _PICKS_TTL):
+            _picks.move_to_end(key)
+            picks = entry["picks"]
+        else:
+            picks = None
+    _count("entry-picks", "misses" if picks is None else "hits")
+    return picks
+
+
+def _picks_store(key: tuple, data: dict, final: bool) -> None:
+    _count("entry-picks", "fetches")
+    with _lock:
+        _picks[key] = {"picks": data, "ts": time.time(), "final": final}
+        _picks.move_to_end(key)
+        while len(_picks) > _PICKS_MAX:
+            _picks.popitem(last=False)
+
+
+def _picks_url(key: tuple) -> str:
+    return f"{client.FPL_API}entry/{key[0]}/event/{key[1]}/picks/"
+
+
+def get_manager_picks(manager_id: int, gw: int, timeout: int = 15) -> dict:
+    """
+    Return entry/{manager_id}/event/{gw}/picks/.
+
+    Results are held in a bounded LRU keyed by (manager, gameweek).  Picks
+    for a finished gameweek never change and stay until evicted; those for
+    the gameweek in play (whose ``entry_history`` points are still moving)
+    expire after 5 minutes.  Concurrent requests for the same key share
+    one upstream call; errors propagate and are not cached.
+    """
+    key = (int(manager_id), int(gw))
+    picks = _picks_lookup(key)
+    if picks is not None:
+        return picks
+
+    def _load():
+        try:
+            r = client.get(_picks_url(key), timeout=timeout)
+            r.raise_for_status()
+            data = r.json()
+        except Exception:
+            _count("entry-picks", "errors")
+            raise
+        _picks_store(key, data, _gameweek_finished(key[1]))
+        return data
+
+    with metrics.phase("entry-picks"):
+        return _single_flight(f"entry-picks:{key[0]}:{key[1]}", _load, "entry-picks")
+
+
+async def aget_manager_picks(manager_id: int, gw: int, timeout: int = 15) -> dict:
+    """
+    ``get_manager_picks`` for async views, sharing its cache.  Concurrent
+    misses for the same key await one upstream call (a ``Future`` rather
+    than ``_single_flight``, so waiters do not block the event loop).  A
+    failed fetch raises ``FetchError``.
+    """
+    key = (int(manager_id), int(gw))
+    picks = _picks_lookup(key)
+    if picks is not None:
+        return picks
+    with _lock:
+        flight = _picks_flights.get(key)
+        leader = flight is None
+        if leader:
+            flight = _picks_flights[key] = Future()
+    if not leader:
+        _count("entry-picks", "coalesced")
+        with metrics.phase("entry-picks"):
+            # wrap_future: the leader may be on another thread's event loop.
+            return await asyncio.wrap_future(flight)
+    try:
+        flight.set_result(await _afetch_picks(key, timeout))
+    except BaseException as exc:
+        flight.set_exception(exc)
+        raise
+    finally:
+        with _lock:
+            _picks_flights.pop(key, None)
+    return flight.result()
+
+
+async def _afetch_picks(key: tuple, timeout: int) -> dict:
+    from .fetcher import FetchError, get_engine
+
+    url = _picks_url(key)
+    with metrics.phase("entry-picks"):
+        result = (await get_engine().afetch_json_many([url], timeout=timeout, deadline=timeout))[url]
+    if isinstance(result, FetchError):
+        _count("entry-picks", "errors")
+        raise result
+    final = await sync_to_async(_gameweek_finished, thread_sensitive=False)(key[1])
+    _picks_store(key, result, final)
+    return result
+
+
+def compute_team_fdr(bootstrap_data, n_gws: int = 3) -> dict:
     """
     Return {team_id: avg_fdr} for the next n_gws gameweeks.
 
-    Reads live fixture data from the cache.  Teams with no upcoming
-    fixtures in the window get a neutral score of 3.0.
+    Answered from the team × gameweek index built once per fixtures
+    payload (fdr.py).  Teams with no upcoming fixtures in the window are
+    left out; callers treat them as a neutral 3.0.
     """
-    events = bootstrap_data.get("events", [])
-    current_gw = next((e["id"] for e in events if e.get("is_current")), 0)
-    next_gw = current_gw + 1
-    max_gw = current_gw + n_gws
+    from .fdr import get_fixture_matrix
 
     try:
-        fixtures = get_fixtures()
+        matrix = get_fixture_matrix()
     except Exception:
         return {}
-
-    team_fdrs: dict[int, list] = {}
-    for f in fixtures:
-        gw = f.get("event")
-        if gw is None or gw < next_gw or gw > max_gw:
-            continue
-        h, a = f["team_h"], f["team_a"]
-        team_fdrs.setdefault(h, []).append(f.get("team_h_difficulty", 3))
-        team_fdrs.setdefault(a, []).append(f.get("team_a_difficulty", 3))
-
-    return {
-        tid: round(sum(fdrs) / len(fdrs), 1)
-        for tid, fdrs in team_fdrs.items()
-        if fdrs
-    }
+    current_gw = current_gameweek(bootstrap_data)
+    return matrix.average(current_gw + 1, current_gw + n_gws)
@@ -0,0 +1,111 @@
+"""
+Shared HTTP client for the FPL API.
+
+Every upstream call goes through one ``requests.Session`` so TCP/TLS
+connections to fantasy.premierleague.com are pooled and kept alive
+instead of being re-established per request.  The connection pool is
+sized to the widest thread fan-out in the app (the forecast history
+fetch), so concurrent workers never have to open throw-away sockets.
+
+``fetch_json`` adds HTTP revalidation: pass the ETag / Last-Modified of
+the copy you already hold and an unchanged resource comes back as a
+cheap 304 with no body to download or parse.  Fresh bodies are tagged
+with a content hash (``FetchResult.version``) so derived data can be
+rebuilt only when the payload actually changed.
+
+With ``settings.FPL_OFFLINE`` set, FPL API URLs are served by the
+offline stand-in (offline.py) mounted on the same session.
+"""
+
+import hashlib
+import threading
+import time
+from typing import Any, NamedTuple, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+from . import metrics
+
+FPL_API = "https://fantasy.premierleague.com/api/"
+
+# Also the per-host concurrency cap of the async fetch engine (fetcher.py).
+POOL_SIZE = 20
+
+_session: Optional[requests.Session] = None
+_session_lock = threading.Lock()
+
+
+def get_session() -> requests.Session:
+    """Return the process-wide pooled session, creating it on first use."""
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                session = requests.Session()
+                adapter = HTTPAdapter(pool_connections=4, pool_maxsize=POOL_SIZE)
+                session.mount("https://", adapter)
+                session.mount("http://", adapter)
+                session.headers.update({"User-Agent": "fpldash/1.0"})
+                from . import offline
+                if offline.is_enabled():
+                    session.mount(FPL_API, offline.OfflineAdapter(offline.get_stand_in()))
+                _session = session
+    return _session
+
+
+def get(url: str, timeout: float = 20, **kwargs) -> requests.Response:
+    """GET ``url`` over the pooled session (latency recorded per endpoint)."""
+    t0 = time.perf_counter()
+    status = "error"
+    try:
+        r = get_session().get(url, timeout=timeout, **kwargs)
+        status = r.status_code
+        return r
+    finally:
+        metrics.observe_upstream(url, status, time.perf_counter() - t0)
+
+
+class FetchResult(NamedTuple):
+    data: Any
+    etag: Optional[str]
+    last_modified: Optional[str]
+    not_modified: bool
+    version: Optional[str] = None
+
+
+def content_version(body: bytes) -> str:
+    """Short, stable hash of a response body."""
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+def fetch_json(
+    url: str,
+    timeout: float = 20,
+    etag: Optional[str] = None,
+    last_modified: Optional[str] = None,
+) -> FetchResult:
+    """
+    GET ``url`` and decode its JSON body, revalidating when possible.
+
+    If ``etag`` / ``last_modified`` are given they are sent as
+    If-None-Match / If-Modified-Since; a 304 reply returns
+    ``not_modified=True`` and ``data=None`` so the caller keeps its copy
+    (and its version).
+    """
+    headers = {}
+    if etag:
+        headers["If-None-Match"] = etag
+    if last_modified:
+        headers["If-Modified-Since"] = last_modified
+    r = get(url, timeout=timeout, headers=headers)
+    if r.status_code == 304 and headers:
+        return FetchResult(None, etag, last_modified, True)
+    r.raise_for_status()
+    return FetchResult(
+        r.json(),
+        r.headers.get("ETag") or None,
+        r.headers.get("Last-Modified") or None,
+        False,
+        content_version(r.content),
+    )
@@ -0,0 +1,158 @@
+"""
+Projection, filtering, sorting and paging for ``/api/data``.
+
+``query()`` answers from an index built once per data version (the
+``get_fpl_data`` table as one object array per column, plus position /
+team / price arrays for the filters) and kept in a small LRU.  The sort
+order of a column is computed the first time it is asked for and then
+reused, so a query only masks, slices a permutation and gathers the
+requested columns.
+
+Rows keep ``get_fpl_data`` order (total points, best first) unless
+``sort`` is given.  ``fmt="columns"`` returns one array per column
+instead of repeating every key in every row.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+
+from .cache import get_bootstrap
+from .fpl_data import get_fpl_data
+
+FORMATS = ("rows", "columns")
+POSITIONS = ("GK", "DEF", "MID", "FWD")
+
+_lock = threading.Lock()
+_indexes: OrderedDict = OrderedDict()  # version -> _Index
+_MAX_INDEXES = 4
+
+
+class QueryError(ValueError):
+    """A query names an unknown column, position, team or format."""
+
+
+class _Index:
+    """One ``get_fpl_data`` table as column arrays, with lazily built sort orders."""
+
+    __slots__ = ("frame", "columns", "values", "position", "team", "price", "team_names", "orders")
+
+    def __init__(self):
+        df = get_fpl_data()
+        self.frame = df.reset_index(drop=True)
+        self.columns = tuple(df.columns)
+        self.values = {}
+        for name, values in df.to_dict(orient="list").items():
+            column = np.empty(len(values), dtype=object)
+            column[:] = values
+            self.values[name] = column
+        self.position = self.values["Position"]
+        self.team = self.values["Team"]
+        self.price = df["Price (GBP m)"].to_numpy(dtype=float)
+        # lower-cased team id, name and short name -> team name
+        self.team_names = {}
+        for t in get_bootstrap().teams:
+            for key in (str(t.id), t.name, t.short_name):
+                if key:
+                    self.team_names[key.lower()] = t.name
+        self.orders = {}
+
+    def order(self, column: str, descending: bool) -> np.ndarray:
+        """Row positions sorted on ``column``: stable, missing values last."""
+        key = (column, descending)
+        order = self.orders.get(key)
+        if order is None:
+            order = self.frame[column].sort_values(
+                ascending=not descending, kind="stable", na_position="last"
+            ).index.to_numpy()
+            # Benign race: two threads may sort the same column once each.
+            self.orders[key] = order
+        return order
+
+
+def _get_index(version: str) -> _Index:
+    with _lock:
+        index = _indexes.get(version)
+        if index is not None:
+            _indexes.move_to_end(version)
+            return index
+    index = _Index()
+    with _lock:
+        _indexes[version] = index
+        while len(_indexes) > _MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
+def query(
+    version: str,
+    fields: list = None,
+    positions: list = None,
+    teams: list = None,
+    min_price: float = None,
+    max_price: float = None,
+    sort: str = None,
+    offset: int = 0,
+    limit: int = None,
+    fmt: str = "rows",
+):
+    """
+    Players of the ``/api/data`` table matching the filters.
+
+    ``fields`` projects the columns (default: all, in table order);
+    ``positions`` (GK / DEF / MID / FWD) and ``teams`` (ids, names or
+    short names) keep rows matching any of the values given; prices are
+    in £m.  ``sort`` is a column name, prefixed with ``-`` for
+    descending.  ``offset`` / ``limit`` page through the result.
+
+    ``fmt="rows"`` returns a list of row dicts.  ``fmt="columns"``
+    returns ``{"total", "offset", "fields", "columns"}``, where
+    ``columns`` maps each field to its values and ``total`` counts the
+    matching rows before paging.  ``version`` identifies the data the
+    index is built from.  Raises ``QueryError`` for unknown names.
+    """
+    if fmt not in FORMATS:
+        raise QueryError(f"format must be one of {', '.join(FORMATS)}")
+    index = _get_index(version)
+    fields = list(fields) if fields else list(index.columns)
+    unknown = [f for f in fields if f not in index.values]
+    if unknown:
+        raise QueryError(f"unknown fields: {', '.join(unknown)}")
+
+    mask = np.ones(len(index.price), dtype=bool)
+    if positions:
+        wanted = {p.upper() for p in positions}
+        if not wanted <= set(POSITIONS):
+            raise QueryError(f"position must be one of {', '.join(POSITIONS)}")
+        mask &= np.isin(index.position, list(wanted))
+    if teams:
+        names = []
+        for team in teams:
+            name = index.team_names.get(str(team).lower())
+            if name is None:
+                raise QueryError(f"unknown team: {team}")
+            names.append(name)
+        mask &= np.isin(index.team, names)
+    if min_price is not None:
+        mask &= index.price >= min_price - 1e-9
+    if max_price is not None:
+        mask &= index.price <= max_price + 1e-9
+
+    if sort:
+        column = sort[1:] if sort.startswith("-") else sort
+        if column not in index.values:
+            raise QueryError(f"unknown sort field: {column}")
+        order = index.order(column, sort.startswith("-"))
+        rows = order[mask[order]]
+    else:
+        rows = np.flatnonzero(mask)
+    total = len(rows)
+    offset = max(0, int(offset))
+    end = total if limit is None else offset + max(0, int(limit))
+    rows = rows[offset:end]
+
+    columns = {f: index.values[f][rows].tolist() for f in fields}
+    if fmt == "columns":
+        return {"total": total, "offset": offset, "fields": fields, "columns": columns}
+    return [dict(zip(fields, values)) for values in zip(*columns.values())]
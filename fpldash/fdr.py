@@ -0,0 +1,119 @@
+"""
+Team × gameweek fixture-difficulty index.
+
+``FixtureMatrix`` scans the fixtures once per payload (keyed by the
+content version the cache stores with it) and keeps, per team and
+gameweek, the fixture count and the summed difficulty — 0 fixtures is a
+blank gameweek, 2 a double.
+Cumulative sums along the gameweek axis turn any window average into two
+column lookups, so every window / horizon costs O(teams).
+
+The matrix is shared between requests and threads; treat it as
+read-only.
+"""
+
+import threading
+
+import numpy as np
+
+from .cache import get_fixtures_versioned
+
+_lock = threading.Lock()
+_matrix: dict = {"version": None, "matrix": None}
+
+
+class FixtureMatrix:
+    """Per-team, per-gameweek fixtures and difficulty prefix sums."""
+
+    def __init__(self, fixtures: list):
+        placed = [f for f in fixtures if f.get("event") is not None]
+        team_ids = sorted({f["team_h"] for f in placed} | {f["team_a"] for f in placed})
+        self.team_ids = np.array(team_ids, dtype=int)
+        self.row = {tid: i for i, tid in enumerate(team_ids)}
+        self.n_gws = max((f["event"] for f in placed), default=0)
+
+        # Column g holds gameweek g; column 0 stays empty so that
+        # cumulative[:, g] covers gameweeks 1..g.
+        shape = (len(team_ids), self.n_gws + 1)
+        self.count = np.zeros(shape, dtype=np.int16)
+        self.difficulty = np.zeros(shape, dtype=np.int32)
+        # fixtures[row][gw] -> [(opponent id, home?, difficulty), ...]
+        self.fixtures = [[[] for _ in range(self.n_gws + 1)] for _ in team_ids]
+        for f in placed:
+            gw, h, a = f["event"], self.row[f["team_h"]], self.row[f["team_a"]]
+            h_fdr = f.get("team_h_difficulty", 3)
+            a_fdr = f.get("team_a_difficulty", 3)
+            self.count[h, gw] += 1
+            self.count[a, gw] += 1
+            self.difficulty[h, gw] += h_fdr
+            self.difficulty[a, gw] += a_fdr
+            self.fixtures[h][gw].append((f["team_a"], True, h_fdr))
+            self.fixtures[a][gw].append((f["team_h"], False, a_fdr))
+        self._count_cum = np.cumsum(self.count, axis=1, dtype=np.int32)
+        self._difficulty_cum = np.cumsum(self.difficulty, axis=1, dtype=np.int64)
+
+    def _window(self, start: int, end: int) -> tuple:
+        """(fixture counts, summed difficulty) per team for gameweeks start..end."""
+        end = min(end, self.n_gws)
+        if start > end:
+            empty = np.zeros(len(self.team_ids), dtype=np.int64)
+            return empty, empty
+        lo = max(start, 1) - 1
+        counts = self._count_cum[:, end] - self._count_cum[:, lo]
+        sums = self._difficulty_cum[:, end] - self._difficulty_cum[:, lo]
+        return counts, sums
+
+    def average(self, start: int, end: int) -> dict:
+        """
+        {team_id: mean difficulty over fixtures in gameweeks start..end},
+        rounded to one decimal.  Teams without a fixture in the window are
+        left out (callers treat them as neutral).
+        """
+        counts, sums = self._window(start, end)
+        has = counts > 0
+        means = sums[has] / counts[has]
+        return {
+            int(tid): round(float(m), 1)
+            for tid, m in zip(self.team_ids[has], means)
+        }
+
+    def fixture_counts(self, start: int, end: int) -> dict:
+        """{team_id: number of fixtures in gameweeks start..end}."""
+        counts, _ = self._window(start, end)
+        return {int(tid): int(c) for tid, c in zip(self.team_ids, counts)}
+
+    def fixture_weights(self, start: int, end: int) -> dict:
+        """
+        {team_id: Σ (6 − difficulty) / 3 over fixtures in gameweeks
+        start..end}.  A neutral (FDR 3) fixture weighs 1, so a blank adds
+        nothing and a double roughly twice as much as a single.
+        """
+        counts, sums = self._window(start, end)
+        weights = (6 * counts - sums) / 3
+        return {int(tid): float(w) for tid, w in zip(self.team_ids, weights)}
+
+    def team_fixtures(self, team_id: int, start: int, end: int) -> list:
+        """Per-gameweek fixture lists for one team (empty list = blank)."""
+        row = self.row.get(team_id)
+        if row is None:
+            return [[] for _ in range(start, end + 1)]
+        cells = self.fixtures[row]
+        return [cells[gw] if 1 <= gw <= self.n_gws else [] for gw in range(start, end + 1)]
+
+
+def get_fixture_matrix() -> FixtureMatrix:
+    """Return the shared matrix for the current fixtures payload."""
+    return get_fixture_matrix_versioned()[0]
+
+
+def get_fixture_matrix_versioned():
+    """Return (fixture matrix, fixtures content version it was built from)."""
+    fixtures, version = get_fixtures_versioned()
+    with _lock:
+        if _matrix["version"] == version:
+            return _matrix["matrix"], version
+    matrix = FixtureMatrix(fixtures)
+    with _lock:
+        _matrix["version"] = version
+        _matrix["matrix"] = matrix
+    return matrix, version
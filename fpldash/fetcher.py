@@ -0,0 +1,233 @@
+"""
+Async fan-out engine for batches of upstream JSON GETs.
+
+Used for the batched element-summary calls of my-team and the player
+modal, managers' picks, ingesting finished gameweeks (history.py) and
+the price-change tweet sources (pricefeed.py).  One asyncio event loop
+per process (on a daemon thread) runs every batch over a single pooled
+``httpx.AsyncClient``:
+
+* bounded concurrency — a global cap plus a per-host cap;
+* retries with jittered exponential backoff on 429 / 5xx and transport
+  errors, honouring ``Retry-After``;
+* a deadline for the whole batch, after which unfinished URLs are
+  reported as failed instead of holding the request.
+
+Sync code calls ``fetch_json_many``; the calling thread just waits on the
+batch.  Async views (see views.py) await ``afetch_json_many`` / ``aget``
+instead, which run on the same loop and client, so an ASGI worker serves
+other requests while upstream calls are in flight.  Failures come back
+as ``FetchError`` values, so callers decide how to degrade, and are
+logged.  With ``settings.FPL_OFFLINE`` the engine talks to the offline
+stand-in (offline.py) instead of the network.
+"""
+
+import asyncio
+import logging
+import random
+import threading
+import time
+from typing import Optional
+from urllib.parse import urlsplit
+
+import httpx
+
+from . import metrics
+from .client import POOL_SIZE
+
+logger = logging.getLogger(__name__)
+
+RETRY_STATUSES = frozenset({429, 500, 502, 503, 504})
+
+
+class FetchError(Exception):
+    """A URL in a batch could not be fetched (after retries)."""
+
+    def __init__(self, url: str, reason: str, status: int = None):
+        super().__init__(f"{url}: {reason}")
+        self.url = url
+        self.reason = reason
+        self.status = status
+
+
+def _retry_after(response) -> Optional[float]:
+    try:
+        return max(0.0, float(response.headers.get("Retry-After", "")))
+    except ValueError:
+        return None
+
+
+class FetchEngine:
+    def __init__(
+        self,
+        max_concurrency: int = 64,
+        per_host: int = POOL_SIZE,
+        attempts: int = 3,
+        backoff: float = 0.25,
+        max_backoff: float = 4.0,
+        transport=None,
+    ):
+        self.max_concurrency = max_concurrency
+        self.per_host = per_host
+        self.attempts = attempts
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self._transport = transport
+        self._loop = None
+        self._client = None
+        self._global = None
+        self._host_limits: dict = {}
+        self._start_lock = threading.Lock()
+
+    # ── event loop ────────────────────────────────────────────────────
+
+    def _ensure_loop(self):
+        with self._start_lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="fpldash-fetch", daemon=True
+                ).start()
+                self._loop = loop
+        return self._loop
+
+    def _client_for_loop(self) -> httpx.AsyncClient:
+        # Only ever called on the engine loop, so no locking needed.
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                transport=self._transport,
+                limits=httpx.Limits(
+                    max_connections=self.max_concurrency,
+                    max_keepalive_connections=self.per_host,
+                ),
+                headers={"User-Agent": "fpldash/1.0"},
+                follow_redirects=True,
+            )
+            self._global = asyncio.Semaphore(self.max_concurrency)
+        return self._client
+
+    # ── fetching ──────────────────────────────────────────────────────
+
+    async def _request(self, url: str, timeout: float, **kwargs) -> httpx.Response:
+        """One GET within the global and per-host limits, timed per endpoint."""
+        client = self._client_for_loop()
+        host = urlsplit(url).netloc
+        host_limit = self._host_limits.setdefault(host, asyncio.Semaphore(self.per_host))
+        async with self._global, host_limit:
+            t0 = time.perf_counter()
+            try:
+                r = await client.get(url, timeout=timeout, **kwargs)
+            except httpx.HTTPError:
+                metrics.observe_upstream(url, "error", time.perf_counter() - t0)
+                raise
+            metrics.observe_upstream(url, r.status_code, time.perf_counter() - t0)
+        return r
+
+    async def _get_json(self, url: str, timeout: float, deadline: float):
+        loop = asyncio.get_running_loop()
+        attempt = 0
+        while True:
+            remaining = deadline - loop.time()
+            if remaining <= 0:
+                raise FetchError(url, "deadline exceeded")
+            delay = None
+            try:
+                r = await self._request(url, min(timeout, remaining))
+                if r.status_code == 200:
+                    try:
+                        return r.json()
+                    except ValueError:
+                        raise FetchError(url, "invalid JSON", 200) from None
+                error = FetchError(url, f"HTTP {r.status_code}", r.status_code)
+                if r.status_code not in RETRY_STATUSES:
+                    raise error
+                delay = _retry_after(r)
+            except httpx.HTTPError as exc:
+                error = FetchError(url, f"{type(exc).__name__}: {exc}")
+            attempt += 1
+            if attempt >= self.attempts:
+                raise error
+            if delay is None:
+                delay = min(self.max_backoff, self.backoff * 2 ** (attempt - 1))
+                delay *= random.uniform(0.5, 1.5)
+            if loop.time() + delay >= deadline:
+                raise error
+            await asyncio.sleep(delay)
+
+    async def _gather(self, urls, timeout: float, deadline_s: float) -> dict:
+        deadline = asyncio.get_running_loop().time() + deadline_s
+        tasks = {
+            asyncio.ensure_future(self._get_json(url, timeout, deadline)): url
+            for url in dict.fromkeys(urls)
+        }
+        if not tasks:
+            return {}
+        _, pending = await asyncio.wait(tasks, timeout=deadline_s)
+        for task in pending:
+            task.cancel()
+        results = {}
+        for task, url in tasks.items():
+            if task in pending:
+                results[url] = FetchError(url, "deadline exceeded")
+            elif task.exception() is not None:
+                exc = task.exception()
+                results[url] = exc if isinstance(exc, FetchError) else FetchError(url, repr(exc))
+            else:
+                results[url] = task.result()
+        failures = [r for r in results.values() if isinstance(r, FetchError)]
+        if failures:
+            logger.warning(
+                "%d of %d upstream fetches failed (first: %s)",
+                len(failures), len(results), failures[0],
+            )
+        return results
+
+    def fetch_json_many(self, urls, timeout: float = 12, deadline: float = 20) -> dict:
+        """
+        Fetch every URL concurrently; return {url: decoded JSON or FetchError}.
+
+        Blocks the calling thread for at most about ``deadline`` seconds.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._gather(list(urls), timeout, deadline), self._ensure_loop()
+        )
+        return future.result(deadline + 5)
+
+    async def afetch_json_many(self, urls, timeout: float = 12, deadline: float = 20) -> dict:
+        """``fetch_json_many`` for coroutines running on any event loop."""
+        future = asyncio.run_coroutine_threadsafe(
+            self._gather(list(urls), timeout, deadline), self._ensure_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+    async def aget(self, url: str, headers=None, params=None, timeout: float = 15) -> httpx.Response:
+        """
+        A single GET on the shared client, from any event loop.
+
+        No retries and no status handling: for third-party sources whose
+        callers inspect the response themselves.  Transport errors raise
+        ``httpx.HTTPError``.
+        """
+        future = asyncio.run_coroutine_threadsafe(
+            self._request(url, timeout, headers=headers, params=params), self._ensure_loop()
+        )
+        return await asyncio.wrap_future(future)
+
+
+_engine = None
+_engine_lock = threading.Lock()
+
+
+def get_engine() -> FetchEngine:
+    """Return the process-wide fetch engine."""
+    global _engine
+    if _engine is None:
+        with _engine_lock:
+            if _engine is None:
+                from . import offline
+                transport = (
+                    offline.OfflineTransport(offline.get_stand_in())
+                    if offline.is_enabled() else None
+                )
+                _engine = FetchEngine(transport=transport)
+    return _engine
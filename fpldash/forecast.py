@@ -3,35 +3,32 @@ Next-GW forecast builder.
 
 Performance notes
 -----------------
-* Uses the shared bootstrap-static cache (30-min TTL) for base data.
-* Per-player element-summary calls are executed in parallel with
-  ThreadPoolExecutor, reducing wall-clock time from ~N×0.5 s to
-  roughly max(individual latency) ≈ 1-2 s for 50 players.
-* Predicted Score is the average of three ML model predictions
-  (Ridge, Random Forest, Gradient Boosting) trained on per-90 stats.
+* Uses the shared bootstrap-static cache (30-min TTL) for base data and
+  the typed player table built once per bootstrap payload (players.py).
+* Weekly points (W1..Wn) are a row slice of the player × gameweek
+  points block (points.py): finished gameweeks come from the local
+  per-gameweek warehouse (history.py), the current one from its cached
+  ``event/{gw}/live`` payload, so no per-player history is fetched.
+  Players missing from a gameweek keep an empty W column.
+* Predicted Score is the average of four ML model predictions
+  (Ridge, Random Forest, Gradient Boosting, XGBoost) trained on per-90
+  stats.
   See ml_predictions.py for details.
 """
 
-import requests
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import logging
 from typing import List, Dict
 
+import numpy as np
 import pandas as pd
 
+from . import metrics
 from .cache import get_bootstrap, compute_team_fdr
 from .ml_predictions import get_ml_predicted_scores
+from .players import get_player_table
+from .points import MISSING, get_points
 
-
-def _fetch_player_history(player_id: int) -> tuple[int, list]:
-    """Return (player_id, history_list) or (player_id, []) on failure."""
-    try:
-        url = f"https://fantasy.premierleague.com/api/element-summary/{player_id}/"
-        r = requests.get(url, timeout=12)
-        if r.status_code == 200:
-            return player_id, r.json().get("history") or []
-    except Exception:
-        pass
-    return player_id, []
+logger = logging.getLogger(__name__)
 
 
 def get_forecast_data(limit: int = 50) -> List[Dict]:
@@ -44,79 +41,86 @@ def get_forecast_data(limit: int = 50) -> List[Dict]:
       Form Score      = 0.7 × form + 0.3 × last-GW points
       PPG Score       = 0.6 × points_per_game + 0.4 × last-GW points
       Predicted Score = average of Ridge / Random Forest / Gradient
-                        Boosting predictions (see ml_predictions.py)
+                        Boosting predictions (see ml_predictions.py);
+                        (form + PPG) / 2 until the first model is trained
     """
-    data = get_bootstrap()
+    selection = select_players(limit)
+    with metrics.phase("forecast-points"):
+        points, errors = get_points(selection["top"]["id"].tolist(), selection["n_gws"])
+    return build_rows(selection, points, errors)
 
-    elements = data["elements"]
-    teams = {t["id"]: t["name"] for t in data["teams"]}
-    positions = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+
+def select_players(limit: int = 50) -> dict:
+    """
+    The players a forecast of ``limit`` rows covers, and its gameweek
+    columns.  Weekly points for ``selection["top"]["id"]`` over
+    ``selection["n_gws"]`` gameweeks then go to ``build_rows``; async
+    views fetch them in between without holding a thread.
+    """
+    data = get_bootstrap()
 
     # Determine the latest GW to display in columns
-    events = data.get("events", [])
+    events = data.events
     latest_gw = None
     for ev in events:
-        if ev.get("is_current"):
-            latest_gw = ev.get("id")
+        if ev.is_current:
+            latest_gw = ev.id
             break
     if latest_gw is None:
-        ids = [ev.get("id") for ev in events if ev.get("finished") or ev.get("is_next")]
+        ids = [ev.id for ev in events if ev.finished or ev.is_next]
         latest_gw = max(ids) if ids else 1
 
     # Last fully finished GW (for Last GW Pts)
-    finished_ids = [ev.get("id") for ev in events if ev.get("finished")]
+    finished_ids = [ev.id for ev in events if ev.finished]
     last_finished_gw = max(finished_ids) if finished_ids else None
 
-    df = pd.DataFrame(elements)
-    df["form"] = pd.to_numeric(df["form"], errors="coerce").fillna(0.0)
-    df["points_per_game"] = pd.to_numeric(df["points_per_game"], errors="coerce").fillna(0.0)
-
-    df["Team"] = df["team"].map(teams)
-    df["Position"] = df["element_type"].map(positions)
-
+    df = get_player_table()
     team_fdr = compute_team_fdr(data, n_gws=3)
-    df["FDR Next 3"] = df["team"].map(team_fdr).fillna(3.0).round(1)
 
     # ── ML Predicted Score ────────────────────────────────────────────
-    # Train three models on the full player pool and take their average.
+    # Ensemble average trained on the full player pool in the background.
     # Players are pre-selected by ML rank so the forecast already favours
     # players the models rate highly — not just raw form/PPG.
     ml_scores = get_ml_predicted_scores()
-    df["Predicted Score"] = df["id"].astype(int).map(ml_scores).fillna(0.0)
+    fallback = ((df["form"] + df["points_per_game"]) / 2).round(2)
+    predicted = df["id"].map(ml_scores).fillna(fallback)
 
-    top = df.sort_values("Predicted Score", ascending=False).head(limit).copy()
+    top = df.loc[predicted.sort_values(ascending=False).index[:limit]].copy()
     top["Player"] = top["web_name"]
-
-    week_cols = [f"W{i}" for i in range(1, int(latest_gw) + 1)]
-    for col in week_cols:
-        # None → object dtype so pandas 3.x accepts int assignment later
-        top[col] = None
-    top["Last GW Pts"] = 0.0
-
-    # --- Parallel fetch of per-player weekly history ---
-    pid_to_idx = {int(row["id"]): idx for idx, row in top.iterrows()}
-
-    with ThreadPoolExecutor(max_workers=20) as pool:
-        futures = {
-            pool.submit(_fetch_player_history, pid): pid
-            for pid in pid_to_idx
-        }
-        for future in as_completed(futures):
-            pid, history = future.result()
-            idx = pid_to_idx.get(pid)
-            if idx is None:
-                continue
-            for h in history:
-                rnd = h.get("round")
-                pts = h.get("total_points")
-                if isinstance(rnd, int) and 1 <= rnd <= latest_gw:
-                    top.at[idx, f"W{rnd}"] = pts
-                if (
-                    last_finished_gw is not None
-                    and isinstance(rnd, int)
-                    and rnd == last_finished_gw
-                ):
-                    top.at[idx, "Last GW Pts"] = float(pts or 0.0)
+    top["FDR Next 3"] = top["team"].map(team_fdr).fillna(3.0).round(1)
+
+    return {
+        "top": top,
+        "n_gws": max(int(latest_gw), last_finished_gw or 0),
+        "week_cols": [f"W{i}" for i in range(1, int(latest_gw) + 1)],
+        "last_finished_gw": last_finished_gw,
+        "ml_scores": ml_scores,
+        "fallback": fallback,
+    }
+
+
+def build_rows(selection: dict, points: np.ndarray, errors: dict) -> List[Dict]:
+    """Forecast rows from ``select_players`` output and its weekly points."""
+    top = selection["top"]
+    week_cols = selection["week_cols"]
+    last_finished_gw = selection["last_finished_gw"]
+    if errors:
+        logger.warning(
+            "forecast: no history for %d of %d players", len(errors), len(top)
+        )
+
+    # --- Weekly points: a row slice of the shared points matrix ---
+    present = points != MISSING
+    weeks = points[:, : len(week_cols)].astype(object)
+    weeks[~present[:, : len(week_cols)]] = None
+    top = pd.concat(
+        [top, pd.DataFrame(weeks, index=top.index, columns=week_cols)], axis=1
+    )
+    if last_finished_gw is not None:
+        col = last_finished_gw - 1
+        top["Last GW Pts"] = np.where(present[:, col], points[:, col], 0).astype(float)
+    else:
+        top["Last GW Pts"] = 0.0
 
     # Context scores (informational — Predicted Score comes from ML only)
     top["Form Score"] = (0.7 * top["form"] + 0.3 * top["Last GW Pts"]).round(2)
@@ -124,7 +128,9 @@ def get_forecast_data(limit: int = 50) -> List[Dict]:
     top["Last GW Pts"] = top["Last GW Pts"].round(2)
 
     # Final ML predicted score (already set; re-map in case cache refreshed)
-    top["Predicted Score"] = top["id"].astype(int).map(ml_scores).fillna(0.0).round(2)
+    top["Predicted Score"] = (
+        top["id"].map(selection["ml_scores"]).fillna(selection["fallback"]).round(2)
+    )
 
     top = top.sort_values("Predicted Score", ascending=False).copy()
 
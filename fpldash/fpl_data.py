@@ -1,6 +1,7 @@
 import pandas as pd
 
 from .cache import get_bootstrap, compute_team_fdr
+from .players import get_player_table
 
 
 def get_fpl_data() -> pd.DataFrame:
@@ -8,7 +9,8 @@ def get_fpl_data() -> pd.DataFrame:
     Fetch and process player statistics from the official FPL API.
 
     Uses the shared bootstrap-static cache (30-min TTL) so repeated
-    requests within a half-hour window don't hit the network.
+    requests within a half-hour window don't hit the network, and the
+    typed player table built once per bootstrap payload (players.py).
 
     Returns a DataFrame with one row per player, ready for JSON
     serialisation.  Key columns:
@@ -17,75 +19,52 @@ def get_fpl_data() -> pd.DataFrame:
       FDR Next 3   — average fixture difficulty for the next 3 GWs
     """
     data = get_bootstrap()
-
-    elements = data["elements"]
-    teams = {team["id"]: team["name"] for team in data["teams"]}
-    positions = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
-
-    df = pd.DataFrame(elements)
+    df = get_player_table()
 
     # --- Fixture difficulty per team ---
     team_fdr = compute_team_fdr(data, n_gws=3)
-    df["FDR Next 3"] = df["team"].map(team_fdr).fillna(3.0).round(1)
+    fdr_next3 = df["team"].map(team_fdr).fillna(3.0).round(1)
 
     # --- Derived columns ---
-    df["Team"] = df["team"].map(teams)
-    df["Position"] = df["element_type"].map(positions)
-    df["Price (GBP m)"] = df["now_cost"] / 10.0
-
-    df["Appearances"] = (df["minutes"] / 90).round(0).astype(int)
+    appearances = (df["minutes"] / 90).round(0).astype(int)
 
-    df["Median Points"] = df["points_per_game"].astype(float)
-    df["Weighted Avg Points"] = (
-        df["form"].astype(float) * 0.7
-        + df["points_per_game"].astype(float) * 0.3
-    )
+    weighted_avg = df["form"] * 0.7 + df["points_per_game"] * 0.3
 
     goal_points_map = {1: 6, 2: 6, 3: 5, 4: 4}
-    df["_goal_pts_per"] = df["element_type"].map(goal_points_map)
-    xg = pd.to_numeric(df.get("expected_goals", 0), errors="coerce").fillna(0.0)
-    xa = pd.to_numeric(df.get("expected_assists", 0), errors="coerce").fillna(0.0)
-    df["xG Points"] = (xg * df["_goal_pts_per"]) + (xa * 3.0)
-
-    df["Goals per App"] = df.apply(
-        lambda x: x["goals_scored"] / x["Appearances"] if x["Appearances"] > 0 else 0,
-        axis=1,
-    )
-    df["Assists per App"] = df.apply(
-        lambda x: x["assists"] / x["Appearances"] if x["Appearances"] > 0 else 0,
-        axis=1,
-    )
-
-    df["Discipline Index"] = df["yellow_cards"] + 3 * df["red_cards"]
+    goal_pts_per = df["element_type"].map(goal_points_map)
+    xg = df["expected_goals"] if "expected_goals" in df else 0.0
+    xa = df["expected_assists"] if "expected_assists" in df else 0.0
+    xg_points = (xg * goal_pts_per) + (xa * 3.0)
 
-    df["Chance of Playing"] = df["chance_of_playing_next_round"].fillna(0).apply(
-        lambda x: f"{int(x)}%" if x > 0 else "Unavailable"
-    )
+    played = appearances > 0
+    safe_apps = appearances.where(played, 1)
+    goals_per_app = (df["goals_scored"] / safe_apps).where(played, 0)
+    assists_per_app = (df["assists"] / safe_apps).where(played, 0)
 
     # Photo slug — strip the ".jpg" extension for use in CDN URLs
-    df["_photo_slug"] = df["photo"].astype(str).str.replace(r"\.\w+$", "", regex=True)
+    photo_slug = df["photo"].astype(str).str.replace(r"\.\w+$", "", regex=True)
 
     # --- Output DataFrame ---
     df_out = pd.DataFrame({
-        "PlayerId": df["id"].astype(int),
-        "PlayerPhoto": df["_photo_slug"],
+        "PlayerId": df["id"],
+        "PlayerPhoto": photo_slug,
         "Player": df["web_name"],
         "Position": df["Position"],
         "Team": df["Team"],
-        "Price (GBP m)": df["Price (GBP m)"].round(1),
-        "FDR Next 3": df["FDR Next 3"],
-        "Total Points": df["total_points"].astype(int),
-        "Median": df["Median Points"].round(2),
-        "Avg": df["Weighted Avg Points"].round(2),
-        "xG Points": df["xG Points"].round(2),
-        "Appearances": df["Appearances"],
+        "Price (GBP m)": df["price"].round(1),
+        "FDR Next 3": fdr_next3,
+        "Total Points": df["total_points"],
+        "Median": df["points_per_game"].round(2),
+        "Avg": weighted_avg.round(2),
+        "xG Points": xg_points.round(2),
+        "Appearances": appearances,
         "Goals": df["goals_scored"],
         "Assists": df["assists"],
-        "Goals per App": df["Goals per App"].round(2),
-        "Assists per App": df["Assists per App"].round(2),
+        "Goals per App": goals_per_app.round(2),
+        "Assists per App": assists_per_app.round(2),
         "Y Cards": df["yellow_cards"],
         "R Cards": df["red_cards"],
-        "Discip Index": df["Discipline Index"],
+        "Discip Index": df["yellow_cards"] + 3 * df["red_cards"],
     })
 
     df_out.sort_values(by="Total Points", ascending=False, inplace=True)
@@ -0,0 +1,316 @@
+"""
+Per-gameweek player stats warehouse.
+
+Every finished gameweek whose data FPL has checked (bonus confirmed) is
+ingested once from ``event/{gw}/live`` — one request for all ~700
+players — and written as a columnar ``gw-NN.npz`` file (one array per
+stat) under ``settings.FPL_HISTORY_DIR``, in a directory per season.
+Finished gameweeks never change, so an ingest only fetches the ones not
+on disk yet; workers share the files and a file lock makes sure only one
+of them ingests.  Ingesting runs off the request path: after each
+bootstrap refresh (``on_bootstrap_refresh``), or in the background when
+a request finds gameweeks missing.
+
+``get_warehouse()`` loads the files into player × gameweek matrices and
+reloads them whenever the season directory changes.  Forecast weekly
+points (points.py) and the rolling-form features of the ML ensemble
+(ml_predictions.py) read from it.
+
+Gameweeks that have started but are not checked yet (the current one,
+or a finished one awaiting its data check) are read through the cache
+from the same endpoint with ``live_frame``.
+"""
+
+import contextlib
+import logging
+import os
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+from django.conf import settings
+
+from . import client, metrics
+from .cache import (
+    file_lock, get_bootstrap_versioned, get_event_live_versioned, run_in_background,
+)
+from .fdr import get_fixture_matrix
+
+logger = logging.getLogger(__name__)
+
+# Stat columns kept per player and gameweek (summed over a double gameweek).
+INT_STATS = (
+    "minutes", "starts", "goals_scored", "assists", "clean_sheets", "goals_conceded",
+    "saves", "bonus", "bps", "total_points",
+)
+FLOAT_STATS = (
+    "influence", "creativity", "threat", "ict_index", "expected_goals",
+    "expected_assists", "expected_goal_involvements", "expected_goals_conceded",
+)
+STATS = INT_STATS + FLOAT_STATS
+
+_lock = threading.Lock()
+_ingest_lock = threading.Lock()
+_loaded = {"key": None, "warehouse": None, "scheduled": None}
+_RESCHEDULE_AFTER = 60  # seconds between background ingests started by requests
+_live = {}  # gw -> (payload version, frame)
+
+
+def _history_dir() -> Path:
+    return Path(
+        getattr(settings, "FPL_HISTORY_DIR", "")
+        or os.path.join(tempfile.gettempdir(), "fpldash-history")
+    )
+
+
+def season_dir(bootstrap) -> Path:
+    """
+    Directory of the season ``bootstrap`` belongs to, named after the
+    year of its first deadline.  Rescheduled deadlines keep the same
+    directory.
+    """
+    first = bootstrap.events[0].deadline_time if bootstrap.events else ""
+    return _history_dir() / f"season-{first[:4] or 'unknown'}"
+
+
+def checked_gameweeks(bootstrap) -> list:
+    """Finished gameweeks whose data is final."""
+    return sorted(e.id for e in bootstrap.events if e.finished and e.data_checked)
+
+
+def started_gameweeks(bootstrap) -> list:
+    """Gameweeks with points to show: finished ones and the current one."""
+    return sorted(e.id for e in bootstrap.events if e.finished or e.is_current)
+
+
+def _float(value) -> float:
+    try:
+        return float(value or 0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def club_fixtures(bootstrap, gw: int) -> dict:
+    """
+    {player id: fixtures their club has in ``gw``}, from the fixture
+    matrix; {} when the fixtures cannot be loaded.
+    """
+    try:
+        counts = get_fixture_matrix().fixture_counts(gw, gw)
+    except Exception:
+        logger.warning("history: no fixtures for gameweek %d, counting from explain", gw,
+                       exc_info=True)
+        return {}
+    ids, teams = bootstrap.elements["id"].tolist(), bootstrap.elements["team"].tolist()
+    return {pid: counts.get(team, 0) for pid, team in zip(ids, teams)}
+
+
+def frame(live: dict, fixtures: dict = None) -> dict:
+    """
+    ``event/{gw}/live`` JSON -> columns: ``id``, ``fixtures`` and ``STATS``.
+
+    ``fixtures`` (see ``club_fixtures``) gives each player's fixture
+    count, so one who sat a played match out stays at 0 rather than
+    blank even where ``explain`` lists nothing.  The larger of the two
+    counts is kept: the bootstrap only knows a player's current club.
+    """
+    elements = [e for e in live.get("elements", []) if "id" in e]
+    stats = [e.get("stats") or {} for e in elements]
+    fixtures = fixtures or {}
+    out = {
+        "id": np.fromiter((e["id"] for e in elements), dtype=np.int32, count=len(elements)),
+        # Fixtures the player's club played in the round (0 = blank).
+        "fixtures": np.fromiter(
+            (max(len(e.get("explain") or ()), fixtures.get(e["id"], 0)) for e in elements),
+            dtype=np.int8, count=len(elements),
+        ),
+    }
+    for name in INT_STATS:
+        out[name] = np.fromiter(
+            (int(s.get(name) or 0) for s in stats), dtype=np.int16, count=len(stats)
+        )
+    for name in FLOAT_STATS:
+        out[name] = np.fromiter(
+            (_float(s.get(name)) for s in stats), dtype=np.float32, count=len(stats)
+        )
+    return out
+
+
+def _path(directory: Path, gw: int) -> Path:
+    return directory / f"gw-{gw:02d}.npz"
+
+
+def _write(path: Path, columns: dict) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    try:
+        with os.fdopen(fd, "wb") as fh:
+            np.savez(fh, **columns)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def ingest(bootstrap, timeout: float = 20) -> list:
+    """
+    Fetch and store every checked gameweek not yet on disk; return the
+    gameweeks written.  Gameweeks that fail to download are retried on
+    the next call.
+    """
+    from .fetcher import FetchError, get_engine
+
+    directory = season_dir(bootstrap)
+    wanted = [gw for gw in checked_gameweeks(bootstrap) if not _path(directory, gw).exists()]
+    if not wanted:
+        return []
+    written = []
+    directory.mkdir(parents=True, exist_ok=True)
+    with _ingest_lock, file_lock(directory / "ingest.lock"):
+        # Another thread or worker may have ingested them while we waited.
+        wanted = [gw for gw in wanted if not _path(directory, gw).exists()]
+        if not wanted:
+            return []
+        urls = {gw: f"{client.FPL_API}event/{gw}/live/" for gw in wanted}
+        with metrics.phase("history-ingest"):
+            results = get_engine().fetch_json_many(urls.values(), timeout=timeout, deadline=60)
+        for gw, url in urls.items():
+            result = results.get(url)
+            if isinstance(result, FetchError) or not (result or {}).get("elements"):
+                logger.warning("history: could not ingest gameweek %d: %s", gw, result)
+                continue
+            _write(_path(directory, gw), frame(result, club_fixtures(bootstrap, gw)))
+            written.append(gw)
+    if written:
+        logger.info("history: ingested gameweeks %s into %s", written, directory)
+    return written
+
+
+def on_bootstrap_refresh(data, version: str) -> None:
+    """``cache.on_refresh`` hook: ingest newly finished gameweeks off-thread."""
+    run_in_background("history-ingest", lambda: ingest(data))
+
+
+class Warehouse:
+    """Ingested gameweeks as player × gameweek matrices (column gw - 1)."""
+
+    __slots__ = ("gws", "ids", "index", "fixtures", "stats")
+
+    def __init__(self, frames: dict):
+        self.gws = tuple(sorted(frames))
+        self.ids = (
+            np.unique(np.concatenate([f["id"] for f in frames.values()]))
+            if frames else np.empty(0, dtype=np.int32)
+        )
+        self.index = {int(pid): row for row, pid in enumerate(self.ids)}
+        n_gws = max(self.gws, default=0)
+        shape = (len(self.ids), n_gws)
+        self.fixtures = np.zeros(shape, dtype=np.int8)
+        self.stats = {
+            name: np.zeros(shape, dtype=np.int16 if name in INT_STATS else np.float32)
+            for name in STATS
+        }
+        for gw, columns in frames.items():
+            rows = np.searchsorted(self.ids, columns["id"])
+            self.fixtures[rows, gw - 1] = columns["fixtures"]
+            for name in STATS:
+                if name in columns:
+                    self.stats[name][rows, gw - 1] = columns[name]
+
+    def rows(self, player_ids) -> tuple:
+        """(positions in ``player_ids`` known here, their matrix rows)."""
+        found = [(i, self.index[pid]) for i, pid in enumerate(player_ids) if pid in self.index]
+        if not found:
+            return np.empty(0, dtype=np.intp), np.empty(0, dtype=np.intp)
+        at, rows = zip(*found)
+        return np.asarray(at, dtype=np.intp), np.asarray(rows, dtype=np.intp)
+
+    def block(self, name: str, player_ids, n_gws: int, missing) -> np.ndarray:
+        """
+        ``name`` for ``player_ids`` over gameweeks 1..n_gws, ``missing``
+        where a gameweek is not ingested or the player's club had no
+        fixture in it.
+        """
+        matrix = self.stats[name]
+        out = np.full((len(player_ids), n_gws), missing, dtype=matrix.dtype)
+        cols = np.asarray([gw - 1 for gw in self.gws if gw <= n_gws], dtype=np.intp)
+        at, rows = self.rows(player_ids)
+        if len(cols) and len(rows):
+            grid = np.ix_(rows, cols)
+            out[np.ix_(at, cols)] = np.where(self.fixtures[grid] > 0, matrix[grid], missing)
+        return out
+
+    def rolling_mean(self, name: str, player_ids, window: int) -> np.ndarray:
+        """Mean of ``name`` per gameweek over the last ``window`` ingested ones (0 if none)."""
+        out = np.zeros(len(player_ids), dtype=float)
+        cols = np.asarray([gw - 1 for gw in self.gws[-window:]], dtype=np.intp)
+        at, rows = self.rows(player_ids)
+        if len(cols) and len(rows):
+            out[at] = self.stats[name][np.ix_(rows, cols)].sum(axis=1, dtype=float) / len(cols)
+        return out
+
+
+def _load(directory: Path, names: tuple) -> Warehouse:
+    frames = {}
+    for name in names:
+        try:
+            with np.load(directory / name) as npz:
+                frames[int(name[3:5])] = {k: npz[k] for k in npz.files}
+        except Exception:
+            logger.warning("history: ignoring unreadable %s", directory / name, exc_info=True)
+    return Warehouse(frames)
+
+
+def get_warehouse(ingest_first: bool = False) -> Warehouse:
+    """
+    The warehouse for the current season, as far as it is on disk.
+
+    Checked gameweeks not ingested yet are fetched by a background job,
+    so a request never waits on the network here; background callers
+    pass ``ingest_first=True`` to fetch them before loading (a failed
+    ingest is logged and what is on disk is served).
+    """
+    data = get_bootstrap_versioned()[0]
+    directory = season_dir(data)
+    if ingest_first:
+        try:
+            ingest(data)
+        except Exception:
+            logger.warning("history: ingest failed", exc_info=True)
+    try:
+        # Adding or replacing a file bumps the directory's mtime.
+        key = (str(directory), directory.stat().st_mtime_ns)
+    except FileNotFoundError:
+        key = (str(directory), None)
+    with _lock:
+        warehouse = _loaded["warehouse"] if _loaded["key"] == key else None
+    if warehouse is None:
+        names = tuple(sorted(p.name for p in directory.glob("gw-*.npz")))
+        warehouse = _load(directory, names)
+        with _lock:
+            _loaded.update(key=key, warehouse=warehouse)
+    if not set(checked_gameweeks(data)) <= set(warehouse.gws):
+        now = time.monotonic()
+        with _lock:
+            last = _loaded["scheduled"]
+            due = last is None or now - last >= _RESCHEDULE_AFTER
+            if due:
+                _loaded["scheduled"] = now
+        if due:
+            run_in_background("history-ingest", lambda: ingest(data))
+    return warehouse
+
+
+def live_frame(gw: int, bootstrap) -> dict:
+    """Columns of a gameweek not in the warehouse, read through the cache."""
+    live, version = get_event_live_versioned(gw)
+    with _lock:
+        cached = _live.get(gw)
+        if cached and cached[0] == version:
+            return cached[1]
+    columns = frame(live, club_fixtures(bootstrap, gw))
+    with _lock:
+        _live[gw] = (version, columns)
+    return columns
@@ -0,0 +1,37 @@
+from django.core.management.base import BaseCommand
+
+from fpldash import ml_predictions
+
+
+class Command(BaseCommand):
+    help = (
+        "Fit each ML ensemble member on a hold-out split and report its fit / "
+        "predict time, hold-out MAE and marginal contribution to the ensemble."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--holdout", type=float, default=0.2)
+        parser.add_argument("--seed", type=int, default=42)
+
+    def handle(self, *args, **options):
+        rows = ml_predictions.model_report(holdout=options["holdout"], seed=options["seed"])
+        if not rows:
+            self.stderr.write("Not enough players with minutes to evaluate.")
+            return
+        self.stdout.write(
+            f"{'model':<18} {'fit s':>8} {'predict s':>10} {'MAE':>8} {'marginal':>9}"
+        )
+        for r in rows:
+            marginal = "" if r["marginal_mae"] is None else f"{r['marginal_mae']:+.4f}"
+            self.stdout.write(
+                f"{r['model']:<18} {r['fit_s']:>8.3f} {r['predict_s']:>10.3f} "
+                f"{r['mae']:>8.4f} {marginal:>9}"
+            )
+
+        profile = ml_predictions.get_training_profile()
+        if profile:
+            self.stdout.write(
+                f"\nLast background fit ({profile['fingerprint']}): "
+                f"members={', '.join(profile['members'])}"
+                + (f"; dropped by budget: {', '.join(profile['dropped'])}" if profile["dropped"] else "")
+            )
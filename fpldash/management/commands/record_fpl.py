@@ -0,0 +1,64 @@
+import json
+import os
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from fpldash import client
+from fpldash.fetcher import FetchError, get_engine
+
+
+class Command(BaseCommand):
+    help = (
+        "Record live FPL API payloads (bootstrap-static, fixtures, element "
+        "summaries, gameweek live stats and optional managers' picks) for "
+        "the offline stand-in."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--out", default=None,
+                            help="Output directory (default: FPL_OFFLINE_DIR).")
+        parser.add_argument("--players", type=int, default=0,
+                            help="Record only the first N element summaries (0 = all).")
+        parser.add_argument("--manager", type=int, action="append", default=[],
+                            help="Also record this manager's picks for the current GW.")
+
+    def _write(self, out: str, path: str, body: bytes):
+        filename = os.path.join(out, *path.split("/")) + ".json"
+        os.makedirs(os.path.dirname(filename), exist_ok=True)
+        with open(filename, "wb") as fh:
+            fh.write(body)
+
+    def handle(self, *args, **options):
+        out = options["out"] or getattr(settings, "FPL_OFFLINE_DIR", "")
+        if not out:
+            raise CommandError("Pass --out or set FPL_OFFLINE_DIR.")
+
+        raw = {}
+        for path in ("bootstrap-static", "fixtures"):
+            r = client.get(f"{client.FPL_API}{path}/", timeout=30)
+            r.raise_for_status()
+            raw[path] = r.content
+            self._write(out, path, r.content)
+        bootstrap = json.loads(raw["bootstrap-static"])
+
+        ids = [e["id"] for e in bootstrap["elements"]]
+        if options["players"]:
+            ids = ids[: options["players"]]
+        gw = next((e["id"] for e in bootstrap["events"] if e.get("is_current")), 1)
+        paths = [f"element-summary/{pid}" for pid in ids]
+        paths += [f"event/{e}/live" for e in range(1, gw + 1)]
+        paths += [f"entry/{m}/event/{gw}/picks" for m in options["manager"]]
+
+        results = get_engine().fetch_json_many(
+            [f"{client.FPL_API}{p}/" for p in paths], timeout=20, deadline=600
+        )
+        failed = 0
+        for path in paths:
+            data = results[f"{client.FPL_API}{path}/"]
+            if isinstance(data, FetchError):
+                failed += 1
+                self.stderr.write(f"skipped {path}: {data.reason}")
+                continue
+            self._write(out, path, json.dumps(data).encode())
+        self.stdout.write(f"Recorded {2 + len(paths) - failed} payloads to {out}")
@@ -0,0 +1,234 @@
+"""
+Per-request phase timings and process-wide metrics.
+
+``phase(name)`` times a block of work.  Inside a request (see
+``ServerTimingMiddleware`` in middleware.py) the durations are collected
+for that response's ``Server-Timing`` header, so the browser's network
+panel shows where a slow ``/api/forecast`` spent its time — bootstrap
+fetch, ML scores, element-summary batch, JSON encoding.  Every phase is
+also added to the ``fpldash_phase_seconds`` histogram, whether or not it
+ran inside a request.
+
+``render()`` produces the Prometheus text exposition served at
+``/metrics``: request and phase histograms, upstream latency per FPL
+endpoint, ML training durations, price-feed source outcomes, in-flight
+requests, and the cache counters / hit ratios from ``cache.cache_stats()``.
+
+Metrics are per process; with several gunicorn workers each scrape sees
+the worker that answered it.
+"""
+
+import contextlib
+import contextvars
+import re
+import threading
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+TRAINING_BUCKETS = (0.1, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0)
+
+_lock = threading.Lock()
+_timings: contextvars.ContextVar = contextvars.ContextVar("fpldash_timings", default=None)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in zip(names, values)) + "}"
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help_text: str, labels=()):
+        self.name = name
+        self.help = help_text
+        self.label_names = tuple(labels)
+        self._values: dict = {}
+
+    def _header(self) -> list:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        with _lock:
+            self._values[labels] = self._values.get(labels, 0) + amount
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels, value in sorted(self._values.items()):
+            lines.append(f"{self.name}{_labels(self.label_names, labels)} {value:g}")
+        return lines
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, *labels, amount: float = 1) -> None:
+        self.inc(*labels, amount=-amount)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help_text: str, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, help_text, labels)
+        self.buckets = tuple(buckets)
+
+    def observe(self, *labels, value: float) -> None:
+        with _lock:
+            state = self._values.get(labels)
+            if state is None:
+                state = self._values[labels] = [[0] * len(self.buckets), 0, 0.0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state[0][i] += 1
+            state[1] += 1
+            state[2] += value
+
+    def render(self) -> list:
+        lines = self._header()
+        for labels, (counts, total, value_sum) in sorted(self._values.items()):
+            names = self.label_names + ("le",)
+            for bound, count in zip(self.buckets, counts):
+                lines.append(f"{self.name}_bucket{_labels(names, labels + (f'{bound:g}',))} {count}")
+            lines.append(f"{self.name}_bucket{_labels(names, labels + ('+Inf',))} {total}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, labels)} {value_sum:.6f}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, labels)} {total}")
+        return lines
+
+
+REQUESTS_IN_FLIGHT = Gauge(
+    "fpldash_http_requests_in_flight", "Requests currently being handled."
+)
+REQUESTS_IN_FLIGHT.inc(amount=0)
+REQUEST_SECONDS = Histogram(
+    "fpldash_http_request_duration_seconds", "Request handling time by route and status.",
+    ("route", "status"),
+)
+PHASE_SECONDS = Histogram(
+    "fpldash_phase_seconds", "Time spent in instrumented phases of request handling.",
+    ("phase",),
+)
+UPSTREAM_SECONDS = Histogram(
+    "fpldash_upstream_request_duration_seconds", "Latency of FPL API calls by endpoint.",
+    ("endpoint", "status"),
+)
+TRAINING_SECONDS = Histogram(
+    "fpldash_ml_training_duration_seconds", "Fit + predict time per ML ensemble member.",
+    ("model",), buckets=TRAINING_BUCKETS,
+)
+TRAINING_RUNS = Counter(
+    "fpldash_ml_training_runs_total", "Background ML jobs by outcome.", ("outcome",)
+)
+
+PRICEFEED_RESULTS = Counter(
+    "fpldash_pricefeed_source_results_total",
+    "Price-change feed source outcomes (ok / empty / error / skipped by breaker).",
+    ("source", "outcome"),
+)
+
+_REGISTRY = (
+    REQUESTS_IN_FLIGHT, REQUEST_SECONDS, PHASE_SECONDS,
+    UPSTREAM_SECONDS, TRAINING_SECONDS, TRAINING_RUNS, PRICEFEED_RESULTS,
+)
+
+_UPSTREAM_PATTERNS = (
+    (re.compile(r"^/api/element-summary/\d+/?$"), "element-summary"),
+    (re.compile(r"^/api/entry/\d+/event/\d+/picks/?$"), "entry-picks"),
+    (re.compile(r"^/api/event/\d+/live/?$"), "event-live"),
+    (re.compile(r"^/api/(bootstrap-static|fixtures)/?$"), None),
+)
+
+
+def upstream_endpoint(url: str) -> str:
+    """Low-cardinality endpoint label for an FPL API URL."""
+    path = urlsplit(url).path
+    for pattern, label in _UPSTREAM_PATTERNS:
+        match = pattern.match(path)
+        if match:
+            return label or match[1]
+    return "other"
+
+
+def observe_upstream(url: str, status, seconds: float) -> None:
+    UPSTREAM_SECONDS.observe(upstream_endpoint(url), str(status), value=seconds)
+
+
+# ── request phases ────────────────────────────────────────────────────
+
+def start_request():
+    """Begin collecting phases for the current request; returns a reset token."""
+    return _timings.set({})
+
+
+def finish_request(token) -> dict:
+    """Stop collecting and return {phase: seconds} for the request."""
+    timings = _timings.get() or {}
+    _timings.reset(token)
+    return timings
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """Time the enclosed block as ``name`` (repeated phases are summed)."""
+    t0 = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - t0
+        PHASE_SECONDS.observe(name, value=elapsed)
+        timings = _timings.get()
+        if timings is not None:
+            timings[name] = timings.get(name, 0.0) + elapsed
+
+
+def server_timing(timings: dict, total: float = None) -> str:
+    """Format timings as a ``Server-Timing`` header value (milliseconds)."""
+    parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in timings.items()]
+    if total is not None:
+        parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# ── exposition ────────────────────────────────────────────────────────
+
+def _cache_lines() -> list:
+    from .cache import cache_stats
+
+    stats = cache_stats()
+    lines = [
+        "# HELP fpldash_cache_events_total Cache lookups and upstream refreshes by key.",
+        "# TYPE fpldash_cache_events_total counter",
+    ]
+    for key, counters in sorted(stats.items()):
+        for event, value in sorted(counters.items()):
+            lines.append(f"fpldash_cache_events_total{_labels(('key', 'event'), (key, event))} {value}")
+    lines += [
+        "# HELP fpldash_cache_hit_ratio Fresh or stale hits over all lookups, by key.",
+        "# TYPE fpldash_cache_hit_ratio gauge",
+    ]
+    for key, counters in sorted(stats.items()):
+        served = counters.get("hits", 0) + counters.get("stale", 0)
+        lookups = served + counters.get("misses", 0)
+        if lookups:
+            lines.append(f"fpldash_cache_hit_ratio{_labels(('key',), (key,))} {served / lookups:.4f}")
+    return lines
+
+
+def render() -> str:
+    """Prometheus text exposition of every metric in this process."""
+    lines = []
+    with _lock:
+        for metric in _REGISTRY:
+            lines += metric.render()
+    lines += _cache_lines()
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,98 @@
+import time
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+from . import metrics
+
+
+class ServerTimingMiddleware:
+    """
+    Time every request, expose its phases as a ``Server-Timing`` header and
+    feed the request / in-flight metrics served at ``/metrics``.
+
+    Works in both sync (WSGI) and async (ASGI) chains, so it never forces
+    Django to run async views through a thread.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        state = self._start()
+        response = None
+        try:
+            response = self.get_response(request)
+        finally:
+            self._finish(request, response, state)
+        return response
+
+    async def __acall__(self, request):
+        state = self._start()
+        response = None
+        try:
+            response = await self.get_response(request)
+        finally:
+            self._finish(request, response, state)
+        return response
+
+    def _start(self) -> tuple:
+        metrics.REQUESTS_IN_FLIGHT.inc()
+        return metrics.start_request(), time.perf_counter()
+
+    def _finish(self, request, response, state) -> None:
+        token, t0 = state
+        total = time.perf_counter() - t0
+        timings = metrics.finish_request(token)
+        metrics.REQUESTS_IN_FLIGHT.dec()
+        status = response.status_code if response is not None else 500
+        match = getattr(request, "resolver_match", None)
+        route = match.route if match else "unmatched"
+        metrics.REQUEST_SECONDS.observe(route or "/", str(status), value=total)
+        if response is not None:
+            response["Server-Timing"] = metrics.server_timing(timings, total)
+
+
+class StaticFilesMiddleware(WhiteNoiseMiddleware):
+    """
+    ``WhiteNoiseMiddleware`` that can also sit in an async chain.
+
+    WhiteNoise's middleware is sync-only; under ASGI that would make Django
+    run every request below it (our async views included) through a single
+    worker thread.  Static files are still served by WhiteNoise, from a
+    worker thread; everything else is passed on without leaving the event
+    loop.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response=None, *args, **kwargs):
+        super().__init__(get_response, *args, **kwargs)
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        return super().__call__(request)
+
+    async def __acall__(self, request):
+        if self.autorefresh:
+            static_file = await sync_to_async(self.find_file, thread_sensitive=False)(
+                request.path_info
+            )
+        else:
+            static_file = self.files.get(request.path_info)
+        if static_file is not None:
+            return await sync_to_async(self.serve, thread_sensitive=False)(static_file, request)
+        return await self.get_response(request)
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-18 03:46
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Snapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('version', models.CharField(max_length=64, unique=True)),
+                ('taken_at', models.DateTimeField(db_index=True)),
+                ('gameweek', models.PositiveSmallIntegerField(default=0)),
+                ('changed', models.PositiveIntegerField(default=0)),
+            ],
+            options={
+                'ordering': ['taken_at'],
+            },
+        ),
+        migrations.CreateModel(
+            name='PlayerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('player_id', models.PositiveIntegerField()),
+                ('ts', models.PositiveIntegerField()),
+                ('now_cost', models.PositiveSmallIntegerField()),
+                ('selected_by', models.PositiveSmallIntegerField()),
+                ('transfers_in_event', models.PositiveIntegerField()),
+                ('transfers_out_event', models.PositiveIntegerField()),
+                ('form', models.PositiveSmallIntegerField()),
+                ('snapshot', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='players', to='fpldash.snapshot')),
+            ],
+            options={
+                'indexes': [models.Index(fields=['player_id', 'ts'], name='playersnap_player_time')],
+            },
+        ),
+    ]
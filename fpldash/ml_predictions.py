@@ -1,15 +1,17 @@
 """
 ML-ensemble next-GW score predictions.
 
-Three models are trained on the full current-season player pool using
-underlying per-90-minute performance metrics as features and
-points_per_game as the target:
+Four models are trained on the full current-season player pool using
+underlying per-90-minute performance metrics, plus rolling form over the
+last 3 and 6 finished gameweeks from the local per-gameweek warehouse
+(history.py), as features and points_per_game as the target:
 
   1. Ridge regression   — linear baseline
   2. Random Forest      — captures non-linear interactions, bagged
   3. Gradient Boosting  — sequential boosting, further non-linearity
+  4. XGBoost            — regularised boosting with column subsampling
 
-The ensemble average of the three predictions is the "Predicted Score".
+The ensemble average of the members' predictions is the "Predicted Score".
 
 Why this is meaningful even though training == prediction set
 ------------------------------------------------------------
@@ -23,25 +25,62 @@ prediction acts as a "regularised estimate" of true quality:
   * Players underperforming their expected stats (low PPG vs high xG)
     will receive a higher predicted score → expect improvement.
 
-Predictions are cached for 30 minutes alongside the bootstrap data.
+Training runs off the request path
+----------------------------------
+``get_ml_predicted_scores()`` is a dictionary lookup.  When the bootstrap
+payload's fingerprint (its content hash) differs from the one the cached
+scores were trained on, a background job is scheduled that either loads
+the scores another worker already persisted for that fingerprint, or
+trains the ensemble under a cross-process file lock and persists the
+fitted models and scores to ``settings.FPL_MODEL_DIR``.
+
+Until the job finishes the previous scores keep being served ({} on a
+cold start — callers fall back to form/PPG).  A worker's first lookup
+loads the newest persisted scores, so management commands that never
+ask for scores leave the model files alone.
+
+Skipping and budgeting retrains
+-------------------------------
+Between gameweeks most bootstrap changes (ownership, transfers) leave the
+feature matrix untouched, so the job hashes X / y first and reuses the
+previous predictions when they are identical.  Each fit records per-model
+fit / predict seconds; with ``settings.FPL_ML_TIME_BUDGET`` set, the
+costliest members are dropped from the next fit until the expected total
+fits the budget.  ``model_report()`` (``manage.py ml_report``) adds each
+member's marginal contribution to hold-out accuracy.
 """
 
+import contextlib
+import hashlib
+import logging
+import os
+import tempfile
 import threading
 import time
+from pathlib import Path
 
+import joblib
 import numpy as np
-import pandas as pd
+from django.conf import settings
 from sklearn.ensemble import GradientBoostingRegressor, RandomForestRegressor
 from sklearn.linear_model import Ridge
 from sklearn.pipeline import Pipeline
 from sklearn.preprocessing import StandardScaler
 from xgboost import XGBRegressor
 
-from .cache import get_bootstrap
+from . import metrics
+from .cache import file_lock, get_bootstrap_versioned, run_in_background
+from .history import Warehouse, get_warehouse
+from .players import get_player_table, get_player_table_versioned
+
+logger = logging.getLogger(__name__)
 
 _lock = threading.Lock()
-_cache: dict = {}
-_TTL = 1800  # 30 minutes — aligns with bootstrap cache TTL
+_cache: dict = {}  # "scores" -> entry (see _train_job); "failed" -> (fingerprint, ts)
+_KEEP_FINGERPRINTS = 3  # persisted generations kept on disk
+_RETRY_AFTER = 300  # seconds before retrying a fingerprint whose training failed
+_boot_lock = threading.Lock()
+_booted = False  # whether this process has looked for persisted scores yet
 
 # Underlying-stat columns used as features (raw totals; normalised per-90 below)
 _RAW_FEATURES = [
@@ -57,40 +96,310 @@ _RAW_FEATURES = [
     "bonus",
 ]
 
+# Rolling form features: per-gameweek mean of a warehouse stat over the
+# last N finished gameweeks.
+_ROLLING_FEATURES = [
+    ("total_points", 3),
+    ("total_points", 6),
+    ("minutes", 3),
+    ("minutes", 6),
+    ("expected_goal_involvements", 3),
+    ("expected_goal_involvements", 6),
+]
+
+
+def _build_models() -> dict:
+    """Fresh, unfitted ensemble members keyed by name (in ensemble order)."""
+    return {
+        # 1. Ridge — regularised linear model (fast, interpretable baseline)
+        "ridge": Pipeline([
+            ("scaler", StandardScaler()),
+            ("ridge", Ridge(alpha=1.0)),
+        ]),
+        # 2. Random Forest — bagged trees, handles interactions & outliers
+        "random_forest": RandomForestRegressor(
+            n_estimators=150,
+            max_depth=6,
+            min_samples_leaf=5,
+            random_state=42,
+            n_jobs=-1,
+        ),
+        # 3. Gradient Boosting — sequential boosting for remaining residuals
+        "gradient_boosting": GradientBoostingRegressor(
+            n_estimators=150,
+            max_depth=4,
+            learning_rate=0.05,
+            min_samples_leaf=5,
+            random_state=42,
+        ),
+        # 4. XGBoost — regularised gradient boosting with column subsampling
+        "xgboost": XGBRegressor(
+            n_estimators=150,
+            max_depth=4,
+            learning_rate=0.05,
+            subsample=0.8,
+            colsample_bytree=0.8,
+            reg_alpha=0.1,
+            reg_lambda=1.0,
+            random_state=42,
+            verbosity=0,
+            n_jobs=-1,
+        ),
+    }
+
+
+MODEL_NAMES = tuple(_build_models())
+
 
 def get_ml_predicted_scores() -> dict:
     """
     Return {player_id (int): predicted_score (float)} for every player
     who has played at least one minute this season.
 
-    Scores are in the same units as FPL points-per-game and are cached.
+    Scores are in the same units as FPL points-per-game.  This never
+    trains inline: if the scores are missing or were trained on an older
+    bootstrap payload, a background job is scheduled and the current
+    (possibly empty) scores are returned.
     """
+    _load_persisted_once()
+    fingerprint = get_bootstrap_versioned()[1]
     with _lock:
         entry = _cache.get("scores")
-        if entry and (time.time() - entry["ts"]) < _TTL:
-            return entry["data"]
+        failed = _cache.get("failed")
+    if entry is None or entry["fingerprint"] != fingerprint:
+        if not (failed and failed[0] == fingerprint and time.time() - failed[1] < _RETRY_AFTER):
+            run_in_background("ml_scores", _train_job)
+    return entry["data"] if entry else {}
 
-    result = _train_and_predict()
 
+def get_ml_scores_version() -> str:
+    """Opaque token that changes whenever the served scores change."""
+    _load_persisted_once()
     with _lock:
-        _cache["scores"] = {"ts": time.time(), "data": result}
+        entry = _cache.get("scores")
+    if not entry:
+        return "none"
+    # Identical features + members give identical scores, whatever the
+    # bootstrap fingerprint.
+    return f"{entry.get('features', entry['fingerprint'])}:{'+'.join(entry.get('members', ()))}"
+
+
+def get_training_profile() -> dict:
+    """Fit / predict seconds per member and members dropped by the budget."""
+    _load_persisted_once()
+    with _lock:
+        entry = _cache.get("scores")
+    if not entry:
+        return {}
+    return {
+        "fingerprint": entry["fingerprint"],
+        "trained_at": entry["ts"],
+        "members": list(entry.get("members", MODEL_NAMES)),
+        "dropped": list(entry.get("dropped", [])),
+        "profile": {name: dict(p) for name, p in entry.get("profile", {}).items()},
+    }
+
+
+def load_persisted() -> bool:
+    """Load the newest persisted scores into memory; True if any were found."""
+    for path in reversed(_scores_files(_model_dir())):
+        try:
+            entry = joblib.load(path)
+        except Exception:
+            logger.warning("Ignoring unreadable model file %s", path, exc_info=True)
+            continue
+        with _lock:
+            _cache["scores"] = entry
+        return True
+    return False
 
-    return result
+
+def _load_persisted_once() -> None:
+    """
+    ``load_persisted()`` on the first lookup in this process, so a fresh
+    worker serves the last persisted scores instead of waiting for its
+    own background job.
+    """
+    global _booted
+    if _booted:
+        return
+    with _boot_lock:
+        if _booted:
+            return
+        try:
+            load_persisted()
+        except Exception:
+            logger.warning("Could not load persisted ML scores", exc_info=True)
+        _booted = True
+
+
+def _model_dir() -> Path:
+    directory = Path(
+        getattr(settings, "FPL_MODEL_DIR", "")
+        or os.path.join(tempfile.gettempdir(), "fpldash-models")
+    )
+    directory.mkdir(parents=True, exist_ok=True)
+    return directory
+
+
+def _scores_files(directory: Path) -> list:
+    """Persisted score files, oldest first."""
+    return sorted(directory.glob("scores-*.joblib"), key=lambda p: p.stat().st_mtime)
+
+
+def _load_scores(directory: Path, fingerprint: str):
+    path = directory / f"scores-{fingerprint}.joblib"
+    if not path.exists():
+        return None
+    try:
+        return joblib.load(path)
+    except Exception:
+        logger.warning("Ignoring unreadable model file %s", path, exc_info=True)
+        return None
+
+
+def _dump_atomic(obj, path: Path) -> None:
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.")
+    os.close(fd)
+    try:
+        joblib.dump(obj, tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.unlink(tmp)
+        raise
+
+
+def _persist(directory: Path, entry: dict, models) -> None:
+    """
+    Write ``entry`` as scores-<fingerprint>; ``models`` (None when the fit
+    was skipped) as models-<features>, which several fingerprints may share.
+    """
+    # Models first: a scores file on disk implies its models are there too.
+    if models is not None:
+        _dump_atomic(models, directory / f"models-{entry['features']}.joblib")
+    _dump_atomic(entry, directory / f"scores-{entry['fingerprint']}.joblib")
+
+    files = _scores_files(directory)
+    for old in files[:-_KEEP_FINGERPRINTS]:
+        with contextlib.suppress(OSError):
+            old.unlink()
+    referenced = set()
+    for path in files[-_KEEP_FINGERPRINTS:]:
+        with contextlib.suppress(Exception):
+            referenced.add(joblib.load(path).get("features"))
+    for path in directory.glob("models-*.joblib"):
+        if path.name[len("models-"):-len(".joblib")] not in referenced:
+            with contextlib.suppress(OSError):
+                path.unlink()
+
+
+def _latest_entry(directory: Path):
+    with _lock:
+        entry = _cache.get("scores")
+    if entry is not None:
+        return entry
+    files = _scores_files(directory)
+    return _load_scores(directory, files[-1].name[len("scores-"):-len(".joblib")]) if files else None
+
+
+def _select_members(costs: dict, budget: float) -> tuple:
+    """
+    Drop the costliest members (by last measured fit + predict seconds)
+    until the expected total fits ``budget``; 0 means unlimited.  At least
+    one member is always kept.  Returns (kept, dropped) name lists.
+    """
+    kept = list(MODEL_NAMES)
+    dropped = []
+    while budget and len(kept) > 1 and sum(costs.get(n, 0.0) for n in kept) > budget:
+        costliest = max(kept, key=lambda n: costs.get(n, 0.0))
+        kept.remove(costliest)
+        dropped.append(costliest)
+    return kept, dropped
+
+
+def _train_job() -> dict:
+    """Background job: make scores for the current fingerprint available."""
+    df, fingerprint = get_player_table_versioned()
+    directory = _model_dir()
+    outcome = "loaded"
+    entry = _load_scores(directory, fingerprint)
+    if entry is None:
+        # One worker trains per fingerprint; the others wait and load its result.
+        with file_lock(directory / "train.lock"):
+            entry = _load_scores(directory, fingerprint)
+            if entry is None:
+                try:
+                    with metrics.phase("ml-train"):
+                        entry = _train_entry(df, fingerprint, directory)
+                except Exception:
+                    metrics.TRAINING_RUNS.inc("failed")
+                    with _lock:
+                        _cache["failed"] = (fingerprint, time.time())
+                    raise
+                outcome = "reused" if entry.get("skipped") else "trained"
+    metrics.TRAINING_RUNS.inc(outcome)
+    with _lock:
+        _cache["scores"] = entry
+    return entry["data"]
+
+
+def _train_entry(df, fingerprint: str, directory: Path) -> dict:
+    ids, X, y = _prepare_features(df)
+    features = _features_fingerprint(ids, X, y)
+    previous = _latest_entry(directory)
+    costs = {
+        name: p["fit_s"] + p["predict_s"]
+        for name, p in (previous or {}).get("profile", {}).items()
+    }
+    members, dropped = _select_members(
+        costs, float(getattr(settings, "FPL_ML_TIME_BUDGET", 0) or 0)
+    )
+
+    if previous and previous.get("features") == features and previous.get("members") == members:
+        logger.info("ML features unchanged for %s; reusing %s", fingerprint, previous["fingerprint"])
+        entry = dict(previous, fingerprint=fingerprint, skipped=previous.get("skipped", 0) + 1)
+        _persist(directory, entry, None)
+        return entry
+
+    t0 = time.time()
+    models, avg, profile = _fit_ensemble(X, y, members)
+    logger.info("Trained ML ensemble %s for %s in %.1fs", members, fingerprint, time.time() - t0)
+    # Keep measured costs of dropped members so the budget can re-admit them.
+    for name in dropped:
+        if previous and name in previous.get("profile", {}):
+            profile[name] = previous["profile"][name]
+    entry = {
+        "fingerprint": fingerprint,
+        "features": features,
+        "members": members,
+        "dropped": dropped,
+        "profile": profile,
+        "ts": time.time(),
+        "skipped": 0,
+        "data": {int(pid): round(float(score), 2) for pid, score in zip(ids, avg)},
+    }
+    _persist(directory, entry, models)
+    return entry
 
 
 def _train_and_predict() -> dict:
-    data = get_bootstrap()
-    df = pd.DataFrame(data["elements"])
+    """Train every member on the current player table; return the scores."""
+    ids, X, y = _prepare_features(get_player_table())
+    if not len(ids):
+        return {}
+    _, avg, _ = _fit_ensemble(X, y, MODEL_NAMES)
+    return {int(pid): round(float(score), 2) for pid, score in zip(ids, avg)}
+
 
-    # Only players who have actually played
-    df["minutes"] = pd.to_numeric(df["minutes"], errors="coerce").fillna(0.0)
+def _prepare_features(df) -> tuple:
+    """Return (player ids, X, y) for players who have played this season."""
+    # Only players who have actually played (numeric columns are already
+    # coerced by the player table)
     df = df[df["minutes"] > 0].copy()
     if df.empty:
-        return {}
-
-    # Parse all numeric columns
-    for col in _RAW_FEATURES + ["points_per_game"]:
-        df[col] = pd.to_numeric(df[col], errors="coerce").fillna(0.0)
+        n_features = len(_RAW_FEATURES) + 1 + len(_ROLLING_FEATURES)
+        return np.empty(0, dtype=int), np.empty((0, n_features)), np.empty(0)
 
     # Appearances (90-min equivalents) — floor at 0.5 to prevent /0
     df["apps90"] = (df["minutes"] / 90.0).clip(lower=0.5)
@@ -103,56 +412,103 @@ def _train_and_predict() -> dict:
         feat_cols.append(c90)
 
     # Position (1 = GK … 4 = FWD) — captures position scoring differences
-    df["pos"] = pd.to_numeric(df["element_type"], errors="coerce").fillna(2.0)
+    df["pos"] = df["element_type"].astype(float)
     feat_cols.append("pos")
 
+    # Rolling form from the per-gameweek warehouse (0 before any is ingested);
+    # training runs off the request path, so it waits for missing gameweeks.
+    try:
+        warehouse = get_warehouse(ingest_first=True)
+    except Exception:
+        logger.warning("No gameweek history for rolling features", exc_info=True)
+        warehouse = Warehouse({})
+    ids = df["id"].astype(int).tolist()
+    for name, window in _ROLLING_FEATURES:
+        col = f"{name}_last{window}"
+        df[col] = warehouse.rolling_mean(name, ids, window)
+        feat_cols.append(col)
+
     X = df[feat_cols].values.astype(float)
     y = df["points_per_game"].values.astype(float)
+    return df["id"].values, X, y
 
-    models = [
-        # 1. Ridge — regularised linear model (fast, interpretable baseline)
-        Pipeline([
-            ("scaler", StandardScaler()),
-            ("ridge", Ridge(alpha=1.0)),
-        ]),
-        # 2. Random Forest — bagged trees, handles interactions & outliers
-        RandomForestRegressor(
-            n_estimators=150,
-            max_depth=6,
-            min_samples_leaf=5,
-            random_state=42,
-            n_jobs=-1,
-        ),
-        # 3. Gradient Boosting — sequential boosting for remaining residuals
-        GradientBoostingRegressor(
-            n_estimators=150,
-            max_depth=4,
-            learning_rate=0.05,
-            min_samples_leaf=5,
-            random_state=42,
-        ),
-        # 4. XGBoost — regularised gradient boosting with column subsampling
-        XGBRegressor(
-            n_estimators=150,
-            max_depth=4,
-            learning_rate=0.05,
-            subsample=0.8,
-            colsample_bytree=0.8,
-            reg_alpha=0.1,
-            reg_lambda=1.0,
-            random_state=42,
-            verbosity=0,
-            n_jobs=-1,
-        ),
-    ]
 
-    preds = []
-    for m in models:
+def _features_fingerprint(ids, X, y) -> str:
+    h = hashlib.blake2b(digest_size=12)
+    for arr in (ids, X, y):
+        arr = np.ascontiguousarray(arr)
+        h.update(str(arr.shape).encode())
+        h.update(arr.tobytes())
+    return h.hexdigest()
+
+
+def _fit_ensemble(X, y, members) -> tuple:
+    """
+    Fit ``members`` on (X, y).  Returns (fitted models by name, clamped
+    ensemble-average predictions for X, {name: {"fit_s", "predict_s"}}).
+    """
+    if not len(y):
+        return {}, np.empty(0), {}
+    factories = _build_models()
+    models, preds, profile = {}, [], {}
+    for name in members:
+        m = factories[name]
+        t0 = time.perf_counter()
         m.fit(X, y)
+        t1 = time.perf_counter()
         preds.append(m.predict(X))
+        t2 = time.perf_counter()
+        models[name] = m
+        profile[name] = {"fit_s": round(t1 - t0, 4), "predict_s": round(t2 - t1, 4)}
+        metrics.TRAINING_SECONDS.observe(name, value=t2 - t0)
 
     # Ensemble average, clamped to non-negative
     avg = np.clip(np.mean(preds, axis=0), 0.0, None)
+    return models, avg, profile
+
+
+def model_report(df=None, holdout: float = 0.2, seed: int = 42) -> list:
+    """
+    Per-member cost / accuracy report on a random hold-out split.
+
+    For each member: fit and predict seconds, its own hold-out MAE, and its
+    marginal contribution — how much the ensemble MAE worsens without it
+    (positive = the member helps).  The last row is the full ensemble.
+    """
+    ids, X, y = _prepare_features(get_player_table() if df is None else df)
+    if len(y) < 10:
+        return []
+    rng = np.random.default_rng(seed)
+    test = rng.random(len(y)) < holdout
+    factories = _build_models()
+    preds, rows = {}, []
+    for name in MODEL_NAMES:
+        m = factories[name]
+        t0 = time.perf_counter()
+        m.fit(X[~test], y[~test])
+        t1 = time.perf_counter()
+        preds[name] = m.predict(X[test])
+        t2 = time.perf_counter()
+        rows.append({
+            "model": name,
+            "fit_s": round(t1 - t0, 4),
+            "predict_s": round(t2 - t1, 4),
+            "mae": round(float(np.mean(np.abs(preds[name] - y[test]))), 4),
+        })
+
+    def _mae(names):
+        avg = np.clip(np.mean([preds[n] for n in names], axis=0), 0.0, None)
+        return float(np.mean(np.abs(avg - y[test])))
 
-    player_ids = df["id"].astype(int).values
-    return {int(pid): round(float(score), 2) for pid, score in zip(player_ids, avg)}
+    full = _mae(MODEL_NAMES)
+    for row in rows:
+        others = [n for n in MODEL_NAMES if n != row["model"]]
+        row["marginal_mae"] = round(_mae(others) - full, 4)
+    rows.append({
+        "model": "ensemble",
+        "fit_s": round(sum(r["fit_s"] for r in rows), 4),
+        "predict_s": round(sum(r["predict_s"] for r in rows), 4),
+        "mae": round(full, 4),
+        "marginal_mae": None,
+    })
+    return rows
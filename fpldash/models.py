@@ -0,0 +1,40 @@
+from django.db import models
+
+
+class Snapshot(models.Model):
+    """One bootstrap-static payload, recorded once per content version."""
+
+    version = models.CharField(max_length=64, unique=True)
+    taken_at = models.DateTimeField(db_index=True)
+    gameweek = models.PositiveSmallIntegerField(default=0)
+    # Player rows written for this snapshot (players whose values changed).
+    changed = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        ordering = ["taken_at"]
+
+    def __str__(self):
+        return f"{self.taken_at:%Y-%m-%d %H:%M} ({self.changed} changed)"
+
+
+class PlayerSnapshot(models.Model):
+    """
+    A player's market values from the first snapshot they took effect in.
+
+    Rows are only written when a value changed, so a player's series is
+    read as "this state held from ``ts`` until the next row".  Decimals
+    are stored as integer tenths, as FPL does for prices, and the time as
+    Unix seconds, which keeps rows and the index small.
+    """
+
+    snapshot = models.ForeignKey(Snapshot, on_delete=models.CASCADE, related_name="players")
+    player_id = models.PositiveIntegerField()
+    ts = models.PositiveIntegerField()  # snapshot.taken_at, Unix seconds
+    now_cost = models.PositiveSmallIntegerField()
+    selected_by = models.PositiveSmallIntegerField()  # selected_by_percent × 10
+    transfers_in_event = models.PositiveIntegerField()
+    transfers_out_event = models.PositiveIntegerField()
+    form = models.PositiveSmallIntegerField()  # form × 10
+
+    class Meta:
+        indexes = [models.Index(fields=["player_id", "ts"], name="playersnap_player_time")]
@@ -0,0 +1,230 @@
+"""
+Offline stand-in for the FPL API.
+
+With ``settings.FPL_OFFLINE`` enabled, the pooled ``requests`` session
+(client.py) and the async fetch engine (fetcher.py) are wired to
+``OfflineFPL`` instead of fantasy.premierleague.com, so every endpoint
+can be exercised — and measured — on a machine with no network.
+
+Payloads are replayed from ``settings.FPL_OFFLINE_DIR`` when a recording
+exists there (see ``manage.py record_fpl``: ``<api path>.json``, e.g.
+``element-summary/42.json``); anything not recorded falls back to the
+deterministic full-size season in sample_data.py.
+
+Upstream behaviour can be degraded on purpose:
+
+* ``FPL_OFFLINE_LATENCY``    — mean seconds per response (±50 % jitter);
+* ``FPL_OFFLINE_ERROR_RATE`` — fraction of requests answered with 503;
+* ``FPL_OFFLINE_429_RATE``   — fraction answered with 429 + Retry-After.
+
+Bodies carry an ETag and honour If-None-Match, so the cache's
+revalidation path behaves as it does against the live API.  Faults are
+drawn from a seeded RNG, so a run is reproducible for a given request
+order.
+"""
+
+import asyncio
+import json
+import os
+import random
+import re
+import threading
+import time
+
+import httpx
+import requests
+from django.conf import settings
+from requests.adapters import BaseAdapter
+from requests.structures import CaseInsensitiveDict
+
+from . import sample_data
+from .client import FPL_API, content_version
+
+_SUMMARY_RE = re.compile(r"^element-summary/(\d+)$")
+_PICKS_RE = re.compile(r"^entry/(\d+)/event/(\d+)/picks$")
+_LIVE_RE = re.compile(r"^event/(\d+)/live$")
+
+
+class OfflineFPL:
+    """Routes FPL API paths to recorded or synthetic payloads."""
+
+    def __init__(
+        self,
+        directory: str = "",
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        retry_after: float = 1.0,
+        current_gw: int = 30,
+        seed: int = 0,
+    ):
+        self.directory = directory
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.current_gw = current_gw
+        self._rng = random.Random(seed)
+        self._lock = threading.Lock()
+        self._bodies: dict = {}  # path -> bytes
+        self._bootstrap = None
+        self._fixtures = None
+        self._histories = None
+        self.requests = 0
+
+    # ── payloads ──────────────────────────────────────────────────────
+
+    def _recorded(self, path: str):
+        if not self.directory:
+            return None
+        filename = os.path.join(self.directory, *path.split("/")) + ".json"
+        try:
+            with open(filename, "rb") as fh:
+                return fh.read()
+        except FileNotFoundError:
+            return None
+
+    def bootstrap(self) -> dict:
+        if self._bootstrap is None:
+            recorded = self._recorded("bootstrap-static")
+            self._bootstrap = (
+                json.loads(recorded) if recorded
+                else sample_data.make_bootstrap(self.current_gw)
+            )
+        return self._bootstrap
+
+    def fixtures(self) -> list:
+        if self._fixtures is None:
+            recorded = self._recorded("fixtures")
+            self._fixtures = (
+                json.loads(recorded) if recorded
+                else sample_data.make_fixtures(self.bootstrap()["teams"], self.current_gw)
+            )
+        return self._fixtures
+
+    def histories(self, gw: int) -> dict:
+        """Every element's synthetic history up to ``gw`` (built once)."""
+        if self._histories is None:
+            self._histories = {
+                e["id"]: sample_data.make_element_summary(e, self.fixtures(), gw)["history"]
+                for e in self.bootstrap()["elements"]
+            }
+        return self._histories
+
+    def _synthetic(self, path: str):
+        if path == "bootstrap-static":
+            return self.bootstrap()
+        if path == "fixtures":
+            return self.fixtures()
+        gw = next(
+            (e["id"] for e in self.bootstrap()["events"] if e.get("is_current")),
+            self.current_gw,
+        )
+        match = _SUMMARY_RE.match(path)
+        if match:
+            element = next(
+                (e for e in self.bootstrap()["elements"] if e["id"] == int(match[1])), None
+            )
+            if element is not None:
+                return sample_data.make_element_summary(element, self.fixtures(), gw)
+        match = _LIVE_RE.match(path)
+        if match and 1 <= int(match[1]) <= gw:
+            return sample_data.make_event_live(self.histories(gw), int(match[1]))
+        match = _PICKS_RE.match(path)
+        if match and 1 <= int(match[2]) <= gw:
+            return sample_data.make_picks(self.bootstrap(), int(match[1]), int(match[2]))
+        return None
+
+    def body(self, path: str):
+        """Response body for an API path (no leading / trailing slash), or None."""
+        with self._lock:
+            if path not in self._bodies:
+                body = self._recorded(path)
+                if body is None:
+                    data = self._synthetic(path)
+                    body = None if data is None else json.dumps(data).encode()
+                self._bodies[path] = body
+            return self._bodies[path]
+
+    # ── request handling ──────────────────────────────────────────────
+
+    def respond(self, url: str, headers) -> tuple:
+        """Return ``(status, headers, body, delay_seconds)`` for a GET of ``url``."""
+        with self._lock:
+            self.requests += 1
+            draw = self._rng.random()
+            delay = self.latency * self._rng.uniform(0.5, 1.5) if self.latency else 0.0
+        if draw < self.rate_limit_rate:
+            return 429, {"Retry-After": f"{self.retry_after:g}"}, b"", delay
+        if draw < self.rate_limit_rate + self.error_rate:
+            return 503, {}, b"", delay
+
+        if not url.startswith(FPL_API):
+            return 404, {}, b"", delay
+        body = self.body(url[len(FPL_API):].split("?")[0].strip("/"))
+        if body is None:
+            return 404, {"Content-Type": "application/json"}, b'{"detail":"Not found."}', delay
+        etag = f'"{content_version(body)}"'
+        if headers.get("If-None-Match") == etag:
+            return 304, {"ETag": etag}, b"", delay
+        return 200, {"Content-Type": "application/json", "ETag": etag}, body, delay
+
+
+class OfflineAdapter(BaseAdapter):
+    """``requests`` transport adapter backed by an ``OfflineFPL``."""
+
+    def __init__(self, stand_in: OfflineFPL):
+        super().__init__()
+        self.stand_in = stand_in
+
+    def send(self, request, stream=False, timeout=None, verify=True, cert=None, proxies=None):
+        status, headers, body, delay = self.stand_in.respond(request.url, request.headers)
+        if delay:
+            time.sleep(delay)
+        response = requests.Response()
+        response.status_code = status
+        response.headers = CaseInsensitiveDict(headers)
+        response._content = body
+        response.url = request.url
+        response.request = request
+        response.encoding = "utf-8"
+        return response
+
+    def close(self):
+        pass
+
+
+class OfflineTransport(httpx.AsyncBaseTransport):
+    """``httpx`` async transport backed by an ``OfflineFPL``."""
+
+    def __init__(self, stand_in: OfflineFPL):
+        self.stand_in = stand_in
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        status, headers, body, delay = self.stand_in.respond(str(request.url), request.headers)
+        if delay:
+            await asyncio.sleep(delay)
+        return httpx.Response(status, headers=headers, content=body, request=request)
+
+
+_stand_in = None
+_stand_in_lock = threading.Lock()
+
+
+def is_enabled() -> bool:
+    return bool(getattr(settings, "FPL_OFFLINE", False))
+
+
+def get_stand_in() -> OfflineFPL:
+    """Return the process-wide stand-in configured from settings."""
+    global _stand_in
+    if _stand_in is None:
+        with _stand_in_lock:
+            if _stand_in is None:
+                _stand_in = OfflineFPL(
+                    directory=getattr(settings, "FPL_OFFLINE_DIR", ""),
+                    latency=float(getattr(settings, "FPL_OFFLINE_LATENCY", 0) or 0),
+                    error_rate=float(getattr(settings, "FPL_OFFLINE_ERROR_RATE", 0) or 0),
+                    rate_limit_rate=float(getattr(settings, "FPL_OFFLINE_429_RATE", 0) or 0),
+                )
+    return _stand_in
@@ -0,0 +1,58 @@
+"""
+Canonical per-player table derived from bootstrap-static.
+
+``get_player_table()`` builds the typed frame (team names, positions,
+prices) once per bootstrap payload, keyed by the content hash the cache
+stores with it, and hands out the same frame until the payload changes.
+The numeric coercions happen when the payload is parsed (bootstrap.py).
+
+The returned frame is shared between requests and threads — treat it as
+read-only and ``.copy()`` any slice you intend to modify.
+"""
+
+import threading
+
+import pandas as pd
+
+from .cache import get_bootstrap_versioned
+
+POSITIONS = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+
+_lock = threading.Lock()
+_table: dict = {"version": None, "df": None}
+
+
+def build_player_table(data) -> pd.DataFrame:
+    """
+    Build the typed player table from a parsed bootstrap payload.
+
+    Every element field the ``Bootstrap`` keeps becomes a column, and the
+    derived columns ``Team``, ``Position`` and ``price`` (GBP m) are
+    added.  The numeric columns keep the ``Bootstrap`` dtypes and wrap its
+    arrays without copying, so with the file cache backend they stay
+    memory-mapped from the shared entry; the string columns and the
+    derived ones are per process.
+    """
+    df = pd.DataFrame(data.elements, copy=False)
+    df["Team"] = df["team"].map(data.team_names())
+    df["Position"] = df["element_type"].map(POSITIONS)
+    df["price"] = df["now_cost"] / 10.0
+    return df
+
+
+def get_player_table() -> pd.DataFrame:
+    """Return the shared player table for the current bootstrap payload."""
+    return get_player_table_versioned()[0]
+
+
+def get_player_table_versioned():
+    """Return (player table, bootstrap content version it was built from)."""
+    data, version = get_bootstrap_versioned()
+    with _lock:
+        if _table["version"] == version:
+            return _table["df"], version
+    df = build_player_table(data)
+    with _lock:
+        _table["version"] = version
+        _table["df"] = df
+    return df, version
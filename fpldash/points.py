@@ -0,0 +1,62 @@
+"""
+Dense player × gameweek points block for the forecast.
+
+Checked gameweeks come from the per-gameweek warehouse (history.py) as
+an int16 block, with ``MISSING`` where a player's club had no fixture.
+Started gameweeks that are not checked yet, normally just the current
+one, are filled from that gameweek's cached ``event/{gw}/live`` payload,
+which covers every player.  A forecast of any ``limit`` therefore makes
+no per-player request.
+
+Points of a double gameweek are the gameweek total.
+"""
+
+import numpy as np
+from asgiref.sync import sync_to_async
+
+from . import history
+from .cache import get_bootstrap
+
+MISSING = np.iinfo(np.int16).min
+
+
+def _fill_live(block: np.ndarray, player_ids: list, gw: int, bootstrap) -> None:
+    columns = history.live_frame(gw, bootstrap)
+    index = {int(pid): i for i, pid in enumerate(columns["id"])}
+    for row, pid in enumerate(player_ids):
+        i = index.get(pid)
+        if i is not None and columns["fixtures"][i] > 0:
+            block[row, gw - 1] = columns["total_points"][i]
+
+
+def get_points(player_ids, n_gws: int) -> tuple:
+    """
+    Return ``(points, errors)`` for ``player_ids`` over gameweeks 1..n_gws.
+
+    ``points`` is an int16 array of shape (len(player_ids), n_gws) holding
+    ``MISSING`` where a player has no points for a round, or the round
+    is checked but not ingested yet (history.py fetches it in the
+    background).  ``errors`` maps every player to the error of a live
+    gameweek that could not be loaded (its column stays ``MISSING``).
+    """
+    player_ids = [int(pid) for pid in player_ids]
+    warehouse = history.get_warehouse()
+    block = warehouse.block("total_points", player_ids, n_gws, MISSING)
+    errors = {}
+    bootstrap = get_bootstrap()
+    checked = set(history.checked_gameweeks(bootstrap))
+    pending = [
+        gw for gw in history.started_gameweeks(bootstrap)
+        if gw <= n_gws and gw not in warehouse.gws and gw not in checked
+    ]
+    for gw in pending:
+        try:
+            _fill_live(block, player_ids, gw, bootstrap)
+        except Exception as ex:
+            errors = dict.fromkeys(player_ids, ex)
+    return block, errors
+
+
+async def aget_points(player_ids, n_gws: int) -> tuple:
+    """``get_points`` for async views."""
+    return await sync_to_async(get_points, thread_sensitive=False)(player_ids, n_gws)
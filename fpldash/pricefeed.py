@@ -0,0 +1,305 @@
+"""
+Price-change tweets, raced across every source.
+
+The sources are the Twitter API, the nitter mirrors and the syndication
+widget.  All of them are started at once on the shared async client;
+the first non-empty answer wins and the rest are cancelled.  The whole
+race is bounded by ``DEADLINE`` whatever the sources do.
+
+Each source has a circuit breaker: after ``FAILURE_THRESHOLD`` failures
+in a row it is skipped for ``COOLDOWN`` seconds, then a single trial call
+decides whether it is back.  Answers are cached per (user, days) for
+``_TTL`` seconds, and "nothing found" for ``_EMPTY_TTL``.
+"""
+
+import asyncio
+import logging
+import os
+import re
+import threading
+import time
+import xml.etree.ElementTree as ET
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+from . import metrics
+from .fetcher import get_engine
+
+logger = logging.getLogger(__name__)
+
+NITTER_MIRRORS = (
+    "https://nitter.net",
+    "https://nitter.poast.org",
+    "https://nitter.fdn.fr",
+    "https://nitter.privacydev.net",
+    "https://nitter.moomoo.me",
+)
+SOURCE_TIMEOUT = 8.0  # per source
+DEADLINE = 10.0  # for the whole race
+FAILURE_THRESHOLD = 2
+COOLDOWN = 300.0
+
+_TTL = 300
+_EMPTY_TTL = 60
+_MAX_ENTRIES = 64
+
+_lock = threading.Lock()
+_answers: OrderedDict = OrderedDict()  # (user, days) -> {"tweets", "expires"}
+_breakers: dict = {}  # source name -> CircuitBreaker
+
+
+class CircuitBreaker:
+    """
+    Closed until ``threshold`` consecutive failures, then open for
+    ``cooldown`` seconds; after that one trial call is let through and
+    its outcome closes or re-opens the breaker.
+    """
+
+    def __init__(self, threshold: int = FAILURE_THRESHOLD, cooldown: float = COOLDOWN):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial = False
+        self._lock = threading.Lock()
+
+    def allow(self, now: float) -> bool:
+        with self._lock:
+            if self.failures < self.threshold:
+                return True
+            if now >= self.open_until and not self.trial:
+                self.trial = True
+                return True
+            return False
+
+    def record(self, ok: bool, now: float) -> None:
+        with self._lock:
+            self.trial = False
+            if ok:
+                self.failures = 0
+                return
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.open_until = now + self.cooldown
+
+    def release(self) -> None:
+        """The call was abandoned (lost the race): no verdict either way."""
+        with self._lock:
+            self.trial = False
+
+
+def _breaker(name: str) -> CircuitBreaker:
+    with _lock:
+        breaker = _breakers.get(name)
+        if breaker is None:
+            breaker = _breakers[name] = CircuitBreaker()
+        return breaker
+
+
+# ── sources ───────────────────────────────────────────────────────────
+# Each returns a list of {"created_at", "text", "url"} (possibly empty)
+# when the source answered, or None when it failed.
+
+async def _twitter_api(username: str, days: int):
+    token = os.getenv("TWITTER_BEARER_TOKEN")
+    headers = {"Authorization": f"Bearer {token}"}
+    http = get_engine()
+    uresp = await http.aget(
+        f"https://api.twitter.com/2/users/by/username/{username}",
+        headers=headers,
+        timeout=SOURCE_TIMEOUT,
+    )
+    if uresp.status_code != 200:
+        return None
+    uid = uresp.json().get("data", {}).get("id")
+    if not uid:
+        return None
+    start_time = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
+    tresp = await http.aget(
+        f"https://api.twitter.com/2/users/{uid}/tweets",
+        params={
+            "max_results": 100,
+            "exclude": "replies,retweets",
+            "tweet.fields": "created_at,text",
+            "start_time": start_time,
+        },
+        headers=headers,
+        timeout=SOURCE_TIMEOUT,
+    )
+    if tresp.status_code != 200:
+        return None
+    out = []
+    for t in tresp.json().get("data", []) or []:
+        out.append({
+            "created_at": t.get("created_at"),
+            "text": t.get("text"),
+            "url": f"https://x.com/{username}/status/{t.get('id')}",
+        })
+    return out
+
+
+_essy_profile_re = re.compile(
+    r"<time[^>]+datetime=\"([^\"]+)\"[\s\S]*?</time>"
+    r"[\s\S]*?<p class=\"timeline-Tweet-text\"[^>]*>([\s\S]*?)</p>"
+)
+
+
+def _strip_html(s: str) -> str:
+    return (
+        re.sub(r"<[^>]+>", " ", s or "")
+        .replace("&amp;", "&")
+        .replace("&lt;", "<")
+        .replace("&gt;", ">")
+        .strip()
+    )
+
+
+async def _syndication(username: str, days: int):
+    resp = await get_engine().aget(
+        f"https://cdn.syndication.twimg.com/widgets/timelines/profile?screen_name={username}",
+        timeout=SOURCE_TIMEOUT,
+    )
+    if resp.status_code != 200:
+        return None
+    j = resp.json()
+    body = j.get("body") or j.get("body_html") or ""
+    items = _essy_profile_re.findall(body)
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    out = []
+    for dt_str, html in items:
+        try:
+            ts = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
+        except Exception:
+            continue
+        if ts.replace(tzinfo=None) < cutoff:
+            continue
+        out.append({
+            "created_at": ts.isoformat(),
+            "text": _strip_html(html),
+            "url": None,
+        })
+    return out
+
+
+async def _nitter(base: str, username: str, days: int):
+    r = await get_engine().aget(
+        f"{base}/{username}/rss", timeout=SOURCE_TIMEOUT, headers={"User-Agent": "Mozilla/5.0"}
+    )
+    if r.status_code != 200 or not r.text:
+        return None
+    channel = ET.fromstring(r.text).find("channel")
+    if channel is None:
+        return None
+    cutoff = datetime.utcnow() - timedelta(days=days)
+    out = []
+    for it in channel.findall("item"):
+        title = (it.findtext("title") or "").strip()
+        link = (it.findtext("link") or "").strip()
+        pub = it.findtext("pubDate") or ""
+        try:
+            ts = datetime.strptime(pub, "%a, %d %b %Y %H:%M:%S %Z")
+        except Exception:
+            ts = None
+        if ts is None or ts < cutoff:
+            continue
+        out.append({
+            "created_at": ts.isoformat(),
+            "text": title,
+            "url": link,
+        })
+    return out
+
+
+def _sources() -> list:
+    """(name, source) pairs to race; the API only when a token is set."""
+    sources = []
+    if os.getenv("TWITTER_BEARER_TOKEN"):
+        sources.append(("twitter-api", _twitter_api))
+    for base in NITTER_MIRRORS:
+        name = "nitter:" + base.split("//", 1)[1]
+        sources.append((name, lambda u, d, base=base: _nitter(base, u, d)))
+    sources.append(("syndication", _syndication))
+    return sources
+
+
+# ── race ──────────────────────────────────────────────────────────────
+
+async def _attempt(source, username: str, days: int):
+    try:
+        return await asyncio.wait_for(source(username, days), SOURCE_TIMEOUT)
+    except asyncio.CancelledError:
+        raise
+    except Exception as exc:
+        logger.debug("price feed source failed: %r", exc)
+        return None
+
+
+async def race(sources, username: str, days: int, deadline: float = DEADLINE):
+    """
+    Run every allowed source concurrently; return the first non-empty
+    answer, else ``[]`` if some source answered, else None.
+    """
+    now = time.monotonic()
+    tasks = {}
+    for name, source in sources:
+        if _breaker(name).allow(now):
+            tasks[asyncio.ensure_future(_attempt(source, username, days))] = name
+        else:
+            metrics.PRICEFEED_RESULTS.inc(name, "skipped")
+
+    answered = False
+    pending = set(tasks)
+    loop = asyncio.get_running_loop()
+    stop = loop.time() + deadline
+    try:
+        while pending:
+            remaining = stop - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(
+                pending, timeout=remaining, return_when=asyncio.FIRST_COMPLETED
+            )
+            winner = None
+            # Settle every finished source (a half-open trial among them
+            # must get its verdict) before returning the winner.
+            for task in done:
+                name, tweets = tasks[task], task.result()
+                _breaker(name).record(tweets is not None, time.monotonic())
+                outcome = "error" if tweets is None else ("ok" if tweets else "empty")
+                metrics.PRICEFEED_RESULTS.inc(name, outcome)
+                if tweets and winner is None:
+                    winner = tweets
+                answered = answered or tweets is not None
+            if winner:
+                return winner
+    finally:
+        for task in pending:
+            task.cancel()
+            _breaker(tasks[task]).release()
+    return [] if answered else None
+
+
+async def get_tweets(username: str, days: int = 7) -> list:
+    """Recent tweets of ``username`` from whichever source answers first."""
+    key = (username.lower(), days)
+    now = time.monotonic()
+    with _lock:
+        entry = _answers.get(key)
+        if entry and now < entry["expires"]:
+            _answers.move_to_end(key)
+            return entry["tweets"]
+
+    with metrics.phase("pricefeed"):
+        tweets = await race(_sources(), username, days, deadline=DEADLINE)
+    if tweets is None:
+        logger.warning("price feed: every source failed for @%s", username)
+    tweets = tweets or []
+    with _lock:
+        _answers[key] = {
+            "tweets": tweets,
+            "expires": time.monotonic() + (_TTL if tweets else _EMPTY_TTL),
+        }
+        _answers.move_to_end(key)
+        while len(_answers) > _MAX_ENTRIES:
+            _answers.popitem(last=False)
+    return tweets
@@ -0,0 +1,167 @@
+"""
+Versioned, precompressed JSON responses.
+
+The JSON endpoints only change when the data behind them changes (a new
+bootstrap / fixtures payload or a retrained model).
+``cached_json_response`` serialises a payload once per (endpoint, data
+version), derives a strong ETag from the bytes, and keeps gzip / brotli
+variants alongside the identity body so they are compressed at most
+once.
+
+Clients (and any proxy in front of the app) revalidate with
+If-None-Match and get an empty 304 while the version is unchanged.
+"""
+
+import gzip
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+
+from asgiref.sync import sync_to_async
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import HttpResponse, HttpResponseNotModified
+from django.utils.http import parse_etags
+
+from . import metrics
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - brotli is optional
+    brotli = None
+
+_lock = threading.Lock()
+_bodies: OrderedDict = OrderedDict()  # (name, version) -> _CachedBody
+_MAX_BODIES = 64
+
+
+class _CachedBody:
+    __slots__ = ("digest", "identity", "encoded", "ts")
+
+    def __init__(self, identity: bytes):
+        self.identity = identity
+        self.digest = hashlib.blake2b(identity, digest_size=12).hexdigest()
+        self.encoded: dict = {}
+        self.ts = time.time()
+
+    def etag(self, encoding: str = "") -> str:
+        # Strong ETags identify a representation, so each encoding gets its own.
+        return f'"{self.digest}-{encoding}"' if encoding else f'"{self.digest}"'
+
+    def variant(self, encoding: str) -> bytes:
+        body = self.encoded.get(encoding)
+        if body is None:
+            with metrics.phase("compress"):
+                if encoding == "br":
+                    body = brotli.compress(self.identity, quality=5)
+                else:
+                    body = gzip.compress(self.identity, compresslevel=6)
+            # Benign race: two threads may compress the same body once each.
+            self.encoded[encoding] = body
+        return body
+
+
+def _negotiate(request) -> str:
+    offered = set()
+    for part in request.headers.get("Accept-Encoding", "").split(","):
+        coding, _, params = part.partition(";")
+        q = 1.0
+        for param in params.split(";"):
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            offered.add(coding.strip().lower())
+    if brotli is not None and "br" in offered:
+        return "br"
+    if "gzip" in offered:
+        return "gzip"
+    return ""
+
+
+def _lookup(key: tuple, max_age):
+    with _lock:
+        cached = _bodies.get(key)
+        if cached and (max_age is None or time.time() - cached.ts < max_age):
+            _bodies.move_to_end(key)
+            return cached
+    return None
+
+
+def _get_body(name: str, version: str, build, max_age) -> _CachedBody:
+    key = (name, version)
+    cached = _lookup(key, max_age)
+    if cached is not None:
+        return cached
+    with metrics.phase(f"build-{name}"):
+        payload = build()
+    with metrics.phase("encode"):
+        body = _CachedBody(json.dumps(payload, cls=DjangoJSONEncoder).encode())
+    with _lock:
+        _bodies[key] = body
+        _bodies.move_to_end(key)
+        while len(_bodies) > _MAX_BODIES:
+            _bodies.popitem(last=False)
+    return body
+
+
+def _respond(request, body: _CachedBody, encoding: str) -> HttpResponse:
+    headers = {
+        "ETag": body.etag(encoding),
+        "Vary": "Accept-Encoding",
+        "Cache-Control": "public, no-cache",
+    }
+    known = {body.etag(enc) for enc in ("", "gzip", "br")}
+    if known.intersection(parse_etags(request.headers.get("If-None-Match", ""))):
+        response = HttpResponseNotModified()
+        for header, value in headers.items():
+            response[header] = value
+        return response
+
+    content = body.variant(encoding) if encoding else body.identity
+    response = HttpResponse(content, content_type="application/json")
+    for header, value in headers.items():
+        response[header] = value
+    if encoding:
+        response["Content-Encoding"] = encoding
+    response["Content-Length"] = str(len(content))
+    return response
+
+
+def cached_json_response(request, name: str, version, build, max_age=None) -> HttpResponse:
+    """
+    Return ``build()`` as JSON, reusing the serialised body for ``version``.
+
+    ``version`` is any value that changes whenever the output would (it is
+    stringified into the cache key).  ``max_age`` additionally bounds how
+    long a body is reused, for outputs with inputs that are not versioned.
+    Exceptions from ``build`` propagate and nothing is cached.
+    """
+    body = _get_body(name, str(version), build, max_age)
+    return _respond(request, body, _negotiate(request))
+
+
+async def acached_json_response(request, name: str, version, build, max_age=None,
+                                prefetch=None) -> HttpResponse:
+    """
+    ``cached_json_response`` for async views.
+
+    A cached body is answered straight from the event loop.  On a miss,
+    ``prefetch`` (a coroutine function) is awaited first so upstream I/O
+    does not tie up a thread, then ``build`` — CPU work over data that is
+    now cached — runs in a worker thread, as does a first compression.
+    """
+    version = str(version)
+    body = _lookup((name, version), max_age)
+    if body is None:
+        if prefetch is not None:
+            await prefetch()
+        body = await sync_to_async(_get_body, thread_sensitive=False)(name, version, build, max_age)
+    encoding = _negotiate(request)
+    if encoding and encoding not in body.encoded:
+        await sync_to_async(body.variant, thread_sensitive=False)(encoding)
+    return _respond(request, body, encoding)
@@ -0,0 +1,323 @@
+"""
+Deterministic, full-size synthetic FPL payloads.
+
+Shapes follow the live API closely enough for every code path in the app
+(string-typed decimals, nullable ``chance_of_playing_next_round``, 38
+events, a 380-match double round-robin) and sizes match a real season:
+~700 elements across 20 clubs.  Used by the tests and the benchmarks so
+both can run without network access.
+"""
+
+import random
+from datetime import datetime, timedelta, timezone
+
+TEAM_NAMES = [
+    "Arsenal", "Aston Villa", "Bournemouth", "Brentford", "Brighton",
+    "Burnley", "Chelsea", "Crystal Palace", "Everton", "Fulham",
+    "Leeds", "Liverpool", "Man City", "Man Utd", "Newcastle",
+    "Nott'm Forest", "Sunderland", "Spurs", "West Ham", "Wolves",
+]
+
+# Squad make-up per club: GK, DEF, MID, FWD (35 × 20 = 700 players).
+_SQUAD_SHAPE = {1: 4, 2: 12, 3: 13, 4: 6}
+_BASE_COST = {1: 40, 2: 40, 3: 45, 4: 45}
+_COST_RANGE = {1: 20, 2: 35, 3: 100, 4: 100}
+_SEASON_START = datetime(2025, 8, 15, 18, 30, tzinfo=timezone.utc)
+
+
+def _dec(x: float, places: int = 1) -> str:
+    return f"{x:.{places}f}"
+
+
+def make_teams() -> list:
+    return [
+        {
+            "id": i,
+            "code": 100 + i,
+            "name": name,
+            "short_name": name[:3].upper(),
+            "strength": 2 + (i * 7) % 4,
+            "position": 0,
+            "played": 0,
+            "points": 0,
+        }
+        for i, name in enumerate(TEAM_NAMES, start=1)
+    ]
+
+
+def make_events(current_gw: int) -> list:
+    events = []
+    for gw in range(1, 39):
+        deadline = _SEASON_START + timedelta(days=7 * (gw - 1))
+        finished = gw < current_gw
+        events.append({
+            "id": gw,
+            "name": f"Gameweek {gw}",
+            "deadline_time": deadline.isoformat().replace("+00:00", "Z"),
+            "finished": finished,
+            "data_checked": finished,
+            "is_previous": gw == current_gw - 1,
+            "is_current": gw == current_gw,
+            "is_next": gw == current_gw + 1,
+            "average_entry_score": 50 if gw <= current_gw else 0,
+            "highest_score": 120 if gw <= current_gw else None,
+        })
+    return events
+
+
+def make_fixtures(teams: list, current_gw: int) -> list:
+    """Double round-robin (circle method), plus one blank / double pair."""
+    ids = [t["id"] for t in teams]
+    strength = {t["id"]: t["strength"] for t in teams}
+    n = len(ids)
+    rounds = []
+    rot = ids[:]
+    for _ in range(n - 1):
+        rounds.append([(rot[i], rot[n - 1 - i]) for i in range(n // 2)])
+        rot = [rot[0]] + [rot[-1]] + rot[1:-1]
+    rounds += [[(a, h) for h, a in rnd] for rnd in rounds]
+
+    fixtures = []
+    fid = 0
+    for gw, matches in enumerate(rounds, start=1):
+        for h, a in matches:
+            fid += 1
+            fixtures.append({
+                "id": fid,
+                "code": 2500000 + fid,
+                "event": gw,
+                "team_h": h,
+                "team_a": a,
+                "team_h_difficulty": min(5, max(2, strength[a] + 1)),
+                "team_a_difficulty": min(5, max(2, strength[h] + 1)),
+                "finished": gw < current_gw,
+                "kickoff_time": (
+                    _SEASON_START + timedelta(days=7 * (gw - 1), hours=21)
+                ).isoformat().replace("+00:00", "Z"),
+            })
+    # Postpone one GW34 match into GW35: a blank for both clubs in 34 and
+    # a double in 35.
+    for f in fixtures:
+        if f["event"] == 34:
+            f["event"] = 35
+            break
+    return fixtures
+
+
+def make_elements(teams: list, current_gw: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    played_gws = max(current_gw - 1, 0)
+    elements = []
+    pid = 0
+    for team in teams:
+        for element_type, count in _SQUAD_SHAPE.items():
+            for _ in range(count):
+                pid += 1
+                regular = rng.random() < 0.55
+                starts = rng.randint(played_gws // 2, played_gws) if regular else rng.randint(0, played_gws // 3)
+                minutes = starts * rng.randint(60, 90)
+                quality = rng.random()
+                ppg = (2.0 + 4.0 * quality) if minutes else 0.0
+                total = int(round(ppg * starts))
+                xg_rate = {1: 0.0, 2: 0.05, 3: 0.2, 4: 0.4}[element_type] * (0.5 + quality)
+                xa_rate = {1: 0.01, 2: 0.06, 3: 0.15, 4: 0.1}[element_type] * (0.5 + quality)
+                apps = minutes / 90.0
+                xg = xg_rate * apps
+                xa = xa_rate * apps
+                cost = _BASE_COST[element_type] + int(quality ** 2 * _COST_RANGE[element_type]) // 5 * 5
+                injured = rng.random() < 0.08
+                elements.append({
+                    "id": pid,
+                    "code": 200000 + pid,
+                    "photo": f"{200000 + pid}.jpg",
+                    "web_name": f"Player{pid}",
+                    "first_name": f"First{pid}",
+                    "second_name": f"Last{pid}",
+                    "team": team["id"],
+                    "team_code": team["code"],
+                    "element_type": element_type,
+                    "status": "i" if injured else "a",
+                    "news": "Knee injury - Unknown return date" if injured else "",
+                    "news_added": None,
+                    "chance_of_playing_next_round": 0 if injured else (None if rng.random() < 0.8 else 75),
+                    "chance_of_playing_this_round": 0 if injured else None,
+                    "now_cost": cost,
+                    "cost_change_event": rng.choice([0] * 12 + [1, -1]),
+                    "cost_change_event_fall": 0,
+                    "cost_change_start": rng.randint(-3, 5),
+                    "cost_change_start_fall": 0,
+                    "total_points": total,
+                    "event_points": rng.randint(0, 12) if regular else 0,
+                    "points_per_game": _dec(ppg),
+                    "form": _dec(max(0.0, ppg + rng.uniform(-2, 2)) if regular else 0.0),
+                    "ep_next": _dec(ppg * 0.9),
+                    "ep_this": _dec(ppg * 0.9),
+                    "selected_by_percent": _dec(rng.random() ** 3 * 60),
+                    "value_form": _dec(ppg / (cost / 10.0)),
+                    "value_season": _dec(total / (cost / 10.0)),
+                    "transfers_in": rng.randint(0, 4_000_000),
+                    "transfers_out": rng.randint(0, 4_000_000),
+                    "transfers_in_event": rng.randint(0, 200_000),
+                    "transfers_out_event": rng.randint(0, 200_000),
+                    "minutes": minutes,
+                    "starts": starts,
+                    "goals_scored": int(xg + rng.uniform(-1, 2)) if xg else 0,
+                    "assists": int(xa + rng.uniform(-1, 2)) if xa else 0,
+                    "clean_sheets": int(starts * 0.3) if element_type <= 2 else int(starts * 0.25),
+                    "goals_conceded": int(starts * 1.2),
+                    "own_goals": 0,
+                    "penalties_saved": 0,
+                    "penalties_missed": 0,
+                    "yellow_cards": rng.randint(0, 8) if starts else 0,
+                    "red_cards": 1 if rng.random() < 0.03 else 0,
+                    "saves": starts * 3 if element_type == 1 else 0,
+                    "bonus": int(total * 0.08),
+                    "bps": int(total * 3.5),
+                    "influence": _dec(total * 4.1 + rng.uniform(0, 20)),
+                    "creativity": _dec(xa * 60 + rng.uniform(0, 30)),
+                    "threat": _dec(xg * 90 + rng.uniform(0, 30)),
+                    "ict_index": _dec(total * 0.8),
+                    "expected_goals": _dec(xg, 2),
+                    "expected_assists": _dec(xa, 2),
+                    "expected_goal_involvements": _dec(xg + xa, 2),
+                    "expected_goals_conceded": _dec(starts * 1.3, 2),
+                    "in_dreamteam": False,
+                    "dreamteam_count": 0,
+                    "special": False,
+                    "squad_number": None,
+                })
+    return elements
+
+
+def make_bootstrap(current_gw: int = 30, seed: int = 0) -> dict:
+    teams = make_teams()
+    return {
+        "events": make_events(current_gw),
+        "teams": teams,
+        "elements": make_elements(teams, current_gw, seed),
+        "element_types": [
+            {"id": 1, "singular_name_short": "GKP", "squad_select": 2},
+            {"id": 2, "singular_name_short": "DEF", "squad_select": 5},
+            {"id": 3, "singular_name_short": "MID", "squad_select": 5},
+            {"id": 4, "singular_name_short": "FWD", "squad_select": 3},
+        ],
+        "total_players": 11_000_000,
+    }
+
+
+def make_element_summary(element: dict, fixtures: list, current_gw: int, seed: int = 0) -> dict:
+    """Per-round history for one element up to and including ``current_gw``."""
+    rng = random.Random(seed * 100_003 + element["id"])
+    ppg = float(element["points_per_game"])
+    history = []
+    for f in fixtures:
+        gw = f["event"]
+        if gw is None or gw > current_gw or element["team"] not in (f["team_h"], f["team_a"]):
+            continue
+        home = f["team_h"] == element["team"]
+        minutes = rng.choice([0, 90, 90, 90, 75, 60]) if ppg else 0
+        points = max(-1, int(round(rng.gauss(ppg, 2.0)))) if minutes else 0
+        history.append({
+            "element": element["id"],
+            "fixture": f["id"],
+            "opponent_team": f["team_a"] if home else f["team_h"],
+            "total_points": points,
+            "was_home": home,
+            "kickoff_time": f["kickoff_time"],
+            "round": gw,
+            "minutes": minutes,
+            "goals_scored": 1 if points >= 8 else 0,
+            "assists": 1 if 5 <= points < 8 else 0,
+            "clean_sheets": 1 if minutes >= 60 and rng.random() < 0.3 else 0,
+            "bonus": min(3, max(0, points - 6)),
+            "bps": points * 3,
+            "influence": _dec(points * 4.0),
+            "creativity": _dec(points * 2.5),
+            "threat": _dec(points * 3.0),
+            "ict_index": _dec(points * 0.9),
+            "expected_goals": _dec(points / 20.0, 2),
+            "expected_assists": _dec(points / 30.0, 2),
+            "value": element["now_cost"],
+            "transfers_balance": rng.randint(-50_000, 50_000),
+            "selected": rng.randint(10_000, 3_000_000),
+        })
+    history.sort(key=lambda h: (h["round"], h["kickoff_time"]))
+    return {"fixtures": [], "history": history, "history_past": []}
+
+
+_LIVE_INT_STATS = ("minutes", "goals_scored", "assists", "clean_sheets", "bonus", "bps",
+                   "total_points")
+_LIVE_DEC_STATS = ("influence", "creativity", "threat", "ict_index", "expected_goals",
+                   "expected_assists")
+
+
+def make_event_live(histories: dict, gw: int) -> dict:
+    """
+    ``event/{gw}/live`` from element-summary histories ({element id:
+    history rows}): per-element stats summed over the round's fixtures,
+    one ``explain`` entry per fixture.
+    """
+    elements = []
+    for element_id, history in histories.items():
+        rows = [h for h in history if h["round"] == gw]
+        stats = {k: sum(h[k] for h in rows) for k in _LIVE_INT_STATS}
+        for k in _LIVE_DEC_STATS:
+            stats[k] = _dec(sum(float(h[k]) for h in rows), 2 if k.startswith("expected") else 1)
+        stats["expected_goal_involvements"] = _dec(
+            float(stats["expected_goals"]) + float(stats["expected_assists"]), 2
+        )
+        stats["starts"] = sum(1 for h in rows if h["minutes"] >= 60)
+        elements.append({
+            "id": element_id,
+            "stats": stats,
+            "explain": [{"fixture": h["fixture"], "stats": []} for h in rows],
+        })
+    return {"elements": elements}
+
+
+def make_picks(bootstrap: dict, manager_id: int, gw: int) -> dict:
+    """A legal 15-man squad (2/5/5/3, max 3 per club) for ``manager_id``."""
+    rng = random.Random(manager_id * 31 + gw)
+    by_pos: dict = {1: [], 2: [], 3: [], 4: []}
+    for e in bootstrap["elements"]:
+        by_pos[e["element_type"]].append(e)
+    club_counts: dict = {}
+    chosen = []
+    for pos, need in ((1, 2), (2, 5), (3, 5), (4, 3)):
+        pool = by_pos[pos][:]
+        rng.shuffle(pool)
+        for e in pool:
+            if need == 0:
+                break
+            if club_counts.get(e["team"], 0) >= 3:
+                continue
+            club_counts[e["team"]] = club_counts.get(e["team"], 0) + 1
+            chosen.append(e)
+            need -= 1
+    # Starting XI in a 4-4-2 followed by the bench, FPL-style ordering.
+    order = (
+        [chosen[0]] + chosen[2:6] + chosen[7:11] + chosen[12:14]
+        + [chosen[1], chosen[6], chosen[11], chosen[14]]
+    )
+    return {
+        "active_chip": None,
+        "entry_history": {
+            "event": gw,
+            "points": 55,
+            "total_points": 1500,
+            "bank": rng.randint(0, 30),
+            "value": 1000,
+            "event_transfers": 0,
+            "event_transfers_cost": 0,
+        },
+        "picks": [
+            {
+                "element": e["id"],
+                "position": i,
+                "multiplier": 2 if i == 1 else (1 if i <= 11 else 0),
+                "is_captain": i == 1,
+                "is_vice_captain": i == 2,
+            }
+            for i, e in enumerate(order, start=1)
+        ],
+    }
@@ -0,0 +1,206 @@
+"""
+Price and ownership history, recorded from bootstrap-static refreshes.
+
+Every bootstrap payload this process fetches (``cache.on_refresh``) is
+recorded once per content version as a ``Snapshot``, on a background
+thread so the request that triggered the refresh does not wait for it.  For each player
+only values that changed since their previous row are written (price,
+ownership, transfers in / out this gameweek, form), so an unchanged
+payload costs one row and a quiet one a few hundred.  A full season of
+half-hourly refreshes stays in the low millions of rows.
+
+``trends`` reads a window per player off the (player_id, ts) index: one
+seek for the state at the start of the window plus a range scan, so
+queries stay in milliseconds however long the history grows.  Series are
+returned column-wise with Unix-second timestamps.
+
+Recording can be turned off with ``settings.FPL_SNAPSHOTS = False``.
+"""
+
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
+import numpy as np
+from django.conf import settings
+from django.db import DatabaseError, IntegrityError, connection, transaction
+from django.utils import timezone
+
+from .cache import current_gameweek
+from .models import PlayerSnapshot, Snapshot
+
+logger = logging.getLogger(__name__)
+
+FIELDS = ("now_cost", "selected_by", "transfers_in_event", "transfers_out_event", "form")
+MAX_PLAYERS = 50
+
+_lock = threading.Lock()
+_writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fpldash-snapshots")
+# Last values written per player, valid while no other process recorded
+# a snapshot after ``snapshot``; reloaded from the table otherwise.
+_latest = {"snapshot": None, "values": {}}
+
+
+def _tenths(column) -> list:
+    return np.maximum(0, np.round(column * 10)).astype(int).tolist()
+
+
+def _current(data) -> dict:
+    """{player id: values} from a parsed bootstrap payload."""
+    col = data.elements
+    return dict(zip(
+        col["id"].tolist(),
+        zip(
+            col["now_cost"].tolist(),
+            _tenths(col["selected_by_percent"]),
+            col["transfers_in_event"].tolist(),
+            col["transfers_out_event"].tolist(),
+            _tenths(col["form"]),
+        ),
+    ))
+
+
+def _previous_values(snapshot_id: int, player_ids) -> dict:
+    """Each player's last recorded values before ``snapshot_id``."""
+    with _lock:
+        if _latest["snapshot"] is not None:
+            last = (
+                Snapshot.objects.filter(pk__lt=snapshot_id)
+                .order_by("-pk").values_list("pk", flat=True).first()
+            )
+            if last == _latest["snapshot"]:
+                return dict(_latest["values"])
+    # First recording in this process, or another worker recorded since:
+    # one index seek per player (a GROUP BY would scan the whole table).
+    sql = (
+        f"SELECT {', '.join(FIELDS)} FROM {PlayerSnapshot._meta.db_table}"
+        " WHERE player_id = %s AND snapshot_id < %s ORDER BY ts DESC LIMIT 1"
+    )
+    values = {}
+    with connection.cursor() as cursor:
+        for pid in player_ids:
+            cursor.execute(sql, [pid, snapshot_id])
+            row = cursor.fetchone()
+            if row is not None:
+                values[pid] = tuple(row)
+    return values
+
+
+def record(data, version: str) -> int:
+    """
+    Record a parsed bootstrap payload; returns the number of player rows
+    written (0 when this version was already recorded).
+    """
+    if not getattr(settings, "FPL_SNAPSHOTS", True) or not version:
+        return 0
+    current = _current(data)
+    if not current:
+        return 0
+    taken_at = timezone.now()
+    ts = int(taken_at.timestamp())
+    try:
+        with transaction.atomic():
+            snapshot = Snapshot.objects.create(
+                version=version, taken_at=taken_at, gameweek=current_gameweek(data)
+            )
+            previous = _previous_values(snapshot.pk, current)
+            rows = [
+                PlayerSnapshot(
+                    snapshot=snapshot, player_id=pid, ts=ts,
+                    **dict(zip(FIELDS, values)),
+                )
+                for pid, values in current.items()
+                if previous.get(pid) != values
+            ]
+            PlayerSnapshot.objects.bulk_create(rows, batch_size=500)
+            snapshot.changed = len(rows)
+            snapshot.save(update_fields=["changed"])
+    except IntegrityError:
+        return 0  # this version is already recorded (e.g. by another worker)
+    except DatabaseError as ex:
+        logger.warning("Could not record bootstrap snapshot: %s", ex)
+        return 0
+    with _lock:
+        _latest["snapshot"] = snapshot.pk
+        _latest["values"] = {**previous, **current}
+    return len(rows)
+
+
+def on_bootstrap_refresh(data, version: str) -> None:
+    """
+    ``cache.on_refresh`` hook: queue the payload for recording, so the
+    thread that refreshed the bootstrap (possibly a request) does not
+    wait for the insert.  One writer thread (with its own database
+    connection) records them in order.
+    """
+
+    _writer.submit(record, data, version)
+
+
+def flush(timeout: float = None) -> None:
+    """Wait until every queued snapshot is recorded."""
+    _writer.submit(lambda: None).result(timeout)
+
+
+def _columns(rows: list) -> dict:
+    """(ts, *FIELDS) rows -> column lists, decimals back from tenths."""
+    t, cost, selected, t_in, t_out, form = (list(c) for c in zip(*rows)) if rows else ([],) * 6
+    return {
+        "t": t,
+        "price": [v / 10 for v in cost],
+        "selected_by_percent": [v / 10 for v in selected],
+        "transfers_in_event": t_in,
+        "transfers_out_event": t_out,
+        "form": [v / 10 for v in form],
+    }
+
+
+def trends(player_ids, since: datetime, until: datetime = None) -> dict:
+    """
+    Per-player series over ``(since, until]``, oldest first.
+
+    A player's first point is their state at ``since`` (stamped ``since``)
+    when they have history before the window; each later point is a
+    change.  ``change`` is last minus first point for price, ownership
+    and form.
+    """
+    until = until or timezone.now()
+    start, end = int(since.timestamp()), int(until.timestamp())
+    player_ids = list(dict.fromkeys(int(p) for p in player_ids))[:MAX_PLAYERS]
+    rows = {pid: [] for pid in player_ids}
+
+    table = PlayerSnapshot._meta.db_table
+    with connection.cursor() as cursor:
+        for pid in player_ids:
+            cursor.execute(
+                f"SELECT {', '.join(FIELDS)} FROM {table}"
+                " WHERE player_id = %s AND ts <= %s ORDER BY ts DESC LIMIT 1",
+                [pid, start],
+            )
+            before = cursor.fetchone()
+            if before is not None:
+                rows[pid].append((start, *before))
+            cursor.execute(
+                f"SELECT ts, {', '.join(FIELDS)} FROM {table}"
+                " WHERE player_id = %s AND ts > %s AND ts <= %s ORDER BY ts",
+                [pid, start, end],
+            )
+            rows[pid].extend(cursor.fetchall())
+
+    players = []
+    for pid in player_ids:
+        series = _columns(rows[pid])
+        change = {}
+        if series["t"]:
+            change = {
+                k: round(series[k][-1] - series[k][0], 1)
+                for k in ("price", "selected_by_percent", "form")
+            }
+        players.append({"id": pid, "series": series, "change": change})
+    return {
+        "since": since.isoformat(),
+        "until": until.isoformat(),
+        "snapshots": Snapshot.objects.filter(taken_at__gt=since, taken_at__lte=until).count(),
+        "players": players,
+    }
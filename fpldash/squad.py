@@ -0,0 +1,185 @@
+"""
+Points-maximising 15-man squad and starting XI.
+
+The squad is picked by a small integer programme solved with
+``scipy.optimize.milp`` (HiGHS).  Each player gets three binaries: in the
+squad (x), in the XI (y ≤ x) and captain (c ≤ y).  The objective is
+
+    Σ p·y + Σ p·c + bench_weight · Σ p·(x − y)
+
+where p is the ML predicted score, or (form + PPG) / 2 for players the
+models have not scored.  The constraints are the FPL rules:
+
+* the budget;
+* 2 GK / 5 DEF / 5 MID / 3 FWD;
+* at most 3 players per club;
+* an XI of 11 in a valid formation (1 GK, 3-5 DEF, 2-5 MID, 1-3 FWD).
+
+Before solving, dominated players are pruned.  Player j is dropped when
+other players of the same position that cost no more and score no less
+come from at least ``quota + 4`` distinct clubs.  At most ``quota − 1``
+of those players can already be in the squad, and at most 4 other clubs
+can be full (14 / 3), so at least one of them can always replace j
+without losing points or breaking a rule.  Removing j is therefore safe.
+This typically cuts the ~700-player pool to under 100 candidates.
+"""
+
+import numpy as np
+from scipy.optimize import Bounds, LinearConstraint, milp
+from scipy.sparse import csr_matrix, hstack, identity, vstack
+
+from . import metrics
+from .ml_predictions import get_ml_predicted_scores
+from .players import POSITIONS, get_player_table
+
+BUDGET = 1000  # £100.0m in FPL tenths
+SQUAD_QUOTA = {1: 2, 2: 5, 3: 5, 4: 3}
+XI_LIMITS = {1: (1, 1), 2: (3, 5), 3: (2, 5), 4: (1, 3)}
+MAX_PER_CLUB = 3
+UNAVAILABLE = frozenset({"i", "s", "u", "n"})
+
+
+class SquadError(Exception):
+    """No legal squad exists for the given inputs."""
+
+
+def candidate_pool(ml_scores: dict = None):
+    """Return (player table rows, expected points) for available players."""
+    df = get_player_table()
+    if ml_scores is None:
+        ml_scores = get_ml_predicted_scores()
+    keep = (df["now_cost"] > 0) & df["element_type"].isin(list(SQUAD_QUOTA))
+    if "status" in df.columns:
+        keep &= ~df["status"].isin(UNAVAILABLE)
+    if "chance_of_playing_next_round" in df.columns:
+        keep &= df["chance_of_playing_next_round"].fillna(100) > 0
+    df = df[keep]
+    fallback = ((df["form"] + df["points_per_game"]) / 2).round(2)
+    points = df["id"].map(ml_scores).fillna(fallback).to_numpy(dtype=float)
+    return df, points
+
+
+def prune_dominated(position, team, cost, points) -> np.ndarray:
+    """Boolean mask of players that can be dropped without losing optimality."""
+    drop = np.zeros(len(cost), dtype=bool)
+    club_ids, club = np.unique(team, return_inverse=True)
+    for pos, quota in SQUAD_QUOTA.items():
+        idx = np.flatnonzero(position == pos)
+        if len(idx) <= quota:
+            continue
+        c, p = cost[idx], points[idx]
+        # dominates[i, j]: i costs no more and scores no less than j; exact
+        # ties are broken by index so the relation stays a strict order.
+        le_cost = c[:, None] <= c[None, :]
+        ge_points = p[:, None] >= p[None, :]
+        tie = (c[:, None] == c[None, :]) & (p[:, None] == p[None, :])
+        order = np.arange(len(idx))
+        dominates = le_cost & ge_points & (~tie | (order[:, None] < order[None, :]))
+        clubs = np.zeros((len(idx), len(club_ids)), dtype=np.int32)
+        clubs[order, club[idx]] = 1
+        distinct = ((dominates.T.astype(np.int32) @ clubs) > 0).sum(axis=1)
+        drop[idx] = distinct >= quota + 4
+    return drop
+
+
+def solve(position, team, cost, points, budget: int = BUDGET, bench_weight: float = 0.1) -> dict:
+    """
+    Solve the squad ILP over the given candidate arrays.
+
+    Returns {"squad": indices, "xi": indices, "captain": index}; raises
+    ``SquadError`` when no legal squad fits the budget.
+    """
+    n = len(cost)
+    eye = identity(n, format="csr")
+    zeros = csr_matrix((1, n))
+    rows, lower, upper = [], [], []
+
+    def add(x_row, y_row, c_row, lo, hi):
+        rows.append(hstack([x_row, y_row, c_row]))
+        lower.append(lo)
+        upper.append(hi)
+
+    for pos, quota in SQUAD_QUOTA.items():
+        add(csr_matrix((position == pos).astype(float)), zeros, zeros, quota, quota)
+        lo, hi = XI_LIMITS[pos]
+        add(zeros, csr_matrix((position == pos).astype(float)), zeros, lo, hi)
+    add(csr_matrix(cost.astype(float)), zeros, zeros, -np.inf, budget)
+    for club in np.unique(team):
+        add(csr_matrix((team == club).astype(float)), zeros, zeros, -np.inf, MAX_PER_CLUB)
+    add(zeros, csr_matrix(np.ones(n)), zeros, 11, 11)
+    add(zeros, zeros, csr_matrix(np.ones(n)), 1, 1)
+
+    A = vstack(
+        rows
+        + [hstack([-eye, eye, csr_matrix((n, n))]), hstack([csr_matrix((n, n)), -eye, eye])]
+    )
+    lower = np.concatenate([lower, np.full(2 * n, -np.inf)])
+    upper = np.concatenate([upper, np.zeros(2 * n)])
+
+    objective = -np.concatenate([bench_weight * points, (1 - bench_weight) * points, points])
+    res = milp(
+        objective,
+        constraints=LinearConstraint(A, lower, upper),
+        integrality=np.ones(3 * n),
+        bounds=Bounds(0, 1),
+    )
+    if res.x is None:
+        raise SquadError(res.message)
+    x, y, c = (res.x[i * n:(i + 1) * n] > 0.5 for i in range(3))
+    return {
+        "squad": np.flatnonzero(x),
+        "xi": np.flatnonzero(y),
+        "captain": int(np.flatnonzero(c)[0]),
+    }
+
+
+def build_squad(budget: int = BUDGET, bench_weight: float = 0.1, ml_scores: dict = None) -> dict:
+    """
+    Best squad for ``budget`` (FPL tenths) from the current player table.
+
+    ``bench_weight`` is how much a bench player's expected points count
+    relative to a starter's (0 = only the XI matters).
+    """
+    df, points = candidate_pool(ml_scores)
+    position = df["element_type"].to_numpy()
+    team = df["team"].to_numpy()
+    cost = df["now_cost"].to_numpy()
+
+    with metrics.phase("squad-solve"):
+        keep = ~prune_dominated(position, team, cost, points)
+        kept = np.flatnonzero(keep)
+        picked = solve(position[kept], team[kept], cost[kept], points[kept], budget, bench_weight)
+
+    rows = df.iloc[kept]
+    xi = set(picked["xi"].tolist())
+    players = []
+    for i in picked["squad"]:
+        r = rows.iloc[i]
+        players.append({
+            "id": int(r["id"]),
+            "name": r["web_name"],
+            "team": r.get("Team", ""),
+            "position": POSITIONS[int(r["element_type"])],
+            "price": round(float(r["price"]), 1),
+            "predicted_score": round(float(points[kept[i]]), 2),
+            "starting": int(i) in xi,
+            "captain": int(i) == picked["captain"],
+        })
+    players.sort(key=lambda p: (not p["starting"], list(POSITIONS.values()).index(p["position"]),
+                                -p["predicted_score"]))
+
+    starters = [p for p in players if p["starting"]]
+    counts = [sum(p["position"] == pos for p in starters) for pos in ("DEF", "MID", "FWD")]
+    spent = int(cost[kept[picked["squad"]]].sum())
+    captain = next(p for p in starters if p["captain"])
+    xi_points = sum(p["predicted_score"] for p in starters) + captain["predicted_score"]
+    return {
+        "squad": players,
+        "formation": "-".join(str(c) for c in counts),
+        "xi_points": round(xi_points, 2),
+        "bench_points": round(sum(p["predicted_score"] for p in players if not p["starting"]), 2),
+        "cost": spent / 10.0,
+        "bank": (budget - spent) / 10.0,
+        "candidates": int(len(kept)),
+        "pool": int(len(df)),
+    }
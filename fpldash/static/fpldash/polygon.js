@@ -7,9 +7,21 @@ let draggingIndex = null;
 
 const HANDLE_RADIUS = 18;   // px — hit-test tolerance for each dot
 
+// Only the columns the polygon and its player cards use, one array per
+// column (no repeated keys), rebuilt into row objects here.
+const POLYGON_FIELDS = [
+  "Player", "PlayerPhoto", "Team", "Position", "Total Points", "Median", "Avg",
+  "xG Points", "Appearances", "Goals", "Assists", "Goals per App",
+  "Assists per App", "Discip Index", "Price (GBP m)", "FDR Next 3",
+];
+
 async function fetchFplData() {
-  const response = await fetch("/api/data");
-  allPlayers = await response.json();
+  const params = new URLSearchParams({ format: "columns", fields: POLYGON_FIELDS.join(",") });
+  const response = await fetch(`/api/data?${params}`);
+  const { total, fields, columns } = await response.json();
+  allPlayers = Array.from({ length: total }, (_, i) =>
+    Object.fromEntries(fields.map((f) => [f, columns[f][i]]))
+  );
   return allPlayers;
 }
 
@@ -0,0 +1,168 @@
+"""
+Vectorised value-pick ranking.
+
+Each player's value score is ``ml_pred × clamp(6 − fdr, 0.5) / price``,
+where the FDR is averaged over the next ``horizon`` gameweeks.  The
+scores are computed as numpy arrays once per (data version, horizon) and
+kept in a small LRU.  Each query then only masks those arrays and picks
+its top ``n`` per position with ``np.argpartition``, so it never sorts
+the whole pool.
+
+``rank()`` with the defaults (n=3, horizon=3, no filters) returns
+exactly what ``/api/suggestions`` has always returned.
+"""
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from .cache import compute_team_fdr, get_bootstrap
+from .ml_predictions import get_ml_predicted_scores
+from .players import POSITIONS, get_player_table
+
+POSITION_ORDER = ("GK", "DEF", "MID", "FWD")
+MAX_N = 100
+MAX_HORIZON = 10
+
+_lock = threading.Lock()
+_scored: OrderedDict = OrderedDict()  # (version, horizon) -> _Scored
+_MAX_SCORED = 16
+
+
+class _Scored:
+    """Score arrays and output records for every priced player, in table order."""
+
+    __slots__ = ("records", "score", "position", "team", "price", "team_names")
+
+    def __init__(self, horizon: int):
+        data = get_bootstrap()
+        df = get_player_table()
+        df = df[df["price"] > 0]
+
+        team_fdr = compute_team_fdr(data, n_gws=horizon)
+        ml_scores = get_ml_predicted_scores()
+
+        fdr = df["team"].map(team_fdr).fillna(3.0)
+        fallback = ((df["form"] + df["points_per_game"]) / 2).round(2)
+        ml_pred = df["id"].map(ml_scores).fillna(fallback)
+        # Clamp FDR bonus so ranking score stays positive
+        fdr_bonus = (6.0 - fdr).clip(lower=0.5)
+        score = (ml_pred * fdr_bonus / df["price"]).round(3)
+
+        frame = pd.DataFrame({
+            "name": df["web_name"],
+            "team": df["Team"].fillna(""),
+            "position": df["Position"].fillna(""),
+            "price": df["price"].round(1),
+            "form": df["form"].round(1),
+            "ppg": df["points_per_game"].round(1),
+            "predicted_score": ml_pred.round(2),
+            "total_points": df["total_points"],
+            f"fdr_next{horizon}": fdr,
+            "score": score,
+        })
+        self.records = frame.to_dict(orient="records")
+        self.score = score.to_numpy(dtype=float)
+        self.position = df["element_type"].to_numpy()
+        self.team = df["team"].to_numpy()
+        self.price = df["price"].to_numpy(dtype=float)
+        self.team_names = {
+            name.lower(): t.id
+            for t in data.teams
+            for name in (t.name, t.short_name)
+            if name
+        }
+
+
+def _get_scored(version: str, horizon: int) -> _Scored:
+    key = (version, horizon)
+    with _lock:
+        scored = _scored.get(key)
+        if scored is not None:
+            _scored.move_to_end(key)
+            return scored
+    scored = _Scored(horizon)
+    with _lock:
+        _scored[key] = scored
+        while len(_scored) > _MAX_SCORED:
+            _scored.popitem(last=False)
+    return scored
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """
+    Indices of the ``k`` highest ``scores``, best first.
+
+    Uses a partial sort; ties are broken by position in the array, exactly
+    as a stable descending sort would.
+    """
+    if k <= 0 or not len(scores):
+        return np.empty(0, dtype=np.intp)
+    if k < len(scores):
+        threshold = scores[np.argpartition(-scores, k - 1)[k - 1]]
+        above = np.flatnonzero(scores > threshold)
+        ties = np.flatnonzero(scores == threshold)[: k - len(above)]
+        idx = np.concatenate([above, ties])
+    else:
+        idx = np.arange(len(scores))
+    return idx[np.lexsort((idx, -scores[idx]))]
+
+
+def resolve_team(scored: _Scored, team) -> int:
+    """Team id from an id or a (short) name; None when unknown."""
+    if team is None or team == "":
+        return None
+    try:
+        return int(team)
+    except (TypeError, ValueError):
+        return scored.team_names.get(str(team).lower())
+
+
+def rank(
+    version: str,
+    n: int = 3,
+    position: str = None,
+    max_price: float = None,
+    team=None,
+    horizon: int = 3,
+) -> list:
+    """
+    Top ``n`` value picks per position, as records with a ``reason``.
+
+    ``position`` limits the result to one of GK / DEF / MID / FWD,
+    ``max_price`` is in £m, ``team`` is a team id or name, and ``horizon``
+    is the number of upcoming gameweeks the FDR is averaged over.
+    ``version`` identifies the bootstrap / fixtures / ML scores the
+    arrays are built from.
+    """
+    n = max(1, min(int(n), MAX_N))
+    horizon = max(1, min(int(horizon), MAX_HORIZON))
+    scored = _get_scored(version, horizon)
+
+    mask = np.ones(len(scored.score), dtype=bool)
+    if max_price is not None:
+        mask &= scored.price <= max_price + 1e-9
+    if team is not None and team != "":
+        team_id = resolve_team(scored, team)
+        mask &= scored.team == team_id
+
+    positions = [position.upper()] if position else POSITION_ORDER
+    codes = {name: code for code, name in POSITIONS.items()}
+    fdr_col = f"fdr_next{horizon}"
+    result = []
+    for pos in positions:
+        code = codes.get(pos)
+        if code is None:
+            continue
+        candidates = np.flatnonzero(mask & (scored.position == code))
+        chosen = candidates[top_k(scored.score[candidates], n)]
+        for i in chosen:
+            p = dict(scored.records[i])
+            p["reason"] = (
+                f"Form {p['form']} | PPG {p['ppg']} | "
+                f"FDR {p[fdr_col]} | £{p['price']}m"
+            )
+            result.append(p)
+    return result
@@ -1,10 +1,45 @@
+import json
 import time
 import threading
+import unittest
 from unittest.mock import patch, MagicMock
 
 from django.test import TestCase, Client, override_settings
 
 
+class _SnapshotWriter:
+    """
+    Test stand-in for the snapshot writer thread.  A thread other than the
+    test's cannot write the test database while its transaction is open,
+    so jobs submitted on the test thread run at once and jobs queued by
+    background refreshes run on the test thread at ``snapshots.flush()``.
+    """
+
+    def __init__(self):
+        self.jobs = []
+        self.lock = threading.Lock()
+
+    def submit(self, fn, *args):
+        from concurrent.futures import Future
+        future = Future()
+        with self.lock:
+            self.jobs.append((fn, args, future))
+        if threading.current_thread() is threading.main_thread():
+            with self.lock:
+                jobs, self.jobs = self.jobs, []
+            for fn, args, queued in jobs:
+                queued.set_result(fn(*args))
+        return future
+
+
+def setUpModule():
+    # Tests that want persisted ML scores load them from their own directory.
+    for patcher in (patch("fpldash.snapshots._writer", _SnapshotWriter()),
+                    patch("fpldash.ml_predictions._booted", True)):
+        patcher.start()
+        unittest.addModuleCleanup(patcher.stop)
+
+
 class SmokeTests(TestCase):
     def setUp(self):
         self.client = Client()
@@ -28,17 +63,32 @@ class SmokeTests(TestCase):
         self.assertIn(b"smart-picks-list", resp.content)
 
 
+class ClientTests(TestCase):
+    def test_session_is_shared_and_pooled(self):
+        from fpldash import client
+        session = client.get_session()
+        self.assertIs(client.get_session(), session)
+        adapter = session.get_adapter(client.FPL_API)
+        self.assertEqual(adapter._pool_maxsize, client.POOL_SIZE)
+
+
 class CacheTests(TestCase):
     """Unit-test the in-process TTL cache without hitting the network."""
 
     def setUp(self):
         # Reset cache store between tests
-        from fpldash import cache as c
+        from fpldash import cache as c, snapshots
         with c._lock:
             c._store.clear()
+            c._stats.clear()
+        # Record snapshots queued by background refreshes before the rollback.
+        self.addCleanup(snapshots.flush)
 
     def _make_mock_response(self, payload):
         mock = MagicMock()
+        mock.status_code = 200
+        mock.headers = {}
+        mock.content = json.dumps(payload).encode()
         mock.json.return_value = payload
         mock.raise_for_status.return_value = None
         return mock
@@ -46,17 +96,18 @@ class CacheTests(TestCase):
     def test_cache_returns_same_object_on_second_call(self):
         from fpldash import cache as c
         payload = {"elements": [], "teams": [], "events": []}
-        with patch("fpldash.cache.requests.get", return_value=self._make_mock_response(payload)) as mock_get:
+        with patch("fpldash.client.get", return_value=self._make_mock_response(payload)) as mock_get:
             first = c.get_bootstrap()
             second = c.get_bootstrap()
         # Network should only be called once
         self.assertEqual(mock_get.call_count, 1)
         self.assertIs(first, second)
 
+    @override_settings(FPL_CACHE_MAX_STALE=0)
     def test_cache_refetches_after_ttl(self):
         from fpldash import cache as c
         payload = {"elements": [], "teams": [], "events": []}
-        with patch("fpldash.cache.requests.get", return_value=self._make_mock_response(payload)) as mock_get:
+        with patch("fpldash.client.get", return_value=self._make_mock_response(payload)) as mock_get:
             c.get_bootstrap()
             # Artificially expire the cache entry
             with c._lock:
@@ -64,22 +115,132 @@ class CacheTests(TestCase):
             c.get_bootstrap()
         self.assertEqual(mock_get.call_count, 2)
 
+    def _wait_for_fetches(self, key, n):
+        from fpldash import cache as c
+        deadline = time.time() + 5
+        while c.cache_stats().get(key, {}).get("fetches", 0) < n and time.time() < deadline:
+            time.sleep(0.01)
+        while c._inflight and time.time() < deadline:
+            time.sleep(0.01)
+
+    def test_expired_entry_served_stale_while_refreshing(self):
+        from fpldash import cache as c
+        from fpldash.bootstrap import Bootstrap
+        old = Bootstrap.parse({"elements": [{"id": 1}], "teams": [], "events": []})
+        new = {"elements": [{"id": 2}], "teams": [], "events": []}
+        with c._lock:
+            c._store["bootstrap"] = {"data": old, "ts": time.time() - c._TTL - 1}
+        with patch("fpldash.client.get", return_value=self._make_mock_response(new)) as mock_get:
+            served = c.get_bootstrap()
+            self._wait_for_fetches("bootstrap", 1)
+        self.assertIs(served, old)
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(c.get_bootstrap().index, {2: 0})
+        self.assertEqual(c.cache_stats()["bootstrap"]["stale"], 1)
+
+    @override_settings(FPL_CACHE_MAX_STALE=60)
+    def test_entry_past_hard_expiry_blocks_on_refetch(self):
+        from fpldash import cache as c
+        from fpldash.bootstrap import Bootstrap
+        old = Bootstrap.parse({"elements": [{"id": 1}]})
+        new = {"elements": [{"id": 2}]}
+        with c._lock:
+            c._store["bootstrap"] = {"data": old, "ts": time.time() - c._TTL - 61}
+        with patch("fpldash.client.get", return_value=self._make_mock_response(new)):
+            self.assertEqual(c.get_bootstrap().index, {2: 0})
+
+    @override_settings(FPL_CACHE_MAX_STALE=0)
+    def test_refresh_revalidates_with_etag(self):
+        from fpldash import cache as c
+        payload = {"elements": [], "teams": [], "events": []}
+        first = self._make_mock_response(payload)
+        first.headers = {"ETag": '"abc"', "Last-Modified": "Sat, 01 Mar 2025 10:00:00 GMT"}
+        not_modified = MagicMock(status_code=304, headers={})
+        with patch("fpldash.client.get", side_effect=[first, not_modified]) as mock_get:
+            data = c.get_bootstrap()
+            with c._lock:
+                c._store["bootstrap"]["ts"] = time.time() - c._TTL - 1
+            again = c.get_bootstrap()
+        self.assertIs(again, data)
+        sent = mock_get.call_args_list[1].kwargs["headers"]
+        self.assertEqual(sent["If-None-Match"], '"abc"')
+        self.assertEqual(sent["If-Modified-Since"], "Sat, 01 Mar 2025 10:00:00 GMT")
+        self.assertEqual(c.cache_stats()["bootstrap"]["not_modified"], 1)
+
+    @override_settings(FPL_CACHE_MAX_STALE=0)
+    def test_refresh_hooks_run_on_new_payloads_only(self):
+        from fpldash import cache as c
+        payload = {"elements": [], "teams": [], "events": []}
+        first = self._make_mock_response(payload)
+        first.headers = {"ETag": '"abc"'}
+        not_modified = MagicMock(status_code=304, headers={})
+        seen = []
+        with patch.dict(c._refresh_hooks, {"bootstrap": [lambda d, v: seen.append(v)]}):
+            with patch("fpldash.client.get", side_effect=[first, not_modified]):
+                c.get_bootstrap()
+                with c._lock:
+                    c._store["bootstrap"]["ts"] = time.time() - c._TTL - 1
+                c.get_bootstrap()
+        self.assertEqual(seen, [c.get_bootstrap_versioned()[1]])
+
+    def test_concurrent_misses_are_coalesced(self):
+        from fpldash import cache as c
+        payload = {"elements": [], "teams": [], "events": []}
+        release = threading.Event()
+
+        def slow_get(*args, **kwargs):
+            release.wait(5)
+            return self._make_mock_response(payload)
+
+        results = []
+        with patch("fpldash.client.get", side_effect=slow_get) as mock_get:
+            threads = [
+                threading.Thread(target=lambda: results.append(c.get_bootstrap()))
+                for _ in range(8)
+            ]
+            for t in threads:
+                t.start()
+            deadline = time.time() + 5
+            while c.cache_stats().get("bootstrap", {}).get("coalesced", 0) < 7:
+                if time.time() > deadline:
+                    break
+                time.sleep(0.01)
+            release.set()
+            for t in threads:
+                t.join(5)
+
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertEqual(len(results), 8)
+        stats = c.cache_stats()["bootstrap"]
+        self.assertEqual(stats["fetches"], 1)
+        self.assertEqual(stats["coalesced"], 7)
+
+    def test_failed_fetch_is_shared_and_not_cached(self):
+        from fpldash import cache as c
+        with patch("fpldash.client.get", side_effect=RuntimeError("down")):
+            with self.assertRaises(RuntimeError):
+                c.get_bootstrap()
+        self.assertNotIn("bootstrap", c._store)
+        self.assertEqual(c._inflight, {})
+
     def test_compute_team_fdr_empty_fixtures(self):
+        from fpldash.bootstrap import Bootstrap
         from fpldash.cache import compute_team_fdr
-        bootstrap = {"events": [{"id": 30, "is_current": True}], "teams": []}
-        with patch("fpldash.cache.get_fixtures", return_value=[]):
+        bootstrap = Bootstrap.parse({"events": [{"id": 30, "is_current": True}], "teams": []})
+        with patch("fpldash.fdr.get_fixtures_versioned", return_value=([], "v0")):
             result = compute_team_fdr(bootstrap)
         self.assertEqual(result, {})
 
     def test_compute_team_fdr_calculates_averages(self):
+        from fpldash.bootstrap import Bootstrap
         from fpldash.cache import compute_team_fdr
         # Current GW = 30, so we want fixtures for GW 31-33
-        bootstrap = {"events": [{"id": 30, "is_current": True}], "teams": []}
+        bootstrap = Bootstrap.parse({"events": [{"id": 30, "is_current": True}], "teams": []})
         fixtures = [
             {"event": 31, "team_h": 1, "team_a": 2, "team_h_difficulty": 2, "team_a_difficulty": 4},
             {"event": 32, "team_h": 3, "team_a": 1, "team_h_difficulty": 3, "team_a_difficulty": 5},
         ]
-        with patch("fpldash.cache.get_fixtures", return_value=fixtures):
+        with patch("fpldash.fdr.get_fixtures_versioned", return_value=(fixtures, "v1")):
             result = compute_team_fdr(bootstrap)
         # Team 1: home GW31 FDR=2, away GW32 FDR=5 → avg 3.5
         self.assertAlmostEqual(result[1], 3.5)
@@ -87,3 +248,1454 @@ class CacheTests(TestCase):
         self.assertAlmostEqual(result[2], 4.0)
         # Team 3: home GW32 FDR=3
         self.assertAlmostEqual(result[3], 3.0)
+
+
+class FixtureMatrixTests(TestCase):
+    """Fixture difficulty is indexed once per fixtures payload."""
+
+    def test_windows_blanks_and_doubles(self):
+        from fpldash import fdr, sample_data
+        teams = sample_data.make_teams()
+        fixtures = sample_data.make_fixtures(teams, current_gw=30)
+        with patch("fpldash.fdr.get_fixtures_versioned", return_value=(fixtures, "v1")) as get:
+            matrix = fdr.get_fixture_matrix()
+            self.assertIs(fdr.get_fixture_matrix(), matrix)
+        self.assertEqual(get.call_count, 2)
+
+        # The postponed GW34 match: a blank in 34 and a double in 35.
+        moved = fixtures[33 * 10]  # first match of GW34, moved into 35
+        team = moved["team_h"]
+        self.assertEqual(matrix.fixture_counts(34, 34)[team], 0)
+        self.assertEqual(matrix.fixture_counts(35, 35)[team], 2)
+        self.assertEqual(len(matrix.team_fixtures(team, 34, 35)[1]), 2)
+        self.assertNotIn(team, matrix.average(34, 34))
+
+        for start, end in ((31, 33), (1, 38), (35, 35)):
+            expected = {}
+            for f in fixtures:
+                if start <= f["event"] <= end:
+                    expected.setdefault(f["team_h"], []).append(f["team_h_difficulty"])
+                    expected.setdefault(f["team_a"], []).append(f["team_a_difficulty"])
+            self.assertEqual(
+                matrix.average(start, end),
+                {tid: round(sum(v) / len(v), 1) for tid, v in expected.items()},
+            )
+        self.assertEqual(matrix.average(39, 45), {})
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_fixtures_matrix_endpoint(self):
+        from fpldash import sample_data
+        from fpldash.bootstrap import Bootstrap
+        bootstrap = sample_data.make_bootstrap(current_gw=33)
+        fixtures = sample_data.make_fixtures(bootstrap["teams"], current_gw=33)
+        with patch("fpldash.views.get_bootstrap_versioned",
+                   return_value=(Bootstrap.parse(bootstrap), "b1")), \
+                patch("fpldash.fdr.get_fixtures_versioned", return_value=(fixtures, "f1")):
+            body = self.client.get("/api/fixtures-matrix?horizon=3").json()
+        self.assertEqual((body["start"], body["end"]), (34, 36))
+        self.assertEqual(len(body["teams"]), 20)
+        cells = {t["id"]: t["gameweeks"] for t in body["teams"]}
+        self.assertTrue(any(len(c[0]) == 0 and len(c[1]) == 2 for c in cells.values()))
+        arsenal = body["teams"][0]
+        self.assertEqual(arsenal["fixtures"], sum(len(c) for c in arsenal["gameweeks"]))
+        self.assertEqual(set(arsenal["gameweeks"][2][0]), {"opponent", "home", "difficulty"})
+
+
+class SuggestionsTests(TestCase):
+    """Value picks are ranked with a partial sort over cached arrays."""
+
+    def test_top_k_matches_stable_sort(self):
+        import numpy as np
+        from fpldash.suggestions import top_k
+        rng = np.random.default_rng(0)
+        scores = rng.integers(0, 6, size=200).astype(float)  # plenty of ties
+        expected = np.argsort(-scores, kind="stable")
+        for k in (1, 3, 17, 200, 500):
+            self.assertEqual(top_k(scores, k).tolist(), expected[:k].tolist())
+        self.assertEqual(top_k(scores[:0], 3).tolist(), [])
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_query_parameters(self):
+        from fpldash import players, sample_data, suggestions
+        from fpldash.bootstrap import Bootstrap
+        bootstrap = Bootstrap.parse(sample_data.make_bootstrap())
+        table = players.build_player_table(bootstrap)
+        suggestions._scored.clear()
+        with patch("fpldash.views._data_version", return_value="v1"), \
+                patch("fpldash.suggestions.get_bootstrap", return_value=bootstrap), \
+                patch("fpldash.suggestions.get_player_table", return_value=table), \
+                patch("fpldash.suggestions.compute_team_fdr", return_value={}) as fdr, \
+                patch("fpldash.suggestions.get_ml_predicted_scores", return_value={}):
+            default = self.client.get("/api/suggestions").json()
+            picks = self.client.get(
+                "/api/suggestions?n=20&position=mid&max_price=6&team=ARS"
+            ).json()
+            cheap = self.client.get("/api/suggestions?n=20&max_price=6").json()
+        self.assertEqual([p["position"] for p in default], ["GK"] * 3 + ["DEF"] * 3 + ["MID"] * 3 + ["FWD"] * 3)
+        self.assertTrue(picks)
+        self.assertTrue(all(p["position"] == "MID" and p["team"] == "Arsenal" and p["price"] <= 6.0
+                            for p in picks))
+        self.assertEqual(len(cheap), 80)
+        scores = [p["score"] for p in cheap if p["position"] == "DEF"]
+        self.assertEqual(scores, sorted(scores, reverse=True))
+        # One scoring pass served all three queries.
+        fdr.assert_called_once()
+
+
+class SquadBuilderTests(TestCase):
+    """The squad ILP respects FPL rules and pruning keeps the optimum."""
+
+    def setUp(self):
+        from fpldash import players, sample_data
+        from fpldash.bootstrap import Bootstrap
+        self.bootstrap = sample_data.make_bootstrap()
+        self.table = players.build_player_table(Bootstrap.parse(self.bootstrap))
+
+    def _ml(self, seed):
+        import numpy as np
+        rng = np.random.default_rng(seed)
+        return {e["id"]: round(float(rng.gamma(2.0, 1.5)), 2) for e in self.bootstrap["elements"]}
+
+    def test_squad_is_legal(self):
+        from collections import Counter
+        from fpldash import squad
+        with patch("fpldash.squad.get_player_table", return_value=self.table):
+            result = squad.build_squad(budget=850, ml_scores=self._ml(0))
+        players = result["squad"]
+        self.assertEqual(Counter(p["position"] for p in players),
+                         {"GK": 2, "DEF": 5, "MID": 5, "FWD": 3})
+        self.assertLessEqual(max(Counter(p["team"] for p in players).values()), 3)
+        self.assertLessEqual(result["cost"], 85.0)
+        starters = [p for p in players if p["starting"]]
+        self.assertEqual(len(starters), 11)
+        d, m, f = map(int, result["formation"].split("-"))
+        self.assertTrue(3 <= d <= 5 and 2 <= m <= 5 and 1 <= f <= 3 and d + m + f == 10)
+        self.assertEqual(sum(p["captain"] for p in players), 1)
+        self.assertTrue(next(p for p in players if p["captain"])["starting"])
+
+    def test_pruning_keeps_optimum(self):
+        import numpy as np
+        from fpldash import squad
+        with patch("fpldash.squad.get_player_table", return_value=self.table):
+            for seed in range(3):
+                df, points = squad.candidate_pool(self._ml(seed))
+                arrays = (df["element_type"].to_numpy(), df["team"].to_numpy(),
+                          df["now_cost"].to_numpy())
+                keep = np.flatnonzero(~squad.prune_dominated(*arrays, points))
+                self.assertLess(len(keep), len(df) // 2)
+
+                def value(picked, p):
+                    return p[picked["xi"]].sum() + p[picked["captain"]] + 0.1 * (
+                        p[picked["squad"]].sum() - p[picked["xi"]].sum())
+
+                pruned = squad.solve(*(a[keep] for a in arrays), points[keep], 900)
+                full = squad.solve(*arrays, points, 900)
+                self.assertAlmostEqual(value(pruned, points[keep]), value(full, points))
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_endpoint(self):
+        with patch("fpldash.views._data_version", return_value="v1"), \
+                patch("fpldash.squad.get_player_table", return_value=self.table), \
+                patch("fpldash.squad.get_ml_predicted_scores", return_value=self._ml(1)):
+            body = self.client.get("/api/squad?budget=95").json()
+            self.assertEqual(len(body["squad"]), 15)
+            self.assertLessEqual(body["cost"], 95.0)
+            self.assertEqual(self.client.get("/api/squad?budget=10").status_code, 422)
+            self.assertEqual(self.client.get("/api/squad?budget=abc").status_code, 400)
+
+
+class TransferPlannerTests(TestCase):
+    """The pruned transfer search finds the same moves as brute force."""
+
+    def setUp(self):
+        from fpldash import sample_data
+        from fpldash.fdr import FixtureMatrix
+        self.bootstrap = sample_data.make_bootstrap()
+        self.matrix = FixtureMatrix(sample_data.make_fixtures(self.bootstrap["teams"], 30))
+
+    def _pool(self, bootstrap, horizon=3):
+        import numpy as np
+        from fpldash import players, transfers
+        from fpldash.bootstrap import Bootstrap
+        rng = np.random.default_rng(0)
+        ml = {e["id"]: round(float(rng.gamma(2.0, 1.5)), 2) for e in bootstrap["elements"]}
+        parsed = Bootstrap.parse(bootstrap)
+        with patch("fpldash.transfers.get_bootstrap", return_value=parsed), \
+                patch("fpldash.transfers.get_player_table",
+                      return_value=players.build_player_table(parsed)), \
+                patch("fpldash.transfers.get_ml_predicted_scores", return_value=ml), \
+                patch("fpldash.fdr.get_fixture_matrix", return_value=self.matrix):
+            return transfers._Pool(horizon)
+
+    def _brute_force(self, pool, squad_ids, bank, k, top):
+        import itertools
+        from collections import Counter
+        gains = []
+        for outs in itertools.combinations(sorted(squad_ids), k):
+            budget = bank + sum(pool.players[o][2] for o in outs)
+            sold = sum(pool.players[o][3] for o in outs)
+            clubs = Counter(pool.players[i][1] for i in squad_ids if i not in outs)
+            options = [[i for i in pool.order[pool.players[o][0]] if i not in squad_ids]
+                       for o in outs]
+            seen = set()
+            for ins in itertools.product(*options):
+                key = frozenset(ins)
+                if len(key) < k or key in seen:
+                    continue
+                if sum(pool.players[i][2] for i in ins) > budget:
+                    continue
+                added = Counter(pool.players[i][1] for i in ins)
+                if any(clubs[t] + n > 3 for t, n in added.items()):
+                    continue
+                seen.add(key)
+                gains.append(sum(pool.players[i][3] for i in ins) - sold)
+        return sorted(gains, reverse=True)[:top]
+
+    def test_search_matches_brute_force(self):
+        from collections import Counter
+        from fpldash import sample_data, transfers
+        for step, ks in ((5, (1, 2)), (20, (3,))):
+            bootstrap = dict(self.bootstrap, elements=self.bootstrap["elements"][::step])
+            pool = self._pool(bootstrap)
+            picks = sample_data.make_picks(bootstrap, 7, 30)
+            squad_ids = [p["element"] for p in picks["picks"]]
+            for k in ks:
+                moves = transfers.best_moves(pool, squad_ids, 5, k, top=4)
+                expected = self._brute_force(pool, squad_ids, 5, k, 4)
+                self.assertEqual([round(g, 6) for g, _ in moves], [round(g, 6) for g in expected])
+                for _, pairs in moves:
+                    self.assertEqual(len(pairs), k)
+                    after = [i for i in squad_ids if i not in {o for o, _ in pairs}]
+                    after += [i for _, i in pairs]
+                    self.assertLessEqual(max(Counter(pool.players[i][1] for i in after).values()), 3)
+                    self.assertLessEqual(
+                        sum(pool.players[i][2] - pool.players[o][2] for o, i in pairs), 5)
+                    for o, i in pairs:
+                        self.assertEqual(pool.players[o][0], pool.players[i][0])
+
+    def test_fixture_weights_count_blanks_and_doubles(self):
+        weights = self.matrix.fixture_weights(34, 35)
+        counts = self.matrix.fixture_counts(34, 35)
+        for team_id, n in counts.items():
+            self.assertGreater(weights[team_id], 0.3 * n - 1e-9)
+            self.assertLess(weights[team_id], 1.7 * n + 1e-9)
+        self.assertEqual(self.matrix.fixture_weights(39, 40), {t: 0.0 for t in counts})
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_endpoint(self):
+        from fpldash import sample_data, transfers
+        from fpldash.bootstrap import Bootstrap
+        pool = self._pool(self.bootstrap)
+        parsed = Bootstrap.parse(self.bootstrap)
+        import requests
+        from fpldash import cache
+        with cache._lock:
+            cache._picks.clear()
+        picks = MagicMock(status_code=200)
+        picks.json.return_value = sample_data.make_picks(self.bootstrap, 42, 30)
+        missing = MagicMock(status_code=404)
+        missing.raise_for_status.side_effect = requests.HTTPError(response=missing)
+        with patch("fpldash.views._data_version", return_value="v1"), \
+                patch("fpldash.transfers.get_bootstrap", return_value=parsed), \
+                patch("fpldash.cache.get_bootstrap", return_value=parsed), \
+                patch("fpldash.transfers._get_pool", return_value=pool), \
+                patch("fpldash.client.get", return_value=picks):
+            body = self.client.get("/api/transfers?manager=42&free_transfers=1").json()
+        self.assertEqual(body["manager"], 42)
+        self.assertEqual(len(body["squad"]), 15)
+        self.assertEqual(sorted(body["moves"]), ["1", "2", "3"])
+        self.assertEqual([m["hit"] for m in body["moves"]["2"]], [transfers.HIT] * 3)
+        best = body["moves"]["1"][0]
+        self.assertAlmostEqual(best["net"], best["gain"])
+        self.assertGreaterEqual(best["bank_after"], 0)
+        with patch("fpldash.views._data_version", return_value="v1"), \
+                patch("fpldash.transfers.get_bootstrap", return_value=parsed), \
+                patch("fpldash.cache.get_bootstrap", return_value=parsed), \
+                patch("fpldash.client.get", return_value=missing):
+            self.assertEqual(self.client.get("/api/transfers?manager=7").status_code, 404)
+            self.assertEqual(self.client.get("/api/transfers?manager=x").status_code, 400)
+
+
+class FileCacheBackendTests(TestCase):
+    """The file backend lets several worker processes share one fetch."""
+
+    def setUp(self):
+        import tempfile
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+
+    def _make_mock_response(self, payload):
+        mock = MagicMock()
+        mock.status_code = 200
+        mock.headers = {}
+        mock.content = json.dumps(payload).encode()
+        mock.json.return_value = payload
+        mock.raise_for_status.return_value = None
+        return mock
+
+    def test_second_worker_reads_entry_from_disk(self):
+        from fpldash import cache as c
+        payload = {"elements": [{"id": 1}], "teams": [], "events": []}
+        with override_settings(FPL_CACHE_BACKEND="file", FPL_CACHE_DIR=self._tmp.name):
+            with patch("fpldash.client.get", return_value=self._make_mock_response(payload)) as mock_get:
+                first = c.get_bootstrap()
+                # A fresh backend instance has no in-process memo — like another worker.
+                c._backends.clear()
+                second = c.get_bootstrap()
+        self.assertEqual(mock_get.call_count, 1)
+        self.assertIsNot(first, second)
+        self.assertEqual(second.index, first.index)
+
+    def test_numeric_columns_are_mapped_from_the_file(self):
+        import pickle
+        import numpy as np
+        from fpldash import cache as c
+        from fpldash.players import build_player_table
+        payload = {"elements": [{"id": 1, "now_cost": 55, "form": "4.5", "web_name": "Saka"}],
+                   "teams": [], "events": []}
+        with override_settings(FPL_CACHE_BACKEND="file", FPL_CACHE_DIR=self._tmp.name):
+            with patch("fpldash.client.get", return_value=self._make_mock_response(payload)):
+                c.get_bootstrap()
+                c._backends.clear()
+                data = c.get_bootstrap()
+            self.assertEqual(data.elements["now_cost"].tolist(), [55])
+            self.assertEqual(data.elements["web_name"].tolist(), ["Saka"])
+            self.assertFalse(data.elements["form"].flags.writeable)
+            self.assertFalse(data.elements["form"].flags.owndata)
+            # The player table wraps the mapped columns instead of copying them.
+            table = build_player_table(data)
+            for name in ("now_cost", "form"):
+                self.assertTrue(np.shares_memory(table[name].to_numpy(), data.elements[name]))
+            # A file in an unknown format reads as a miss, not an error.
+            with open(c._get_backend()._path("fixtures"), "wb") as fh:
+                pickle.dump({"data": []}, fh)
+            self.assertIsNone(c._get_backend().get("fixtures"))
+
+    @override_settings(FPL_CACHE_MAX_STALE=0)
+    def test_expired_file_entry_is_refetched(self):
+        from fpldash import cache as c
+        payload = {"elements": [], "teams": [], "events": []}
+        with override_settings(FPL_CACHE_BACKEND="file", FPL_CACHE_DIR=self._tmp.name):
+            with patch("fpldash.client.get", return_value=self._make_mock_response(payload)) as mock_get:
+                c.get_bootstrap()
+                backend = c._get_backend()
+                backend.set("bootstrap", {"data": payload, "ts": time.time() - c._TTL - 1})
+                c.get_bootstrap()
+        self.assertEqual(mock_get.call_count, 2)
+
+
+class PlayerHistoryCacheTests(TestCase):
+    """element-summary histories are shared by forecast, my-team and the modal."""
+
+    def setUp(self):
+        from fpldash import cache as c
+        from fpldash.bootstrap import Bootstrap
+        with c._lock:
+            c._summaries.clear()
+            c._stats.clear()
+        self.bootstrap = Bootstrap.parse({"events": [{"id": 30, "is_current": True}]})
+
+    def _history(self, player_id, history=(), bootstrap=None):
+        """One ``aget_player_histories`` lookup; returns (history, upstream calls)."""
+        import httpx
+        from asgiref.sync import async_to_sync
+        from fpldash import cache as c
+        from fpldash.fetcher import FetchEngine
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"history": list(history)})
+
+        engine = FetchEngine(transport=httpx.MockTransport(handler))
+        bootstrap = self.bootstrap if bootstrap is None else bootstrap
+        with patch("fpldash.cache.get_bootstrap", return_value=bootstrap), \
+                patch("fpldash.fetcher.get_engine", return_value=engine):
+            found, _ = async_to_sync(c.aget_player_histories)([player_id])
+        return found[player_id], len(calls)
+
+    def test_repeat_lookups_are_served_from_memory(self):
+        from fpldash import cache as c
+        history = [{"round": 30, "total_points": 7}]
+        self.assertEqual(self._history(10, history), (history, 1))
+        self.assertEqual(self._history(10, history), (history, 0))
+        self.assertEqual(c.cache_stats()["element-summary"]["hits"], 1)
+
+    def test_gameweek_change_invalidates(self):
+        from fpldash.bootstrap import Bootstrap
+        self.assertEqual(self._history(10)[1], 1)
+        next_gw = Bootstrap.parse({"events": [{"id": 31, "is_current": True}]})
+        self.assertEqual(self._history(10, bootstrap=next_gw)[1], 1)
+
+    def test_cache_is_bounded(self):
+        from fpldash import cache as c
+        with patch.object(c, "_SUMMARY_MAX", 3):
+            for pid in range(1, 6):
+                self._history(pid)
+        self.assertEqual(list(c._summaries), [3, 4, 5])
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_player_summary_view_uses_cache(self):
+        import httpx
+        from fpldash.fetcher import FetchEngine
+        history = [{"round": 1, "total_points": 2, "minutes": 90}]
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"history": history})
+
+        engine = FetchEngine(transport=httpx.MockTransport(handler))
+        with patch("fpldash.cache.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.fetcher.get_engine", return_value=engine):
+            for _ in range(2):
+                resp = self.client.get("/api/player-summary/10")
+                self.assertEqual(resp.json(), {"history": [{"round": 1, "total_points": 2}]})
+        self.assertEqual(calls, ["/api/element-summary/10/"])
+
+
+class ManagerPicksCacheTests(TestCase):
+    """Picks are cached per (manager, gameweek); finished gameweeks never expire."""
+
+    def setUp(self):
+        from fpldash import cache as c
+        from fpldash.bootstrap import Bootstrap
+        with c._lock:
+            c._picks.clear()
+            c._stats.clear()
+        self.bootstrap = Bootstrap.parse({"events": [{"id": 29, "finished": True},
+                                                     {"id": 30, "is_current": True, "finished": False}]})
+
+    def _picks_response(self, manager_id):
+        mock = MagicMock(status_code=200, headers={})
+        mock.json.return_value = {"picks": [{"element": manager_id, "position": 1}]}
+        return mock
+
+    def _get(self, manager_id, gw, now):
+        from fpldash import cache as c
+        with patch("fpldash.cache.time.time", return_value=now):
+            return c.get_manager_picks(manager_id, gw)
+
+    def test_finished_gameweeks_never_expire(self):
+        from fpldash import cache as c
+        with patch("fpldash.cache.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.client.get", return_value=self._picks_response(7)) as mock_get:
+            for now in (1000, 1000 + c._PICKS_TTL + 1, 1000 + 86400):
+                self._get(7, 29, now)
+            self.assertEqual(mock_get.call_count, 1)
+            for now in (1000, 1100, 1000 + c._PICKS_TTL + 1):
+                self._get(7, 30, now)
+            self.assertEqual(mock_get.call_count, 3)
+        stats = c.cache_stats()["entry-picks"]
+        self.assertEqual((stats["hits"], stats["misses"], stats["fetches"]), (3, 3, 3))
+
+    def test_cache_is_bounded_and_keyed_by_manager(self):
+        from fpldash import cache as c
+        with patch.object(c, "_PICKS_MAX", 3), \
+                patch("fpldash.cache.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.client.get", side_effect=lambda url, **kw: self._picks_response(
+                    int(url.split("/entry/")[1].split("/")[0]))):
+            for manager_id in range(1, 6):
+                picks = c.get_manager_picks(manager_id, 29)
+                self.assertEqual(picks["picks"][0]["element"], manager_id)
+        self.assertEqual(list(c._picks), [(3, 29), (4, 29), (5, 29)])
+
+    def test_errors_are_not_cached(self):
+        import requests
+        from fpldash import cache as c
+        missing = MagicMock(status_code=404)
+        missing.raise_for_status.side_effect = requests.HTTPError(response=missing)
+        with patch("fpldash.cache.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.client.get", return_value=missing) as mock_get:
+            for _ in range(2):
+                with self.assertRaises(requests.HTTPError):
+                    c.get_manager_picks(7, 29)
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertEqual(c.cache_stats()["entry-picks"]["errors"], 2)
+        self.assertFalse(c._picks)
+
+    def test_concurrent_async_misses_share_one_fetch(self):
+        import asyncio
+        import httpx
+        from asgiref.sync import async_to_sync
+        from fpldash import cache as c
+        from fpldash.fetcher import FetchEngine
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(200, json={"picks": [{"element": 7, "position": 1}]})
+
+        async def burst():
+            return await asyncio.gather(*(c.aget_manager_picks(7, 29) for _ in range(5)))
+
+        engine = FetchEngine(transport=httpx.MockTransport(handler))
+        with patch("fpldash.cache.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.fetcher.get_engine", return_value=engine):
+            results = async_to_sync(burst)()
+        self.assertEqual(len(calls), 1)
+        self.assertTrue(all(r["picks"][0]["element"] == 7 for r in results))
+        stats = c.cache_stats()["entry-picks"]
+        self.assertEqual((stats["fetches"], stats["coalesced"]), (1, 4))
+        self.assertFalse(c._picks_flights)
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_myteam_reports_failed_picks_fetch(self):
+        import httpx
+        from fpldash.fetcher import FetchEngine
+        engine = FetchEngine(backoff=0.01, transport=httpx.MockTransport(
+            lambda request: httpx.Response(404)))
+        with patch("fpldash.cache.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.views.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.fetcher.get_engine", return_value=engine), \
+                self.assertLogs("fpldash.views", "WARNING") as logs:
+            resp = self.client.get("/api/myteam/7")
+        self.assertEqual(resp.status_code, 502)
+        self.assertIn("error", resp.json())
+        self.assertIn("manager 7", logs.output[0])
+
+
+class FetchEngineTests(TestCase):
+    """Batched upstream fetches: bounded, retried, deadline-limited."""
+
+    def _engine(self, handler):
+        import httpx
+        from fpldash.fetcher import FetchEngine
+        return FetchEngine(backoff=0.01, transport=httpx.MockTransport(handler))
+
+    def test_retries_429_then_succeeds(self):
+        import httpx
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            if len(calls) == 1:
+                return httpx.Response(429, headers={"Retry-After": "0"})
+            return httpx.Response(200, json={"ok": True})
+
+        results = self._engine(handler).fetch_json_many(["https://fpl.test/a/"])
+        self.assertEqual(results, {"https://fpl.test/a/": {"ok": True}})
+        self.assertEqual(len(calls), 2)
+
+    def test_client_errors_are_not_retried(self):
+        import httpx
+        from fpldash.fetcher import FetchError
+        calls = []
+
+        def handler(request):
+            calls.append(request.url.path)
+            return httpx.Response(404)
+
+        results = self._engine(handler).fetch_json_many(["https://fpl.test/missing/"])
+        error = results["https://fpl.test/missing/"]
+        self.assertIsInstance(error, FetchError)
+        self.assertEqual(error.status, 404)
+        self.assertEqual(len(calls), 1)
+
+    def test_deadline_fails_slow_urls_only(self):
+        import asyncio
+        import httpx
+        from fpldash.fetcher import FetchError
+
+        async def handler(request):
+            if request.url.path == "/slow/":
+                await asyncio.sleep(2)
+            return httpx.Response(200, json={"path": request.url.path})
+
+        engine = self._engine(handler)
+        started = time.monotonic()
+        results = engine.fetch_json_many(
+            ["https://fpl.test/fast/", "https://fpl.test/slow/"], deadline=0.3
+        )
+        self.assertLess(time.monotonic() - started, 1.5)
+        self.assertEqual(results["https://fpl.test/fast/"], {"path": "/fast/"})
+        self.assertIsInstance(results["https://fpl.test/slow/"], FetchError)
+
+    def test_player_histories_batch_fetches_misses(self):
+        from unittest.mock import AsyncMock
+        from asgiref.sync import async_to_sync
+        from fpldash import cache as c
+        from fpldash.bootstrap import Bootstrap
+        from fpldash.fetcher import FetchError
+        with c._lock:
+            c._summaries.clear()
+            c._stats.clear()
+        c._summaries[1] = {"history": [{"round": 30, "total_points": 1}], "ts": time.time()}
+        c._summary_gw = 30
+
+        url = lambda pid: f"{c.client.FPL_API}element-summary/{pid}/"
+        engine = MagicMock()
+        engine.afetch_json_many = AsyncMock(return_value={
+            url(2): {"history": [{"round": 30, "total_points": 2}]},
+            url(3): FetchError(url(3), "HTTP 503", 503),
+        })
+        with patch("fpldash.cache.get_bootstrap",
+                   return_value=Bootstrap.parse({"events": [{"id": 30, "is_current": True}]})), \
+                patch("fpldash.fetcher.get_engine", return_value=engine):
+            histories, errors = async_to_sync(c.aget_player_histories)([1, 2, 3])
+        self.assertEqual(sorted(engine.afetch_json_many.call_args[0][0]), [url(2), url(3)])
+        self.assertEqual({pid: h[0]["total_points"] for pid, h in histories.items()}, {1: 1, 2: 2})
+        self.assertEqual(list(errors), [3])
+        self.assertIn(2, c._summaries)
+        self.assertNotIn(3, c._summaries)
+        self.assertEqual(c.cache_stats()["element-summary"]["errors"], 1)
+
+
+class PointsMatrixTests(TestCase):
+    """Weekly points are an int16 player × gameweek block from the warehouse."""
+
+    def setUp(self):
+        from fpldash import history
+        from fpldash.bootstrap import Bootstrap
+        from fpldash.fdr import FixtureMatrix
+        history._live.clear()
+        self.bootstrap = Bootstrap.parse({
+            "events": [
+                {"id": gw, "finished": gw < 3, "is_current": gw == 3} for gw in range(1, 39)
+            ],
+            "elements": [{"id": pid, "team": pid} for pid in (1, 2, 3)],
+        })
+        # Club 2 plays in gameweek 2 only, clubs 1 and 3 meet in gameweek 3.
+        matrix = FixtureMatrix([{"event": 2, "team_h": 2, "team_a": 4},
+                                {"event": 3, "team_h": 1, "team_a": 3}])
+        patcher = patch("fpldash.history.get_fixture_matrix", return_value=matrix)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _live(points: dict) -> dict:
+        """{player: (points, fixtures)} -> an event/{gw}/live payload."""
+        return {"elements": [
+            {"id": pid, "stats": {"total_points": pts}, "explain": [{}] * fixtures}
+            for pid, (pts, fixtures) in points.items()
+        ]}
+
+    def _get_points(self, ids, live, n_gws=3):
+        from fpldash import history, points
+        warehouse = history.Warehouse({
+            1: history.frame(self._live({1: (2, 1), 2: (0, 0)})),  # 2: blank
+            2: history.frame(self._live({1: (0, 1), 2: (13, 2)})),  # 2: double
+        })
+        with patch("fpldash.history.get_warehouse", return_value=warehouse), \
+                patch("fpldash.points.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.history.get_event_live_versioned", side_effect=live) as fetch:
+            block, errors = points.get_points(ids, n_gws)
+        return block, errors, fetch
+
+    def test_finished_weeks_from_warehouse_current_from_live(self):
+        from fpldash import points
+        live = lambda gw: (self._live({1: (9, 1), 2: (0, 0)}), "v1")  # noqa: E731
+        block, errors, fetch = self._get_points([2, 1, 3], live)
+        M = points.MISSING
+        self.assertEqual(block.dtype.name, "int16")
+        self.assertEqual(block.tolist(), [[M, 13, M], [2, 0, 9], [M, M, M]])
+        self.assertEqual(errors, {})
+        fetch.assert_called_once_with(3)
+
+    def test_checked_weeks_awaiting_ingest_are_not_fetched(self):
+        from fpldash import history, points
+        warehouse = history.Warehouse({1: history.frame(self._live({1: (2, 1)}))})
+        live = lambda gw: (self._live({1: (9, 1)}), "v1")  # noqa: E731
+        with patch("fpldash.history.get_warehouse", return_value=warehouse), \
+                patch("fpldash.points.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.history.get_event_live_versioned", side_effect=live) as fetch:
+            block, _ = points.get_points([1], 3)
+        self.assertEqual(block.tolist(), [[2, points.MISSING, 9]])
+        fetch.assert_called_once_with(3)
+
+    def test_benched_player_of_a_playing_club_scores_zero(self):
+        from fpldash import history, points
+        live = {"elements": [{"id": 2, "stats": {"minutes": 0, "total_points": 0}, "explain": []}]}
+        warehouse = history.Warehouse({
+            gw: history.frame(live, history.club_fixtures(self.bootstrap, gw)) for gw in (1, 2)
+        })
+        block = warehouse.block("total_points", [2], 2, points.MISSING)
+        self.assertEqual(block.tolist(), [[points.MISSING, 0]])
+
+    def test_unavailable_live_week_is_reported(self):
+        from fpldash import points
+        from fpldash.fetcher import FetchError
+        error = FetchError("live", "HTTP 503", 503)
+        block, errors, _ = self._get_points([1], lambda gw: (_ for _ in ()).throw(error))
+        self.assertEqual(block.tolist(), [[2, 0, points.MISSING]])
+        self.assertEqual(errors, {1: error})
+
+    def test_forecast_weeks_come_from_matrix(self):
+        import numpy as np
+        import pandas as pd
+        from fpldash import forecast, points
+        table = pd.DataFrame({
+            "id": [1, 2], "web_name": ["A", "B"], "team": [1, 1], "Team": ["X", "X"],
+            "Position": ["MID", "FWD"], "form": [5.0, 4.0], "points_per_game": [4.0, 3.0],
+        })
+        self.bootstrap.events[1].finished = True
+        block = np.array([[3, 7, points.MISSING], [points.MISSING] * 3], dtype="int16")
+        with patch("fpldash.forecast.get_bootstrap", return_value=self.bootstrap), \
+                patch("fpldash.forecast.get_player_table", return_value=table), \
+                patch("fpldash.forecast.compute_team_fdr", return_value={1: 2.0}), \
+                patch("fpldash.forecast.get_ml_predicted_scores", return_value={}), \
+                patch("fpldash.forecast.get_points", return_value=(block, {})) as get_points:
+            rows = forecast.get_forecast_data(limit=2)
+        self.assertEqual(get_points.call_args[0][:2], ([1, 2], 3))
+        self.assertEqual([(r["W1"], r["W2"], r["W3"], r["Last GW Pts"]) for r in rows],
+                         [(3, 7, None, 7.0), (None, None, None, 0.0)])
+
+
+class HistoryWarehouseTests(TestCase):
+    """Finished gameweeks are ingested once into columnar files."""
+
+    def setUp(self):
+        import tempfile
+        from fpldash import cache, client, fetcher, history, offline
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        isolated = override_settings(FPL_HISTORY_DIR=tmp.name, FPL_OFFLINE=True,
+                                     FPL_OFFLINE_DIR="")
+        isolated.enable()
+        self.addCleanup(isolated.disable)
+
+        def reset():
+            with cache._lock:
+                cache._store.clear()
+            history._loaded.update(key=None, warehouse=None, scheduled=None)
+            client._session = None
+            fetcher._engine = None
+            offline._stand_in = None
+
+        reset()
+        self.addCleanup(reset)
+        patcher = patch("fpldash.history.run_in_background")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _live_requests(self):
+        from fpldash import offline
+        return sum(1 for path in offline.get_stand_in()._bodies if path.startswith("event/"))
+
+    def test_ingests_checked_gameweeks_once(self):
+        from fpldash import cache, history, offline
+        bootstrap = cache.get_bootstrap()
+        bootstrap.events[28].data_checked = False  # GW29 awaits bonus
+
+        # The request path serves what is on disk and ingests in the background.
+        self.assertEqual(history.get_warehouse().gws, ())
+        self.assertEqual(self._live_requests(), 0)
+        name, job = history.run_in_background.call_args[0]
+        self.assertEqual(name, "history-ingest")
+        job()
+        warehouse = history.get_warehouse()
+        self.assertEqual(warehouse.gws, tuple(range(1, 29)))
+        self.assertEqual(len(list(history.season_dir(bootstrap).glob("gw-*.npz"))), 28)
+        self.assertEqual(self._live_requests(), 28)
+
+        # Matches the element-summary histories round by round.
+        stand_in = offline.get_stand_in()
+        pid = int(bootstrap.elements["id"][10])
+        rows = stand_in.histories(30)[pid]
+        block = warehouse.block("total_points", [pid], 28, -99)[0]
+        for gw in range(1, 29):
+            played = [h["total_points"] for h in rows if h["round"] == gw]
+            self.assertEqual(block[gw - 1], sum(played) if played else -99)
+
+        # A later refresh only fetches what finished since.
+        bootstrap.events[28].data_checked = True
+        self.assertEqual(history.ingest(bootstrap), [29])
+        self.assertEqual(history.ingest(bootstrap), [])
+        self.assertEqual(self._live_requests(), 29)
+
+    def test_season_dir_survives_rescheduled_deadlines(self):
+        from fpldash import history
+        from fpldash.bootstrap import Bootstrap
+        events = [{"id": 1, "deadline_time": "2025-08-15T17:30:00Z"},
+                  {"id": 2, "deadline_time": "2025-08-22T17:30:00Z"}]
+        before = history.season_dir(Bootstrap.parse({"events": events}))
+        events[1]["deadline_time"] = "2025-08-23T10:00:00Z"
+        self.assertEqual(history.season_dir(Bootstrap.parse({"events": events})), before)
+        self.assertEqual(before.name, "season-2025")
+
+    def test_rolling_mean_over_last_gameweeks(self):
+        from fpldash import history
+        frames = {
+            gw: history.frame({"elements": [
+                {"id": 7, "stats": {"total_points": pts, "minutes": 90}, "explain": [{}]}
+            ]})
+            for gw, pts in ((1, 2), (2, 6), (3, 10))
+        }
+        warehouse = history.Warehouse(frames)
+        self.assertEqual(warehouse.rolling_mean("total_points", [7, 8], 2).tolist(), [8.0, 0.0])
+        self.assertEqual(warehouse.rolling_mean("minutes", [7], 6).tolist(), [90.0])
+
+
+class OfflineAPITests(TestCase):
+    """Endpoints run end-to-end against the offline FPL stand-in."""
+
+    def setUp(self):
+        import tempfile
+        from fpldash import cache, client, fetcher, history, offline, players, responses, snapshots
+        from fpldash import ml_predictions as ml
+
+        def reset():
+            with cache._lock:
+                cache._store.clear()
+                cache._stats.clear()
+                cache._summaries.clear()
+                cache._picks.clear()
+            players._table["version"] = None
+            history._loaded.update(key=None, warehouse=None, scheduled=None)
+            history._live.clear()
+            responses._bodies.clear()
+            client._session = None
+            fetcher._engine = None
+            offline._stand_in = None
+            ml._cache.clear()
+
+        reset()
+        self.addCleanup(reset)
+        self.addCleanup(snapshots.flush)
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        isolated = override_settings(FPL_HISTORY_DIR=tmp.name)
+        isolated.enable()
+        self.addCleanup(isolated.disable)
+        for target in ("fpldash.ml_predictions.run_in_background",
+                       "fpldash.history.run_in_background"):
+            patcher = patch(target)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @override_settings(SECURE_SSL_REDIRECT=False, FPL_OFFLINE=True, FPL_OFFLINE_DIR="")
+    def test_endpoints_serve_synthetic_season(self):
+        from fpldash import offline
+        data = self.client.get("/api/data").json()
+        self.assertEqual(len(data), 700)
+        self.assertEqual(len(self.client.get("/api/suggestions").json()), 12)
+        self.assertEqual(len(self.client.get("/api/forecast?limit=20").json()), 20)
+        history = self.client.get("/api/player-summary/5").json()["history"]
+        self.assertEqual(len(history), 30)
+        team = self.client.get("/api/myteam").json()
+        self.assertEqual(len(team), 15)
+        self.assertEqual(sum(p["starting"] for p in team), 11)
+        other = self.client.get("/api/myteam/42").json()
+        self.assertEqual(len(other), 15)
+        self.assertNotEqual({p["ID"] for p in other}, {p["ID"] for p in team})
+        self.assertTrue(self.client.get("/api/pricechanges_fpl").json())
+        self.assertEqual(self.client.get("/api/player-summary/9999").status_code, 502)
+        self.assertGreater(offline.get_stand_in().requests, 20)
+
+    @override_settings(SECURE_SSL_REDIRECT=False, FPL_OFFLINE=True, FPL_OFFLINE_DIR="",
+                       FPL_OFFLINE_LATENCY=0.3)
+    def test_async_views_overlap_upstream_waits(self):
+        import asyncio
+        from asgiref.sync import async_to_sync
+        from django.test import AsyncClient
+        client = AsyncClient()
+
+        async def burst():
+            started = time.perf_counter()
+            responses = await asyncio.gather(
+                *(client.get(f"/api/player-summary/{pid}") for pid in range(1, 11))
+            )
+            return responses, time.perf_counter() - started
+
+        responses, elapsed = async_to_sync(burst)()
+        self.assertEqual({r.status_code for r in responses}, {200})
+        # Ten element-summary calls of ~0.3 s each, waited on concurrently.
+        self.assertLess(elapsed, 1.5)
+        self.assertIn("element-summary;dur=", responses[0]["Server-Timing"])
+
+    @override_settings(SECURE_SSL_REDIRECT=False, FPL_OFFLINE=True, FPL_OFFLINE_DIR="")
+    def test_server_timing_and_metrics(self):
+        from fpldash import history
+        resp = self.client.get("/api/forecast?limit=10")
+        timing = resp["Server-Timing"]
+        for name in ("bootstrap-fetch", "forecast-points", "build-forecast", "encode", "total"):
+            self.assertIn(f"{name};dur=", timing)
+        # Finished gameweeks are ingested in the background, not by the request.
+        self.assertNotIn("history-ingest", timing)
+        history.run_in_background.call_args[0][1]()
+        # A repeat is served from the cached body: no fetch or build phases.
+        timing = self.client.get("/api/forecast?limit=10")["Server-Timing"]
+        self.assertNotIn("build-forecast", timing)
+
+        self.assertEqual(self.client.get("/metrics").status_code, 404)
+        with override_settings(FPL_METRICS_TOKEN="s3cret"):
+            self.assertEqual(self.client.get("/metrics").status_code, 401)
+            text = self.client.get(
+                "/metrics", HTTP_AUTHORIZATION="Bearer s3cret").content.decode()
+        # Metrics are per process, so other tests may have added to them.
+        self.assertRegex(text, r'fpldash_upstream_request_duration_seconds_count'
+                               r'\{endpoint="bootstrap-static",status="200"\} [1-9]')
+        self.assertRegex(text, r'fpldash_upstream_request_duration_seconds_bucket'
+                               r'\{endpoint="event-live",status="200",le="\+Inf"\} [1-9]\d')
+        self.assertRegex(text, r'fpldash_http_request_duration_seconds_count'
+                               r'\{route="api/forecast",status="200"\} [2-9]')
+        self.assertRegex(text, r'fpldash_cache_hit_ratio\{key="bootstrap"\} 0\.\d+')
+        self.assertIn("fpldash_http_requests_in_flight 1\n", text)
+
+    def test_recorded_payloads_take_precedence(self):
+        import tempfile
+        from asgiref.sync import async_to_sync
+        from fpldash import cache, offline, sample_data
+        bootstrap = sample_data.make_bootstrap(current_gw=5)
+        bootstrap["elements"] = bootstrap["elements"][:3]
+        with tempfile.TemporaryDirectory() as tmp:
+            with open(f"{tmp}/bootstrap-static.json", "w") as fh:
+                json.dump(bootstrap, fh)
+            with override_settings(FPL_OFFLINE=True, FPL_OFFLINE_DIR=tmp):
+                self.assertEqual(len(cache.get_bootstrap()), 3)
+                # Not recorded: synthesised from the recorded bootstrap.
+                histories, _ = async_to_sync(cache.aget_player_histories)([1])
+                self.assertEqual(len(histories[1]), 5)
+                self.assertEqual(offline.get_stand_in().body("entry/1/event/6/picks"), None)
+
+    def test_injected_faults(self):
+        from fpldash.client import FPL_API
+        from fpldash.fetcher import FetchEngine, FetchError
+        from fpldash.offline import OfflineFPL, OfflineTransport
+
+        stand_in = OfflineFPL(rate_limit_rate=1.0, retry_after=0)
+        engine = FetchEngine(attempts=2, transport=OfflineTransport(stand_in))
+        url = f"{FPL_API}element-summary/1/"
+        result = engine.fetch_json_many([url])[url]
+        self.assertIsInstance(result, FetchError)
+        self.assertEqual(result.status, 429)
+        self.assertEqual(stand_in.requests, 2)
+
+        stand_in.rate_limit_rate, stand_in.error_rate = 0.0, 0.5
+        results = engine.fetch_json_many([f"{FPL_API}element-summary/{i}/" for i in range(1, 41)])
+        ok = [r for r in results.values() if not isinstance(r, FetchError)]
+        # Each 503 is retried once, so ~75 % of URLs get through.
+        self.assertTrue(20 <= len(ok) < 40, len(ok))
+        self.assertTrue(all(len(r["history"]) == 30 for r in ok))
+
+        import requests
+        from fpldash.offline import OfflineAdapter
+        session = requests.Session()
+        session.mount(FPL_API, OfflineAdapter(OfflineFPL(latency=0.05)))
+        started = time.monotonic()
+        r = session.get(f"{FPL_API}fixtures/")
+        self.assertGreaterEqual(time.monotonic() - started, 0.025)
+        self.assertEqual(len(r.json()), 380)
+        self.assertEqual(session.get(f"{FPL_API}fixtures/",
+                                     headers={"If-None-Match": r.headers["ETag"]}).status_code, 304)
+
+
+class SnapshotTests(TestCase):
+    """Price / ownership history is recorded change-only and queried by window."""
+
+    def setUp(self):
+        from fpldash import snapshots
+        snapshots._latest.update(snapshot=None, values={})
+
+    def _bootstrap(self, **changes):
+        from fpldash.bootstrap import Bootstrap
+        elements = [
+            {"id": 9001, "web_name": "Salah", "now_cost": 130, "selected_by_percent": "45.1",
+             "transfers_in_event": 100, "transfers_out_event": 5, "form": "7.5"},
+            {"id": 9002, "web_name": "Haaland", "now_cost": 140, "selected_by_percent": "60.0",
+             "transfers_in_event": 50, "transfers_out_event": 9, "form": "6.0"},
+        ]
+        for pid, values in changes.items():
+            elements[int(pid[1:]) - 1].update(values)
+        return Bootstrap.parse({"elements": elements, "events": [{"id": 5, "is_current": True}]})
+
+    def _record_at(self, when, data, version):
+        from fpldash import snapshots
+        with patch("fpldash.snapshots.timezone.now", return_value=when):
+            return snapshots.record(data, version)
+
+    def test_only_changed_players_are_written_once_per_version(self):
+        from datetime import datetime, timezone
+        from fpldash import snapshots
+        from fpldash.models import PlayerSnapshot, Snapshot
+        t0 = datetime(2025, 9, 1, tzinfo=timezone.utc)
+        self.assertEqual(self._record_at(t0, self._bootstrap(), "a"), 2)
+        self.assertEqual(self._record_at(t0, self._bootstrap(), "a"), 0)
+        self.assertEqual(self._record_at(t0, self._bootstrap(), "b"), 0)
+        # A fresh process reloads each player's last values from the table.
+        snapshots._latest.update(snapshot=None, values={})
+        self.assertEqual(self._record_at(t0, self._bootstrap(p2={"now_cost": 141}), "c"), 1)
+        self.assertEqual(Snapshot.objects.filter(version__in="abc").count(), 3)
+        self.assertEqual(Snapshot.objects.get(version="a").gameweek, 5)
+        self.assertEqual(PlayerSnapshot.objects.filter(player_id=9002).count(), 2)
+
+    def test_refresh_hook_does_not_record_on_the_refreshing_thread(self):
+        from fpldash import snapshots
+        from fpldash.models import Snapshot
+        refresh = threading.Thread(
+            target=snapshots.on_bootstrap_refresh, args=(self._bootstrap(), "hook")
+        )
+        refresh.start()
+        refresh.join()
+        self.assertFalse(Snapshot.objects.filter(version="hook").exists())
+        snapshots.flush()
+        self.assertEqual(Snapshot.objects.get(version="hook").changed, 2)
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_trends_window_starts_from_prior_state(self):
+        from datetime import datetime, timedelta, timezone
+        t0 = datetime(2025, 9, 1, tzinfo=timezone.utc)
+        self._record_at(t0, self._bootstrap(), "a")
+        self._record_at(t0 + timedelta(days=2), self._bootstrap(p1={"now_cost": 131}), "b")
+        self._record_at(t0 + timedelta(days=3),
+                        self._bootstrap(p1={"now_cost": 132, "selected_by_percent": "47.0"}), "c")
+        self._record_at(t0 + timedelta(days=9), self._bootstrap(p1={"now_cost": 133}), "d")
+
+        since = (t0 + timedelta(days=1)).isoformat()
+        until = (t0 + timedelta(days=4)).isoformat()
+        with patch("fpldash.views.get_bootstrap", return_value=self._bootstrap()):
+            resp = self.client.get("/api/trends", {"players": "9001,9002", "since": since, "until": until})
+        self.assertEqual(resp.status_code, 200)
+        data = resp.json()
+        self.assertEqual(data["snapshots"], 2)
+        salah, haaland = data["players"]
+        self.assertEqual(salah["name"], "Salah")
+        self.assertEqual(salah["series"]["price"], [13.0, 13.1, 13.2])
+        self.assertEqual(salah["series"]["t"][0], int((t0 + timedelta(days=1)).timestamp()))
+        self.assertEqual(salah["change"], {"price": 0.2, "selected_by_percent": 1.9, "form": 0.0})
+        self.assertEqual(haaland["series"]["selected_by_percent"], [60.0])
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_trends_endpoint_validates_parameters(self):
+        self.assertEqual(self.client.get("/api/trends").status_code, 400)
+        self.assertEqual(self.client.get("/api/trends?players=a").status_code, 400)
+        self.assertEqual(self.client.get("/api/trends?players=1&since=yesterday").status_code, 400)
+        many = ",".join(str(i) for i in range(60))
+        self.assertEqual(self.client.get(f"/api/trends?players={many}").status_code, 400)
+
+
+class PriceFeedTests(TestCase):
+    """Tweet sources are raced, guarded by circuit breakers and cached."""
+
+    def setUp(self):
+        from fpldash import pricefeed
+        with pricefeed._lock:
+            pricefeed._answers.clear()
+            pricefeed._breakers.clear()
+        patcher = patch.dict("os.environ", {"TWITTER_BEARER_TOKEN": ""})
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.hosts = []
+
+    def _rss(self, text):
+        from datetime import datetime, timezone
+        from email.utils import format_datetime
+        pub = format_datetime(datetime.now(timezone.utc)).replace("+0000", "GMT")
+        return (f"<rss><channel><item><title>{text}</title><link>https://n/x/1</link>"
+                f"<pubDate>{pub}</pubDate></item></channel></rss>")
+
+    def _get(self, handler, path="/api/pricechanges?user=x&days=2"):
+        import httpx
+        from fpldash.fetcher import FetchEngine
+
+        async def recording(request):
+            self.hosts.append(request.url.host)
+            return await handler(request)
+
+        engine = FetchEngine(transport=httpx.MockTransport(recording))
+        with patch("fpldash.pricefeed.get_engine", return_value=engine):
+            started = time.monotonic()
+            data = self.client.get(path).json()
+        return data, time.monotonic() - started
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_first_good_answer_wins(self):
+        import asyncio
+        import httpx
+
+        async def handler(request):
+            if request.url.host == "nitter.net":
+                await asyncio.sleep(5)
+            if request.url.host == "nitter.fdn.fr":
+                return httpx.Response(200, text=self._rss("Price rises: Salah"))
+            return httpx.Response(503)
+
+        data, elapsed = self._get(handler)
+        self.assertEqual([t["text"] for t in data], ["Price rises: Salah"])
+        self.assertLess(elapsed, 1.5)
+        self.assertIn("cdn.syndication.twimg.com", self.hosts)
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_failing_sources_are_skipped_and_answers_cached(self):
+        import httpx
+
+        async def handler(request):
+            if request.url.host == "cdn.syndication.twimg.com":
+                return httpx.Response(200, json={"body": ""})
+            return httpx.Response(503)
+
+        for days in (1, 2, 3):
+            data, _ = self._get(handler, f"/api/pricechanges?user=x&days={days}")
+            self.assertEqual(data, [])
+        # Two failures open each mirror's breaker; the third race skips them.
+        self.assertEqual(self.hosts.count("nitter.net"), 2)
+        self.assertEqual(self.hosts.count("cdn.syndication.twimg.com"), 3)
+        self.hosts.clear()
+        self._get(handler, "/api/pricechanges?user=x&days=3")
+        self.assertEqual(self.hosts, [])
+
+    @override_settings(SECURE_SSL_REDIRECT=False)
+    def test_bounded_time_when_every_source_hangs(self):
+        import asyncio
+        from fpldash import pricefeed
+
+        async def handler(request):
+            await asyncio.sleep(30)
+
+        with patch.object(pricefeed, "DEADLINE", 0.3):
+            data, elapsed = self._get(handler)
+        self.assertEqual(data, [])
+        self.assertLess(elapsed, 1.5)
+
+    def test_trial_finishing_with_the_winner_gets_a_verdict(self):
+        import asyncio
+        from fpldash import pricefeed
+
+        async def winner(username, days):
+            return [{"created_at": "", "text": "Price rises: Saka", "url": ""}]
+
+        async def trial(username, days):
+            return []
+
+        breaker = pricefeed._breaker("trial")
+        sources = [("winner", winner), ("trial", trial)]
+        # Both finish in the same asyncio.wait batch, in either order.
+        for i in range(20):
+            breaker.failures, breaker.open_until = breaker.threshold, 0.0  # half-open
+            tweets = asyncio.run(pricefeed.race(sources[::1 if i % 2 else -1], "x", 1))
+            self.assertEqual(tweets[0]["text"], "Price rises: Saka")
+            self.assertFalse(breaker.trial)
+            self.assertEqual(breaker.failures, 0)
+        self.assertTrue(breaker.allow(time.monotonic()))
+
+    def test_breaker_half_opens_after_cooldown(self):
+        from fpldash.pricefeed import CircuitBreaker
+        breaker = CircuitBreaker(threshold=2, cooldown=10)
+        breaker.record(False, 0)
+        self.assertTrue(breaker.allow(1))
+        breaker.record(False, 1)
+        self.assertFalse(breaker.allow(5))
+        self.assertTrue(breaker.allow(11))   # one trial call
+        self.assertFalse(breaker.allow(11))
+        breaker.record(True, 12)
+        self.assertTrue(breaker.allow(12))
+
+
+class BootstrapTests(TestCase):
+    """bootstrap-static is kept as typed columns, not the raw JSON."""
+
+    def test_parse_coerces_fields(self):
+        import math
+        from fpldash.bootstrap import Bootstrap
+        data = Bootstrap.parse({
+            "elements": [
+                {"id": 7, "web_name": "Saka", "form": "5.4", "now_cost": 101,
+                 "chance_of_playing_next_round": None, "status": "a", "news": "ignored"},
+                {"id": 9, "form": "n/a", "now_cost": None, "chance_of_playing_next_round": 75},
+                {"web_name": "no id"},
+            ],
+            "teams": [{"id": 1, "name": "Arsenal", "short_name": "ARS", "strength": 4}],
+            "events": [{"id": 1, "finished": True, "deadline_time": "2025-08-15T17:30:00Z"}],
+        })
+        col = data.elements
+        self.assertEqual(len(data), 2)
+        self.assertEqual(data.index, {7: 0, 9: 1})
+        self.assertEqual(col["form"].tolist(), [5.4, 0.0])
+        self.assertEqual(col["now_cost"].dtype.name, "int32")
+        self.assertEqual(col["now_cost"].tolist(), [101, 0])
+        self.assertTrue(math.isnan(col["chance_of_playing_next_round"][0]))
+        self.assertEqual(col["chance_of_playing_next_round"][1], 75.0)
+        self.assertEqual(col["web_name"].tolist(), ["Saka", ""])
+        self.assertNotIn("news", col)
+        self.assertEqual(data.team_names(), {1: "Arsenal"})
+        event = data.events[0]
+        self.assertEqual((event.id, event.finished, event.data_checked, event.is_current),
+                         (1, True, True, False))
+
+    def test_cache_keeps_only_the_parsed_payload(self):
+        from fpldash import cache as c
+        from fpldash.bootstrap import Bootstrap
+        payload = {"elements": [{"id": 3, "web_name": "Rice"}], "teams": [], "events": []}
+        response = MagicMock(status_code=200, headers={})
+        response.content = json.dumps(payload).encode()
+        response.json.return_value = payload
+        with c._lock:
+            c._store.pop("bootstrap", None)
+        self.addCleanup(c._store.pop, "bootstrap", None)
+        with patch("fpldash.client.get", return_value=response):
+            data = c.get_bootstrap()
+        self.assertIsInstance(data, Bootstrap)
+        self.assertIs(c._store["bootstrap"]["data"], data)
+        self.assertEqual(data.elements["web_name"].tolist(), ["Rice"])
+
+
+class PlayerTableTests(TestCase):
+    """The typed player table is built once per bootstrap payload."""
+
+    def setUp(self):
+        from fpldash import players, sample_data
+        from fpldash.bootstrap import Bootstrap
+        with players._lock:
+            players._table.update(version=None, df=None)
+        self.bootstrap = Bootstrap.parse(sample_data.make_bootstrap())
+        self.fixtures = sample_data.make_fixtures(sample_data.make_teams(), 30)
+        self.version = "v1"
+
+    def _entry(self, key, url):
+        data = self.bootstrap if key == "bootstrap" else self.fixtures
+        return {"data": data, "ts": time.time(), "version": f"{key}-{self.version}"}
+
+    def test_table_is_typed_and_shared(self):
+        from fpldash import players
+        with patch("fpldash.cache._get_entry", side_effect=self._entry), \
+                patch("fpldash.players.build_player_table",
+                      wraps=players.build_player_table) as build:
+            first = players.get_player_table()
+            second = players.get_player_table()
+            self.version = "v2"
+            third = players.get_player_table()
+        self.assertIs(first, second)
+        self.assertIsNot(first, third)
+        self.assertEqual(build.call_count, 2)
+        self.assertEqual(first["form"].dtype.kind, "f")
+        self.assertEqual(first["minutes"].dtype.kind, "i")
+        self.assertEqual(len(first), 700)
+        self.assertTrue(set(first["Position"]) <= {"GK", "DEF", "MID", "FWD"})
+
+    def test_fpl_data_does_not_mutate_shared_table(self):
+        from fpldash.fpl_data import get_fpl_data
+        from fpldash.players import get_player_table
+        with patch("fpldash.cache._get_entry", side_effect=self._entry):
+            columns = list(get_player_table().columns)
+            df = get_fpl_data()
+            self.assertEqual(list(get_player_table().columns), columns)
+        self.assertEqual(len(df), 700)
+        self.assertEqual(df["Total Points"].iloc[0], df["Total Points"].max())
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class ResponseCacheTests(TestCase):
+    """JSON bodies are serialised once per data version and revalidated by ETag."""
+
+    def setUp(self):
+        from fpldash import responses
+        with responses._lock:
+            responses._bodies.clear()
+        self.version = "v1"
+        self.rows = [{"PlayerId": 1, "Player": "Saka"}] * 50
+
+    def _entry(self, key, url):
+        return {"data": {"events": []}, "ts": time.time(), "version": f"{key}-{self.version}"}
+
+    def _get(self, **headers):
+        return self.client.get("/api/data", headers=headers)
+
+    def test_body_is_built_once_and_304_on_matching_etag(self):
+        import pandas as pd
+        updated = [{"PlayerId": 1, "Player": "Saka", "Total Points": 3}]
+        frames = [pd.DataFrame(self.rows), pd.DataFrame(updated)]
+        with patch("fpldash.cache._get_entry", side_effect=self._entry), \
+                patch("fpldash.views.get_fpl_data", side_effect=frames) as build:
+            first = self._get()
+            etag = first["ETag"]
+            second = self._get(if_none_match=etag)
+            # New bootstrap payload -> body rebuilt, old ETag no longer matches
+            self.version = "v2"
+            third = self._get(if_none_match=etag)
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(json.loads(first.content), self.rows)
+        self.assertEqual(second.status_code, 304)
+        self.assertEqual(second.content, b"")
+        self.assertEqual(third.status_code, 200)
+        self.assertEqual(json.loads(third.content), updated)
+        self.assertEqual(build.call_count, 2)
+
+    def test_compressed_variants(self):
+        import gzip
+        import brotli
+        import pandas as pd
+        with patch("fpldash.cache._get_entry", side_effect=self._entry), \
+                patch("fpldash.views.get_fpl_data", return_value=pd.DataFrame(self.rows)):
+            gz = self._get(accept_encoding="gzip, deflate")
+            br = self._get(accept_encoding="gzip, deflate, br")
+            revalidated = self._get(accept_encoding="gzip", if_none_match=br["ETag"])
+            refused = self._get(accept_encoding="br;q=0, gzip;q=0.5")
+            identity = self._get(accept_encoding="gzip;q=0")
+        self.assertEqual(refused["Content-Encoding"], "gzip")
+        self.assertNotIn("Content-Encoding", identity)
+        self.assertEqual(gz["Content-Encoding"], "gzip")
+        self.assertEqual(json.loads(gzip.decompress(gz.content)), self.rows)
+        self.assertEqual(br["Content-Encoding"], "br")
+        self.assertEqual(json.loads(brotli.decompress(br.content)), self.rows)
+        self.assertNotEqual(gz["ETag"], br["ETag"])
+        self.assertIn("Accept-Encoding", gz["Vary"])
+        self.assertEqual(revalidated.status_code, 304)
+
+
+@override_settings(SECURE_SSL_REDIRECT=False)
+class DataQueryTests(TestCase):
+    """/api/data queries are answered from an index built once per version."""
+
+    def setUp(self):
+        import pandas as pd
+        from fpldash import data_query, responses
+        from fpldash.bootstrap import Bootstrap
+        with responses._lock:
+            responses._bodies.clear()
+        data_query._indexes.clear()
+        self.frame = pd.DataFrame({
+            "PlayerId": [1, 2, 3, 4, 5],
+            "Player": ["Saka", "Rice", "Palmer", "Raya", "Jackson"],
+            "Position": ["MID", "MID", "MID", "GK", "FWD"],
+            "Team": ["Arsenal", "Arsenal", "Chelsea", "Arsenal", "Chelsea"],
+            "Price (GBP m)": [10.0, 6.5, 10.5, 5.5, 7.5],
+            "Total Points": [150, 120, 180, 130, 120],
+        })
+        self.bootstrap = Bootstrap.parse({"teams": [
+            {"id": 1, "name": "Arsenal", "short_name": "ARS"},
+            {"id": 7, "name": "Chelsea", "short_name": "CHE"},
+        ]})
+
+    def _get(self, **params):
+        with patch("fpldash.views._data_version", return_value="v1"), \
+                patch("fpldash.data_query.get_fpl_data", return_value=self.frame) as build, \
+                patch("fpldash.data_query.get_bootstrap", return_value=self.bootstrap):
+            resp = self.client.get("/api/data", params)
+        self.builds = build.call_count
+        return resp
+
+    def test_projection_filters_sort_and_paging(self):
+        from fpldash import data_query
+        with patch("fpldash.data_query.get_fpl_data", return_value=self.frame) as build, \
+                patch("fpldash.data_query.get_bootstrap", return_value=self.bootstrap):
+            self.assertEqual(data_query.query("v1"), self.frame.to_dict(orient="records"))
+            mids = data_query.query("v1", fields=["Player"], positions=["mid"], teams=["ars", "7"],
+                                    max_price=10.0)
+            by_points = data_query.query("v1", fields=["Player"], sort="-Total Points",
+                                         offset=1, limit=3, fmt="columns")
+            cheapest = data_query.query("v1", fields=["Player"], sort="Price (GBP m)",
+                                        min_price=6, limit=1)
+            with self.assertRaises(data_query.QueryError):
+                data_query.query("v1", teams=["Spurs"])
+        self.assertEqual(build.call_count, 1)
+        self.assertEqual(mids, [{"Player": "Saka"}, {"Player": "Rice"}])
+        # Ties keep table order: Rice before Jackson.
+        self.assertEqual(by_points, {"total": 5, "offset": 1, "fields": ["Player"],
+                                     "columns": {"Player": ["Saka", "Raya", "Rice"]}})
+        self.assertEqual(cheapest, [{"Player": "Rice"}])
+
+    def test_endpoint(self):
+        resp = self._get(fields="Player,Total Points", team="CHE", format="columns")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(resp.json()["columns"], {"Player": ["Palmer", "Jackson"],
+                                                  "Total Points": [180, 120]})
+        self.assertEqual(self.builds, 1)
+        self.assertEqual(len(self._get(position="MID", limit=2).json()), 2)
+        self.assertEqual(self.builds, 0)  # same data version: index reused
+        for params in ({"fields": "Goals"}, {"sort": "-Nope"}, {"position": "GKP"},
+                       {"team": "Spurs"}, {"format": "csv"}, {"min_price": "cheap"}):
+            resp = self._get(**params)
+            self.assertEqual(resp.status_code, 400, params)
+            self.assertIn("error", resp.json())
+
+
+class MLScoresTests(TestCase):
+    """Training happens in a background job; requests only read a dict."""
+
+    def setUp(self):
+        import tempfile
+        from fpldash import ml_predictions as ml
+        self._tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmp.cleanup)
+        with ml._lock:
+            ml._cache.clear()
+        self.fingerprint = "fp1"
+        patcher = patch("fpldash.ml_predictions.get_warehouse",
+                        return_value=self._warehouse())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    @staticmethod
+    def _warehouse():
+        from fpldash import history, offline, sample_data
+        stand_in = offline.OfflineFPL(current_gw=4)
+        return history.Warehouse({
+            gw: history.frame(sample_data.make_event_live(stand_in.histories(4), gw))
+            for gw in (1, 2, 3)
+        })
+
+    def _versioned(self):
+        return {"events": []}, self.fingerprint
+
+    def test_request_path_never_trains(self):
+        from fpldash import ml_predictions as ml
+        with patch("fpldash.ml_predictions.get_bootstrap_versioned", side_effect=self._versioned), \
+                patch("fpldash.ml_predictions.run_in_background") as schedule, \
+                patch("fpldash.ml_predictions._fit_ensemble") as fit:
+            self.assertEqual(ml.get_ml_predicted_scores(), {})
+        schedule.assert_called_once_with("ml_scores", ml._train_job)
+        fit.assert_not_called()
+
+    def _table(self):
+        from fpldash import players, sample_data
+        from fpldash.bootstrap import Bootstrap
+        return players.build_player_table(Bootstrap.parse(sample_data.make_bootstrap()))
+
+    @staticmethod
+    def _fake_fit(X, y, members):
+        import numpy as np
+        profile = {name: {"fit_s": 1.0, "predict_s": 0.0} for name in members}
+        return {name: name for name in members}, np.full(len(y), 3.0), profile
+
+    def test_job_persists_and_next_worker_loads_from_disk(self):
+        from fpldash import ml_predictions as ml
+        table = self._table()
+        with override_settings(FPL_MODEL_DIR=self._tmp.name), \
+                patch("fpldash.ml_predictions.get_player_table_versioned",
+                      return_value=(table, self.fingerprint)), \
+                patch("fpldash.ml_predictions._fit_ensemble", side_effect=self._fake_fit) as fit:
+            scores = ml._train_job()
+            # A second worker: empty memory, same fingerprint -> no refit.
+            with ml._lock:
+                ml._cache.clear()
+            self.assertEqual(ml._train_job(), scores)
+            # A fresh worker picks up the newest persisted scores on its
+            # first lookup.
+            with ml._lock:
+                ml._cache.clear()
+            with patch("fpldash.ml_predictions._booted", False), \
+                    patch("fpldash.ml_predictions.get_bootstrap_versioned",
+                          side_effect=self._versioned), \
+                    patch("fpldash.ml_predictions.run_in_background") as schedule:
+                self.assertEqual(ml.get_ml_predicted_scores(), scores)
+                self.assertTrue(ml._booted)
+        self.assertEqual(fit.call_count, 1)
+        self.assertEqual(len(scores), int((table["minutes"] > 0).sum()))
+        schedule.assert_not_called()
+
+    def test_unchanged_features_skip_refit(self):
+        from fpldash import ml_predictions as ml
+        table = self._table()
+        with override_settings(FPL_MODEL_DIR=self._tmp.name), \
+                patch("fpldash.ml_predictions._fit_ensemble", side_effect=self._fake_fit) as fit:
+            with patch("fpldash.ml_predictions.get_player_table_versioned",
+                       return_value=(table, "fp1")):
+                ml._train_job()
+                version = ml.get_ml_scores_version()
+            # New bootstrap payload (e.g. ownership moved) but identical features.
+            with patch("fpldash.ml_predictions.get_player_table_versioned",
+                       return_value=(table.copy(), "fp2")):
+                ml._train_job()
+        self.assertEqual(fit.call_count, 1)
+        self.assertEqual(ml._cache["scores"]["fingerprint"], "fp2")
+        self.assertEqual(ml._cache["scores"]["skipped"], 1)
+        self.assertEqual(ml.get_ml_scores_version(), version)
+
+    def test_time_budget_drops_costliest_members(self):
+        from fpldash import ml_predictions as ml
+        costs = {"ridge": 0.01, "random_forest": 5.0, "gradient_boosting": 3.0, "xgboost": 1.0}
+        kept, dropped = ml._select_members(costs, budget=2.0)
+        self.assertEqual(kept, ["ridge", "xgboost"])
+        self.assertEqual(dropped, ["random_forest", "gradient_boosting"])
+        self.assertEqual(ml._select_members(costs, budget=0)[0], list(ml.MODEL_NAMES))
+        self.assertEqual(ml._select_members(costs, budget=0.001)[0], ["ridge"])
@@ -0,0 +1,299 @@
+"""
+Transfer planner: the best 1-, 2- and 3-transfer moves for a squad.
+
+Each player's value is the expected points over the next ``horizon``
+gameweeks: the ML predicted score (or (form + PPG) / 2) times the club's
+fixture weight from ``FixtureMatrix.fixture_weights`` — a neutral fixture
+counts 1, a blank 0, a double about 2.  Injured / suspended players are
+worth 0 and cannot be bought.
+
+A move of k transfers sells k squad players and buys k players of the
+same positions, within the bank plus the sale prices and keeping at most
+3 players per club.  Its gain is the change in squad value; transfers
+beyond the free ones cost ``HIT`` points each.
+
+Enumerating ins directly is O(n^k) per set of outs (~200 candidates per
+position), so the search is a branch and bound instead:
+
+* per position, candidates are kept sorted by value (best first) with a
+  suffix minimum of their price, and also sorted by price with a prefix
+  maximum of their value — "the best value at or below this price" is
+  then one bisect;
+* sets of outs are tried in order of their optimistic bound (best
+  affordable in per slot, ignoring clubs) and abandoned as soon as that
+  bound cannot beat the current top results;
+* within a set, ins are chosen slot by slot in value order; a branch is
+  cut when its gain plus the best affordable value of the remaining slots
+  cannot improve, and the scan stops when no remaining candidate is
+  cheap enough.
+
+Outs of the same position are interchangeable, so their ins are chosen
+in increasing index order to skip permutations of the same move.
+
+Sale prices are taken as current prices: the public picks endpoint does
+not expose purchase prices.
+"""
+
+import heapq
+import itertools
+import threading
+from bisect import bisect_right
+from collections import Counter, OrderedDict
+
+import numpy as np
+import requests
+
+from . import metrics
+from .cache import current_gameweek, get_bootstrap, get_manager_picks, picks_gameweek
+from .ml_predictions import get_ml_predicted_scores
+from .players import POSITIONS, get_player_table
+from .squad import MAX_PER_CLUB, UNAVAILABLE
+
+HIT = 4
+MAX_TRANSFERS = 3
+MAX_HORIZON = 10
+MAX_TOP = 10
+
+_lock = threading.Lock()
+_pools: OrderedDict = OrderedDict()  # (version, horizon) -> _Pool
+_MAX_POOLS = 8
+
+
+class TransferError(Exception):
+    """The manager's squad could not be loaded."""
+
+
+class _Pool:
+    """Per-player value over a horizon and per-position value order."""
+
+    __slots__ = ("players", "order", "records")
+
+    def __init__(self, horizon: int):
+        from .fdr import get_fixture_matrix
+
+        data = get_bootstrap()
+        df = get_player_table()
+        df = df[df["now_cost"] > 0]
+        ml_scores = get_ml_predicted_scores()
+
+        gw = current_gameweek(data)
+        try:
+            weights = get_fixture_matrix().fixture_weights(gw + 1, gw + horizon)
+        except Exception:
+            weights = {}
+        weight = df["team"].map(weights).fillna(float(horizon))
+        fallback = ((df["form"] + df["points_per_game"]) / 2).round(2)
+        predicted = df["id"].map(ml_scores).fillna(fallback)
+        value = (predicted * weight).round(3)
+
+        available = np.ones(len(df), dtype=bool)
+        if "status" in df.columns:
+            available &= ~df["status"].isin(UNAVAILABLE).to_numpy()
+        if "chance_of_playing_next_round" in df.columns:
+            available &= (df["chance_of_playing_next_round"].fillna(100) > 0).to_numpy()
+        value = np.where(available, value.to_numpy(dtype=float), 0.0)
+
+        ids = df["id"].to_numpy()
+        position = df["element_type"].to_numpy()
+        team = df["team"].to_numpy()
+        cost = df["now_cost"].to_numpy()
+        # id -> (position, team, cost, value)
+        self.players = {
+            int(i): (int(p), int(t), int(c), float(v))
+            for i, p, t, c, v in zip(ids, position, team, cost, value)
+        }
+        # position -> candidate ids, best value first (ties: cheaper, then id)
+        self.order = {}
+        for pos in POSITIONS:
+            idx = np.flatnonzero((position == pos) & available)
+            idx = idx[np.lexsort((ids[idx], cost[idx], -value[idx]))]
+            self.order[pos] = [int(i) for i in ids[idx]]
+        self.records = {
+            int(r["id"]): {
+                "id": int(r["id"]),
+                "name": r["web_name"],
+                "team": r.get("Team", ""),
+                "position": POSITIONS.get(int(r["element_type"]), ""),
+                "price": round(float(r["price"]), 1),
+                "predicted_score": round(float(p), 2),
+                "expected_points": round(float(v), 2),
+            }
+            for r, p, v in zip(df.to_dict(orient="records"), predicted, value)
+        }
+
+
+def _get_pool(version: str, horizon: int) -> _Pool:
+    key = (version, horizon)
+    with _lock:
+        pool = _pools.get(key)
+        if pool is not None:
+            _pools.move_to_end(key)
+            return pool
+    pool = _Pool(horizon)
+    with _lock:
+        _pools[key] = pool
+        while len(_pools) > _MAX_POOLS:
+            _pools.popitem(last=False)
+    return pool
+
+
+class _Candidates:
+    """One position's buyable players, minus the current squad."""
+
+    __slots__ = ("ids", "cost", "team", "value", "min_cost", "by_price", "best_at_price")
+
+    def __init__(self, pool: _Pool, pos: int, owned: set):
+        ids = [i for i in pool.order[pos] if i not in owned]
+        rows = [pool.players[i] for i in ids]
+        self.ids = ids
+        self.cost = [r[2] for r in rows]
+        self.team = [r[1] for r in rows]
+        self.value = [r[3] for r in rows]
+        # min_cost[j]: cheapest candidate from j on (value order)
+        self.min_cost = list(np.minimum.accumulate(self.cost[::-1])[::-1]) if ids else []
+        # by_price / best_at_price: ascending prices, best value at or below each
+        order = np.argsort(self.cost, kind="stable")
+        self.by_price = [self.cost[j] for j in order]
+        self.best_at_price = (
+            list(np.maximum.accumulate([self.value[j] for j in order])) if ids else []
+        )
+
+    def best_within(self, budget: int) -> float:
+        """Highest value among candidates costing at most ``budget``."""
+        j = bisect_right(self.by_price, budget)
+        return self.best_at_price[j - 1] if j else float("-inf")
+
+
+def best_moves(pool: _Pool, squad_ids, bank: int, n_transfers: int, top: int = 3) -> list:
+    """
+    The ``top`` best moves of exactly ``n_transfers`` transfers, best first,
+    as ``(gain, [(out_id, in_id), ...])``.  ``bank`` is in FPL tenths.
+    """
+    squad = sorted(
+        (pool.players[i][0], i) for i in squad_ids if i in pool.players
+    )
+    if n_transfers < 1 or n_transfers > len(squad):
+        return []
+    owned = set(squad_ids)
+    clubs = Counter(pool.players[i][1] for _, i in squad)
+    candidates = {pos: _Candidates(pool, pos, owned) for pos in {p for p, _ in squad}}
+
+    results: list = []  # min-heap of (gain, seq, pairs)
+    seq = itertools.count()
+
+    def floor() -> float:
+        return results[0][0] if len(results) == top else float("-inf")
+
+    def bound(slots, level, budget) -> float:
+        return sum(candidates[pos].best_within(budget) for pos in slots[level:])
+
+    bounded = []
+    for outs in itertools.combinations(squad, n_transfers):
+        slots = [pos for pos, _ in outs]
+        budget = bank + sum(pool.players[i][2] for _, i in outs)
+        sold = sum(pool.players[i][3] for _, i in outs)
+        bounded.append((bound(slots, 0, budget) - sold, slots, outs, budget, sold))
+    bounded.sort(key=lambda b: -b[0])
+
+    for optimistic, slots, outs, budget, sold in bounded:
+        if optimistic <= floor():
+            break
+        out_ids = [i for _, i in outs]
+        counts = clubs.copy()
+        for i in out_ids:
+            counts[pool.players[i][1]] -= 1
+        chosen = []
+
+        def fill(level, start, budget, gain):
+            cand = candidates[slots[level]]
+            last = level == n_transfers - 1
+            same_next = not last and slots[level + 1] == slots[level]
+            rest = 0.0 if last else bound(slots, level + 1, budget)
+            for j in range(start, len(cand.ids)):
+                value = cand.value[j]
+                if gain + value + rest <= floor() or cand.min_cost[j] > budget:
+                    return
+                cost, team = cand.cost[j], cand.team[j]
+                if cost > budget or counts[team] >= MAX_PER_CLUB:
+                    continue
+                if last:
+                    pairs = tuple(zip(out_ids, chosen + [cand.ids[j]]))
+                    entry = (gain + value, next(seq), pairs)
+                    if len(results) < top:
+                        heapq.heappush(results, entry)
+                    else:
+                        heapq.heappushpop(results, entry)
+                    continue
+                left = budget - cost
+                if gain + value + bound(slots, level + 1, left) <= floor():
+                    continue
+                counts[team] += 1
+                chosen.append(cand.ids[j])
+                fill(level + 1, j + 1 if same_next else 0, left, gain + value)
+                chosen.pop()
+                counts[team] -= 1
+
+        fill(0, 0, budget, -sold)
+
+    return [(gain, list(pairs)) for gain, _, pairs in sorted(results, key=lambda r: (-r[0], r[1]))]
+
+
+def get_squad(manager_id: int, gw: int) -> tuple:
+    """(squad player ids, bank in tenths) from the manager's gameweek picks."""
+    try:
+        picks = get_manager_picks(manager_id, gw)
+    except requests.HTTPError as ex:
+        if ex.response is not None and ex.response.status_code == 404:
+            raise TransferError(f"no picks for manager {manager_id} in gameweek {gw}") from ex
+        raise
+    if "picks" not in picks:
+        raise TransferError(f"no picks for manager {manager_id} in gameweek {gw}")
+    bank = int((picks.get("entry_history") or {}).get("bank") or 0)
+    return [int(p["element"]) for p in picks["picks"]], bank
+
+
+def plan(version: str, manager_id: int, horizon: int = 3, free_transfers: int = 2,
+         top: int = 3) -> dict:
+    """
+    Best moves of 1 to ``MAX_TRANSFERS`` transfers for ``manager_id``.
+
+    ``horizon`` is the number of upcoming gameweeks values are summed
+    over and ``free_transfers`` how many moves are free of the ``HIT``;
+    ``top`` moves are returned per number of transfers.  ``version``
+    identifies the bootstrap / fixtures / ML scores the values come from.
+    """
+    horizon = max(1, min(int(horizon), MAX_HORIZON))
+    free_transfers = max(0, int(free_transfers))
+    top = max(1, min(int(top), MAX_TOP))
+    gw = picks_gameweek(get_bootstrap())
+    squad_ids, bank = get_squad(manager_id, gw)
+
+    moves = {}
+    with metrics.phase("transfer-search"):
+        pool = _get_pool(version, horizon)
+        for n in range(1, MAX_TRANSFERS + 1):
+            hit = HIT * max(0, n - free_transfers)
+            options = []
+            for gain, pairs in best_moves(pool, squad_ids, bank, n, top):
+                spent = sum(pool.players[i][2] - pool.players[o][2] for o, i in pairs)
+                options.append({
+                    "transfers": [
+                        {"out": pool.records[o], "in": pool.records[i]} for o, i in pairs
+                    ],
+                    "gain": round(gain, 2),
+                    "hit": hit,
+                    "net": round(gain - hit, 2),
+                    "bank_after": (bank - spent) / 10.0,
+                })
+            moves[str(n)] = options
+
+    return {
+        "manager": manager_id,
+        "gameweek": gw,
+        "start": gw + 1,
+        "end": gw + horizon,
+        "bank": bank / 10.0,
+        "free_transfers": free_transfers,
+        "squad": [pool.records[i] for i in squad_ids if i in pool.records],
+        "moves": moves,
+    }
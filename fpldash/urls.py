@@ -4,10 +4,16 @@ from . import views
 urlpatterns = [
     path("", views.index, name="index"),
     path("api/myteam", views.api_myteam, name="api_myteam"),
+    path("api/myteam/<int:manager_id>", views.api_myteam, name="api_myteam_manager"),
     path("api/data", views.api_data, name="api_data"),
     path("api/suggestions", views.api_suggestions, name="api_suggestions"),
     path("api/forecast", views.api_forecast, name="api_forecast"),
+    path("api/squad", views.api_squad, name="api_squad"),
+    path("api/transfers", views.api_transfers, name="api_transfers"),
+    path("api/fixtures-matrix", views.api_fixtures_matrix, name="api_fixtures_matrix"),
     path("api/player-summary/<int:player_id>", views.api_player_summary, name="api_player_summary"),
     path("api/pricechanges", views.api_pricechanges, name="api_pricechanges"),
     path("api/pricechanges_fpl", views.api_pricechanges_fpl, name="api_pricechanges_fpl"),
+    path("api/trends", views.api_trends, name="api_trends"),
+    path("metrics", views.metrics_view, name="metrics"),
 ]
@@ -1,96 +1,95 @@
+import logging
 import os
-import re
-import xml.etree.ElementTree as ET
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from datetime import datetime, timedelta, timezone
+from datetime import timedelta, timezone as dt_timezone
 
-import requests
-from django.http import JsonResponse
+import pandas as pd
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.http import HttpResponse, JsonResponse
 from django.shortcuts import render
-
-from .cache import get_bootstrap, compute_team_fdr
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import data_query, forecast, metrics, pricefeed, snapshots, squad, suggestions, transfers
+from .cache import (
+    aget_manager_picks,
+    aget_player_histories,
+    current_gameweek,
+    get_bootstrap,
+    get_bootstrap_versioned,
+    get_fixtures_versioned,
+    picks_gameweek,
+)
+from .fdr import get_fixture_matrix_versioned
 from .fpl_data import get_fpl_data
-from .forecast import get_forecast_data
-from .ml_predictions import get_ml_predicted_scores
+from .ml_predictions import get_ml_scores_version
+from .players import get_player_table
+from .points import aget_points
+from .responses import acached_json_response, cached_json_response
+
+logger = logging.getLogger(__name__)
 
 TEAM_ID = os.getenv("FPL_TEAM_ID", "1897520")
+_FORECAST_MAX_AGE = 300  # seconds
 
 # ---------- Helpers ----------
 
-def _get_last_gameweek_points(player_id: int) -> int:
+def _int_param(request, name: str, default: int) -> int:
     try:
-        url = f"https://fantasy.premierleague.com/api/element-summary/{player_id}/"
-        resp = requests.get(url, timeout=10)
-        if resp.status_code != 200:
-            return 0
-        data = resp.json()
-        if "history" in data and data["history"]:
-            return data["history"][-1].get("total_points", 0)
-    except Exception:
-        pass
-    return 0
+        return int(request.GET.get(name, default))
+    except (TypeError, ValueError):
+        return default
 
 
-def _get_fpl_team(manager_id: str):
-    try:
-        data = get_bootstrap()
-        elements = data["elements"]
-        player_map = {p["id"]: p for p in elements}
-        teams = {t["id"]: t["name"] for t in data["teams"]}
-        positions = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
-
-        events = data.get("events", [])
-        current_gw = next((gw["id"] for gw in events if gw["is_current"]), None)
-        if not current_gw:
-            current_gw = max(
-                [gw["id"] for gw in events if gw.get("is_next") or gw.get("finished")],
-                default=1,
-            )
-
-        picks_resp = requests.get(
-            f"https://fantasy.premierleague.com/api/entry/{manager_id}/event/{current_gw}/picks/",
-            timeout=15,
-        )
-        picks = picks_resp.json()
-        if "picks" not in picks:
-            return []
-
-        out_base = []
-        for pick in picks["picks"]:
-            player = player_map.get(pick["element"])
-            if not player:
-                continue
-            photo_id = str(player["photo"]).split(".")[0]
-            photo = f"https://resources.premierleague.com/premierleague/photos/players/250x250/p{photo_id}.png"
-            out_base.append({
-                "ID": player["id"],
-                "web_name": player["web_name"],
-                "name": f"{player['first_name']} {player['second_name']}",
-                "team": teams.get(player["team"], "Unknown"),
-                "position": positions.get(player["element_type"], "N/A"),
-                "now_cost": round(player["now_cost"] / 10.0, 1),
-                "points": int(player["total_points"]),
-                "last_gw_points": 0,  # filled in below
-                "is_captain": pick.get("is_captain", False),
-                "is_vice_captain": pick.get("is_vice_captain", False),
-                "photo": photo,
-                "starting": pick["position"] <= 11,
-            })
-
-        # Fetch last-GW points for all players in parallel
-        with ThreadPoolExecutor(max_workers=15) as pool:
-            futures = {
-                pool.submit(_get_last_gameweek_points, entry["ID"]): i
-                for i, entry in enumerate(out_base)
-            }
-            for future in as_completed(futures):
-                idx = futures[future]
-                out_base[idx]["last_gw_points"] = future.result()
-
-        out_base.sort(key=lambda x: (not x["starting"], -x["last_gw_points"]))
-        return out_base
-    except Exception:
-        return []
+def _team_rows(data, picks: dict) -> list:
+    col = data.elements
+    teams = data.team_names()
+    positions = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
+
+    out_base = []
+    for pick in picks.get("picks", []):
+        row = data.index.get(pick["element"])
+        if row is None:
+            continue
+        photo_id = col["photo"][row].split(".")[0]
+        photo = f"https://resources.premierleague.com/premierleague/photos/players/250x250/p{photo_id}.png"
+        out_base.append({
+            "ID": int(col["id"][row]),
+            "web_name": col["web_name"][row],
+            "name": f"{col['first_name'][row]} {col['second_name'][row]}",
+            "team": teams.get(int(col["team"][row]), "Unknown"),
+            "position": positions.get(int(col["element_type"][row]), "N/A"),
+            "now_cost": round(int(col["now_cost"][row]) / 10.0, 1),
+            "points": int(col["total_points"][row]),
+            "last_gw_points": 0,  # filled in by _finish_team
+            "is_captain": pick.get("is_captain", False),
+            "is_vice_captain": pick.get("is_vice_captain", False),
+            "photo": photo,
+            "starting": pick["position"] <= 11,
+        })
+    return out_base
+
+
+def _finish_team(out_base: list, histories: dict, errors: dict) -> list:
+    if errors:
+        logger.warning("myteam: no history for players %s", sorted(errors))
+    for entry in out_base:
+        history = histories.get(entry["ID"])
+        if history:
+            entry["last_gw_points"] = history[-1].get("total_points", 0)
+    out_base.sort(key=lambda x: (not x["starting"], -x["last_gw_points"]))
+    return out_base
+
+
+async def _get_fpl_team(manager_id):
+    data = await sync_to_async(get_bootstrap, thread_sensitive=False)()
+    picks = await aget_manager_picks(manager_id, picks_gameweek(data))
+    out_base = _team_rows(data, picks)
+    # Last-GW points for the whole squad in one batch
+    histories, errors = await aget_player_histories(
+        [entry["ID"] for entry in out_base], timeout=10
+    )
+    return _finish_team(out_base, histories, errors)
 
 
 # ---------- Views ----------
@@ -99,99 +98,283 @@ def index(request):
     return render(request, "fpldash/index.html")
 
 
-def api_myteam(request):
-    return JsonResponse(_get_fpl_team(TEAM_ID), safe=False)
+async def api_myteam(request, manager_id: int = None):
+    """Squad of ``manager_id`` (default: FPL_TEAM_ID) for the current gameweek."""
+    if manager_id is None:
+        manager_id = TEAM_ID
+    try:
+        team = await _get_fpl_team(manager_id)
+    except Exception as ex:
+        logger.warning("myteam: could not load manager %s: %s", manager_id, ex)
+        return JsonResponse({"error": str(ex)}, status=502)
+    return JsonResponse(team, safe=False)
+
+
+def _data_version(ml: bool = False) -> str:
+    """
+    Version token for responses derived from bootstrap + fixtures (and,
+    optionally, the ML scores).  Bodies cached under it are reused until
+    one of those inputs is replaced.
+    """
+    parts = [get_bootstrap_versioned()[1]]
+    try:
+        parts.append(get_fixtures_versioned()[1])
+    except Exception:
+        # compute_team_fdr falls back to neutral FDRs without fixtures
+        parts.append("no-fixtures")
+    if ml:
+        parts.append(get_ml_scores_version())
+    return "/".join(parts)
+
+
+def _list_param(request, name: str) -> list:
+    return [v.strip() for v in request.GET.get(name, "").split(",") if v.strip()]
+
+
+def _float_param(request, name: str):
+    raw = request.GET.get(name)
+    if raw in (None, ""):
+        return None
+    try:
+        return float(raw)
+    except ValueError:
+        raise ValueError(f"{name} must be a number") from None
+
+
+_DATA_PARAMS = ("fields", "position", "team", "min_price", "max_price", "sort",
+                "offset", "limit", "format")
 
 
 def api_data(request):
-    df = get_fpl_data()
-    return JsonResponse(df.to_dict(orient="records"), safe=False)
+    """
+    Player stats table (see fpl_data.py), every column of every player.
+
+    Optional query parameters, answered from an index built once per data
+    version (see data_query.py): ``fields`` (comma-separated columns),
+    ``position`` and ``team`` (comma-separated; team ids, names or short
+    names), ``min_price`` / ``max_price`` in £m, ``sort`` (a column,
+    ``-`` prefix for descending), ``offset`` / ``limit``, and
+    ``format=columns`` for one array per column instead of row objects.
+    """
+    version = _data_version()
+    if not any(name in request.GET for name in _DATA_PARAMS):
+        return cached_json_response(
+            request,
+            "data",
+            version,
+            lambda: get_fpl_data().to_dict(orient="records"),
+        )
+    try:
+        params = {
+            "fields": _list_param(request, "fields"),
+            "positions": _list_param(request, "position"),
+            "teams": _list_param(request, "team"),
+            "min_price": _float_param(request, "min_price"),
+            "max_price": _float_param(request, "max_price"),
+            "sort": request.GET.get("sort") or None,
+            "offset": max(0, _int_param(request, "offset", 0)),
+            "limit": _int_param(request, "limit", -1),
+            "fmt": request.GET.get("format") or "rows",
+        }
+        if params["limit"] < 0:
+            params["limit"] = None
+    except ValueError as ex:
+        return JsonResponse({"error": str(ex)}, status=400)
+    key = "/".join(",".join(v) if isinstance(v, list) else str(v) for v in params.values())
+    try:
+        return cached_json_response(
+            request,
+            "data_query",
+            f"{version}/{key}",
+            lambda: data_query.query(version, **params),
+        )
+    except data_query.QueryError as ex:
+        return JsonResponse({"error": str(ex)}, status=400)
+    except Exception as ex:
+        return JsonResponse({"error": str(ex)}, status=500)
 
 
 def api_suggestions(request):
     """
-    Return top-3 value picks per position based on form, PPG, price, and
-    fixture difficulty (FDR) for the next 3 gameweeks.
+    Return top value picks per position (default: top 3) based on ML
+    predicted score, price, and fixture difficulty (FDR).
 
-    Score = (form×0.6 + ppg×0.4) × (6 - fdr) / price
+    Score = predicted × clamp(6 - fdr, 0.5) / price
     A lower FDR (easier fixture) raises the score; a higher price lowers it.
+
+    Query parameters: ``n`` per position, ``position`` (GK/DEF/MID/FWD),
+    ``max_price`` (£m), ``team`` (id or name) and ``horizon`` (gameweeks
+    the FDR is averaged over, default 3).
     """
     try:
-        data = get_bootstrap()
-        elements = data["elements"]
-        teams = {t["id"]: t["name"] for t in data["teams"]}
-        positions = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
-
-        team_fdr = compute_team_fdr(data, n_gws=3)
-        ml_scores = get_ml_predicted_scores()
-
-        scored = []
-        for e in elements:
-            price = e.get("now_cost", 0) / 10.0
-            if price <= 0:
-                continue
-            form = float(e.get("form") or 0)
-            ppg = float(e.get("points_per_game") or 0)
-            team_id = e.get("team")
-            fdr = team_fdr.get(team_id, 3.0)
-            player_id = int(e.get("id") or 0)
-            ml_pred = ml_scores.get(player_id, round((form + ppg) / 2, 2))
-            # Clamp FDR bonus so ranking score stays positive
-            fdr_bonus = max(6.0 - fdr, 0.5)
-            score = ml_pred * fdr_bonus / price
-
-            scored.append({
-                "name": e.get("web_name"),
-                "team": teams.get(team_id, ""),
-                "position": positions.get(e.get("element_type"), ""),
-                "price": round(price, 1),
-                "form": round(form, 1),
-                "ppg": round(ppg, 1),
-                "predicted_score": round(ml_pred, 2),
-                "total_points": int(e.get("total_points") or 0),
-                "fdr_next3": fdr,
-                "score": round(score, 3),
-            })
-
-        result = []
-        for pos in ("GK", "DEF", "MID", "FWD"):
-            top3 = sorted(
-                (p for p in scored if p["position"] == pos),
-                key=lambda x: -x["score"],
-            )[:3]
-            for p in top3:
-                p["reason"] = (
-                    f"Form {p['form']} | PPG {p['ppg']} | "
-                    f"FDR {p['fdr_next3']} | \u00a3{p['price']}m"
-                )
-                result.append(p)
-
-        return JsonResponse(result, safe=False)
+        n = _int_param(request, "n", 3)
+        horizon = _int_param(request, "horizon", 3)
+        position = request.GET.get("position") or None
+        team = request.GET.get("team") or None
+        try:
+            max_price = float(request.GET["max_price"])
+        except (KeyError, ValueError):
+            max_price = None
+        version = _data_version(ml=True)
+        return cached_json_response(
+            request,
+            "suggestions",
+            f"{version}/{n}/{position}/{max_price}/{team}/{horizon}",
+            lambda: suggestions.rank(version, n, position, max_price, team, horizon),
+        )
     except Exception as ex:
         return JsonResponse({"error": str(ex)}, status=500)
 
 
-def api_forecast(request):
+async def api_forecast(request):
     try:
         try:
             limit = int(request.GET.get("limit", 50))
         except ValueError:
             limit = 50
-        data = get_forecast_data(limit=limit)
-        return JsonResponse(data, safe=False)
+        version = await sync_to_async(_data_version, thread_sensitive=False)(ml=True)
+        fetched = {}
+
+        async def prefetch():
+            selection = await sync_to_async(forecast.select_players, thread_sensitive=False)(limit)
+            with metrics.phase("forecast-points"):
+                points, errors = await aget_points(
+                    selection["top"]["id"].tolist(), selection["n_gws"]
+                )
+            fetched["args"] = (selection, points, errors)
+
+        # The current gameweek's live points (and gameweeks still being
+        # ingested) change without a new data version, so bodies are also
+        # capped at _FORECAST_MAX_AGE.
+        return await acached_json_response(
+            request,
+            "forecast",
+            f"{version}/{limit}",
+            lambda: forecast.build_rows(*fetched["args"]),
+            max_age=_FORECAST_MAX_AGE,
+            prefetch=prefetch,
+        )
+    except Exception as ex:
+        return JsonResponse({"error": str(ex)}, status=500)
+
+
+def _build_fixtures_matrix(data, matrix, start: int, end: int) -> dict:
+    short = {t.id: t.short_name for t in data.teams}
+    averages = matrix.average(start, end)
+    counts = matrix.fixture_counts(start, end)
+    teams = []
+    for t in data.teams:
+        tid = t.id
+        teams.append({
+            "id": tid,
+            "name": t.name,
+            "short_name": t.short_name,
+            "avg_fdr": averages.get(tid),
+            "fixtures": counts.get(tid, 0),
+            "gameweeks": [
+                [
+                    {"opponent": short.get(opp, ""), "home": home, "difficulty": fdr}
+                    for opp, home, fdr in cell
+                ]
+                for cell in matrix.team_fixtures(tid, start, end)
+            ],
+        })
+    return {"start": start, "end": end, "teams": teams}
+
+
+def api_fixtures_matrix(request):
+    """
+    Per-team fixture difficulty for gameweeks ``start`` .. ``start +
+    horizon - 1`` (default: the next 6).  Each gameweek cell lists that
+    team's fixtures, so blanks are empty and doubles have two entries.
+    """
+    try:
+        data, bootstrap_version = get_bootstrap_versioned()
+        matrix, fixtures_version = get_fixture_matrix_versioned()
+        start = max(1, _int_param(request, "start", current_gameweek(data) + 1))
+        horizon = max(1, min(_int_param(request, "horizon", 6), 38))
+        end = start + horizon - 1
+        return cached_json_response(
+            request,
+            "fixtures_matrix",
+            f"{bootstrap_version}/{fixtures_version}/{start}-{end}",
+            lambda: _build_fixtures_matrix(data, matrix, start, end),
+        )
+    except Exception as ex:
+        return JsonResponse({"error": str(ex)}, status=500)
+
+
+async def api_squad(request):
+    """
+    Points-maximising 15-man squad and XI under FPL rules (see squad.py).
+
+    Query parameters: ``budget`` in £m (default 100.0) and
+    ``bench_weight``, the share of a bench player's predicted points that
+    counts towards the objective (default 0.1).  The solve runs in a
+    worker thread, not on the event loop.
+    """
+    try:
+        try:
+            budget = int(round(float(request.GET.get("budget", 100.0)) * 10))
+            bench_weight = min(max(float(request.GET.get("bench_weight", 0.1)), 0.0), 1.0)
+        except ValueError:
+            return JsonResponse({"error": "budget and bench_weight must be numbers"}, status=400)
+        version = await sync_to_async(_data_version, thread_sensitive=False)(ml=True)
+        return await acached_json_response(
+            request,
+            "squad",
+            f"{version}/{budget}/{bench_weight}",
+            lambda: squad.build_squad(budget, bench_weight),
+        )
+    except squad.SquadError as ex:
+        return JsonResponse({"error": f"no legal squad: {ex}"}, status=422)
     except Exception as ex:
         return JsonResponse({"error": str(ex)}, status=500)
 
 
-def api_player_summary(request, player_id: int):
+async def api_transfers(request):
+    """
+    Best 1-, 2- and 3-transfer moves for a manager's squad (see
+    transfers.py).
+
+    Query parameters: ``manager`` (default: FPL_TEAM_ID), ``horizon``
+    (gameweeks expected points are summed over, default 3),
+    ``free_transfers`` (default 2; each extra transfer costs 4 points) and
+    ``top`` moves per number of transfers (default 3).  The picks fetch
+    and the search run in a worker thread, not on the event loop.
+    """
     try:
-        url = f"https://fantasy.premierleague.com/api/element-summary/{int(player_id)}/"
-        resp = requests.get(url, timeout=20)
-        resp.raise_for_status()
-        raw = resp.json()
+        try:
+            manager_id = int(request.GET.get("manager", TEAM_ID))
+        except ValueError:
+            return JsonResponse({"error": "manager must be an FPL entry id"}, status=400)
+        horizon = _int_param(request, "horizon", 3)
+        free_transfers = _int_param(request, "free_transfers", 2)
+        top = _int_param(request, "top", 3)
+        version = await sync_to_async(_data_version, thread_sensitive=False)(ml=True)
+        # The squad behind the answer changes with the manager's own
+        # transfers, which the data version does not see.
+        return await acached_json_response(
+            request,
+            "transfers",
+            f"{version}/{manager_id}/{horizon}/{free_transfers}/{top}",
+            lambda: transfers.plan(version, manager_id, horizon, free_transfers, top),
+            max_age=_FORECAST_MAX_AGE,
+        )
+    except transfers.TransferError as ex:
+        return JsonResponse({"error": str(ex)}, status=404)
+    except Exception as ex:
+        return JsonResponse({"error": str(ex)}, status=500)
+
+
+async def api_player_summary(request, player_id: int):
+    try:
+        histories, errors = await aget_player_histories([player_id], timeout=20)
+        if player_id in errors:
+            raise errors[player_id]
         history = [
             {"round": h.get("round"), "total_points": h.get("total_points")}
-            for h in (raw.get("history") or [])
+            for h in histories.get(player_id, [])
             if isinstance(h, dict)
         ]
         return JsonResponse({"history": history}, safe=False)
@@ -199,186 +382,112 @@ def api_player_summary(request, player_id: int):
         return JsonResponse({"error": str(ex)}, status=502)
 
 
-# ---------- Twitter / price-change helpers ----------
+# ---------- Price changes ----------
 
-def _fetch_tweets_via_api(username: str, days: int = 7):
-    token = os.getenv("TWITTER_BEARER_TOKEN")
-    if not token:
-        return None
-    headers = {"Authorization": f"Bearer {token}"}
+async def api_pricechanges(request):
+    username = request.GET.get("user", "fplpricechanges")
     try:
-        uresp = requests.get(
-            f"https://api.twitter.com/2/users/by/username/{username}",
-            headers=headers,
-            timeout=15,
-        )
-        if uresp.status_code != 200:
-            return None
-        uid = uresp.json().get("data", {}).get("id")
-        if not uid:
-            return None
-        start_time = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()
-        tresp = requests.get(
-            f"https://api.twitter.com/2/users/{uid}/tweets",
-            params={
-                "max_results": 100,
-                "exclude": "replies,retweets",
-                "tweet.fields": "created_at,text",
-                "start_time": start_time,
-            },
-            headers=headers,
-            timeout=20,
-        )
-        if tresp.status_code != 200:
-            return None
-        out = []
-        for t in tresp.json().get("data", []) or []:
-            out.append({
-                "created_at": t.get("created_at"),
-                "text": t.get("text"),
-                "url": f"https://x.com/{username}/status/{t.get('id')}",
-            })
-        return out
-    except Exception:
-        return None
+        days = int(request.GET.get("days", "7"))
+    except (TypeError, ValueError):
+        days = 7
+    days = max(1, min(days, 30))
+    return JsonResponse(await pricefeed.get_tweets(username, days), safe=False)
 
 
-_essy_profile_re = re.compile(
-    r"<time[^>]+datetime=\"([^\"]+)\"[\s\S]*?</time>"
-    r"[\s\S]*?<p class=\"timeline-Tweet-text\"[^>]*>([\s\S]*?)</p>"
-)
+def _build_pricechanges_fpl() -> list:
+    df = get_player_table()
+    df = df[df["cost_change_event"] != 0]
 
+    change_event = df["cost_change_event"] / 10.0
+    changes = pd.DataFrame({
+        "Player": df["web_name"],
+        "Team": df["Team"],
+        "Position": df["Position"],
+        "Price": df["price"].round(1),
+        "Change_Event": change_event,
+        "Change_Since_Start": df["cost_change_start"] / 10.0,
+        "Status": change_event.gt(0).map({True: "Riser", False: "Faller"}),
+    })
+    out = changes.to_dict(orient="records")
 
-def _strip_html(s: str) -> str:
-    return (
-        re.sub(r"<[^>]+>", " ", s or "")
-        .replace("&amp;", "&")
-        .replace("&lt;", "<")
-        .replace("&gt;", ">")
-        .strip()
-    )
+    out.sort(key=lambda x: (x["Status"] != "Riser", -abs(x["Change_Event"]), x["Player"]))
+    return out
 
 
-def _fetch_tweets_via_syndication(username: str, days: int = 7):
+def api_pricechanges_fpl(request):
     try:
-        resp = requests.get(
-            f"https://cdn.syndication.twimg.com/widgets/timelines/profile?screen_name={username}",
-            timeout=20,
+        return cached_json_response(
+            request,
+            "pricechanges_fpl",
+            get_bootstrap_versioned()[1],
+            _build_pricechanges_fpl,
         )
-        if resp.status_code != 200:
-            return None
-        j = resp.json()
-        body = j.get("body") or j.get("body_html") or ""
-        items = _essy_profile_re.findall(body)
-        cutoff = datetime.utcnow() - timedelta(days=days)
-        out = []
-        for dt_str, html in items:
-            try:
-                ts = datetime.fromisoformat(dt_str.replace("Z", "+00:00"))
-            except Exception:
-                continue
-            if ts.replace(tzinfo=None) < cutoff:
-                continue
-            out.append({
-                "created_at": ts.isoformat(),
-                "text": _strip_html(html),
-                "url": None,
-            })
-        return out
-    except Exception:
-        return None
-
+    except Exception as ex:
+        return JsonResponse({"error": str(ex)}, status=500)
 
-def _fetch_tweets_via_nitter(username: str, days: int = 7):
-    mirrors = [
-        "https://nitter.net",
-        "https://nitter.poast.org",
-        "https://nitter.fdn.fr",
-        "https://nitter.privacydev.net",
-        "https://nitter.moomoo.me",
-    ]
-    cutoff = datetime.utcnow() - timedelta(days=days)
-    for base in mirrors:
-        try:
-            url = f"{base}/{username}/rss"
-            r = requests.get(url, timeout=15, headers={"User-Agent": "Mozilla/5.0"})
-            if r.status_code != 200 or not r.text:
-                continue
-            root = ET.fromstring(r.text)
-            channel = root.find("channel")
-            if channel is None:
-                continue
-            out = []
-            for it in channel.findall("item"):
-                title = (it.findtext("title") or "").strip()
-                link = (it.findtext("link") or "").strip()
-                pub = it.findtext("pubDate") or ""
-                try:
-                    ts = datetime.strptime(pub, "%a, %d %b %Y %H:%M:%S %Z")
-                except Exception:
-                    ts = None
-                if ts is None or ts < cutoff:
-                    continue
-                out.append({
-                    "created_at": ts.isoformat(),
-                    "text": title,
-                    "url": link,
-                })
-            if out:
-                return out
-        except Exception:
-            continue
-    return None
 
+def _datetime_param(request, name: str):
+    raw = request.GET.get(name)
+    if not raw:
+        return None
+    value = parse_datetime(raw)
+    if value is None:
+        raise ValueError(f"{name} must be an ISO 8601 datetime")
+    if timezone.is_naive(value):
+        value = timezone.make_aware(value, dt_timezone.utc)
+    return value
 
-def api_pricechanges(request):
-    username = request.GET.get("user", "fplpricechanges")
-    try:
-        days = int(request.GET.get("days", "7"))
-    except (TypeError, ValueError):
-        days = 7
-    days = max(1, min(days, 30))
-    data = _fetch_tweets_via_api(username, days)
-    if not data:
-        data = _fetch_tweets_via_nitter(username, days)
-    if not data:
-        data = _fetch_tweets_via_syndication(username, days) or []
-    return JsonResponse(data, safe=False)
 
+def api_trends(request):
+    """
+    Price / ownership history per player from the recorded snapshots (see
+    snapshots.py).
 
-def api_pricechanges_fpl(request):
+    Query parameters: ``players`` (comma-separated ids, at most 50), and
+    the window as ``since`` / ``until`` (ISO 8601) or ``days`` back from
+    now (default 7).
+    """
+    try:
+        player_ids = [int(p) for p in request.GET.get("players", "").split(",") if p.strip()]
+    except ValueError:
+        return JsonResponse({"error": "players must be comma-separated ids"}, status=400)
+    try:
+        until = _datetime_param(request, "until")
+        since = _datetime_param(request, "since")
+    except ValueError as ex:
+        return JsonResponse({"error": str(ex)}, status=400)
+    if not player_ids:
+        return JsonResponse({"error": "players is required"}, status=400)
+    if len(player_ids) > snapshots.MAX_PLAYERS:
+        return JsonResponse(
+            {"error": f"at most {snapshots.MAX_PLAYERS} players per request"}, status=400
+        )
+    if since is None:
+        since = (until or timezone.now()) - timedelta(days=_int_param(request, "days", 7))
     try:
+        with metrics.phase("trends"):
+            out = snapshots.trends(player_ids, since, until)
         data = get_bootstrap()
-        elements = data.get("elements", [])
-        teams = {t["id"]: t["name"] for t in data.get("teams", [])}
-        positions = {1: "GK", 2: "DEF", 3: "MID", 4: "FWD"}
-
-        out = []
-        for e in elements:
-            now_cost = e.get("now_cost", 0) / 10.0
-            change_event = (
-                e.get("cost_change_event", 0) / 10.0
-                if e.get("cost_change_event") is not None
-                else 0.0
-            )
-            change_start = (
-                e.get("cost_change_start", 0) / 10.0
-                if e.get("cost_change_start") is not None
-                else 0.0
-            )
-            if change_event == 0:
-                continue
-            out.append({
-                "Player": e.get("web_name"),
-                "Team": teams.get(e.get("team")),
-                "Position": positions.get(e.get("element_type")),
-                "Price": round(now_cost, 1),
-                "Change_Event": change_event,
-                "Change_Since_Start": change_start,
-                "Status": "Riser" if change_event > 0 else "Faller",
-            })
-
-        out.sort(key=lambda x: (x["Status"] != "Riser", -abs(x["Change_Event"]), x["Player"]))
-        return JsonResponse(out, safe=False)
+        for player in out["players"]:
+            row = data.index.get(player["id"])
+            player["name"] = data.elements["web_name"][row] if row is not None else ""
+        return JsonResponse(out)
     except Exception as ex:
         return JsonResponse({"error": str(ex)}, status=500)
+
+
+# ---------- Metrics ----------
+
+def metrics_view(request):
+    """
+    Prometheus text exposition of this worker's metrics.  Requires
+    ``Authorization: Bearer <FPL_METRICS_TOKEN>``; with no token set it is
+    only served under DEBUG.
+    """
+    token = getattr(settings, "FPL_METRICS_TOKEN", "")
+    if not token:
+        if not settings.DEBUG:
+            return HttpResponse(status=404)
+    elif request.headers.get("Authorization") != f"Bearer {token}":
+        return HttpResponse(status=401)
+    return HttpResponse(metrics.render(), content_type="text/plain; version=0.0.4")
@@ -31,8 +31,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "fpldash.middleware.ServerTimingMiddleware",
     "django.middleware.security.SecurityMiddleware",
-    "whitenoise.middleware.WhiteNoiseMiddleware",
+    "fpldash.middleware.StaticFilesMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
     "django.middleware.csrf.CsrfViewMiddleware",
@@ -60,11 +61,16 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = "fplsite.wsgi.application"
+ASGI_APPLICATION = "fplsite.asgi.application"
 
 DATABASES = {
     "default": {
         "ENGINE": "django.db.backends.sqlite3",
-        "NAME": BASE_DIR / "db.sqlite3",
+        # Holds the snapshot history: point FPL_DB_PATH at persistent storage
+        # in production (fly.toml mounts a volume at /data for it).
+        "NAME": os.getenv("FPL_DB_PATH", BASE_DIR / "db.sqlite3"),
+        # WAL lets workers read snapshots while one of them records.
+        "OPTIONS": {"init_command": "PRAGMA journal_mode=WAL; PRAGMA synchronous=NORMAL"},
     }
 }
 
@@ -79,6 +85,43 @@ STATIC_ROOT = BASE_DIR / "staticfiles"
 
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 
+# --- FPL API cache ---
+# "memory" keeps entries per process; "file" shares them between all
+# gunicorn workers on the machine via FPL_CACHE_DIR (use /dev/shm for tmpfs).
+FPL_CACHE_BACKEND = os.getenv("FPL_CACHE_BACKEND", "memory")
+FPL_CACHE_DIR = os.getenv("FPL_CACHE_DIR", "")
+# Expired entries are served while a background refresh runs, for at most
+# this many seconds past the 30-minute TTL (0 = always block on refetch).
+FPL_CACHE_MAX_STALE = int(os.getenv("FPL_CACHE_MAX_STALE", str(6 * 3600)))
+
+# Fitted ML models and scores, keyed by bootstrap fingerprint and shared by
+# all workers (defaults to <tmp>/fpldash-models).
+FPL_MODEL_DIR = os.getenv("FPL_MODEL_DIR", "")
+# Seconds of fit + predict time the ensemble may use; the costliest members
+# are dropped when the last measured total exceeds it (0 = no budget).
+FPL_ML_TIME_BUDGET = float(os.getenv("FPL_ML_TIME_BUDGET", "0"))
+
+# Per-gameweek stats warehouse (fpldash/history.py): one columnar file per
+# finished gameweek, shared by all workers (defaults to <tmp>/fpldash-history).
+FPL_HISTORY_DIR = os.getenv("FPL_HISTORY_DIR", "")
+
+# Serve FPL API calls from the offline stand-in (fpldash/offline.py):
+# recordings in FPL_OFFLINE_DIR, else synthetic full-size season data,
+# with optional injected latency (s), 503 rate and 429 rate.
+FPL_OFFLINE = os.getenv("FPL_OFFLINE", "False").lower() == "true"
+FPL_OFFLINE_DIR = os.getenv("FPL_OFFLINE_DIR", "")
+FPL_OFFLINE_LATENCY = float(os.getenv("FPL_OFFLINE_LATENCY", "0"))
+FPL_OFFLINE_ERROR_RATE = float(os.getenv("FPL_OFFLINE_ERROR_RATE", "0"))
+FPL_OFFLINE_429_RATE = float(os.getenv("FPL_OFFLINE_429_RATE", "0"))
+
+# Record price / ownership snapshots on each bootstrap refresh (see
+# fpldash/snapshots.py; served at /api/trends).
+FPL_SNAPSHOTS = os.getenv("FPL_SNAPSHOTS", "True").lower() == "true"
+
+# Bearer token required by /metrics.  Without one the endpoint is only
+# served when DEBUG is on; set it as a secret (fly secrets set ...).
+FPL_METRICS_TOKEN = os.getenv("FPL_METRICS_TOKEN", "")
+
 # --- Security hardening for non-debug (production/CI deploy checks) ---
 if not DEBUG:
     # Fly.io terminates TLS at the edge and forwards requests to the app.